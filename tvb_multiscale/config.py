@@ -43,6 +43,10 @@ class Config(ConfigBase):
         self.DEFAULT_SUBJECT_PATH = DEFAULT_SUBJECT_PATH
         self.TVB_DATA_PATH = os.path.dirname(inspect.getabsfile(tvb_data))
         self.DEFAULT_CONNECTIVITY_ZIP = DEFAULT_CONNECTIVITY_ZIP
+        # Number of threads of TVB's parallel compiled kernels (e.g., models' dfun, integration, coupling),
+        # up to Numba's maximum (environment variable NUMBA_NUM_THREADS).
+        # If None, the Simulator leaves Numba's current number of threads unchanged.
+        self.TVB_NUM_THREADS = None
 
     # TODO: confirm if the following is correct:
     # We assume that all quantities of
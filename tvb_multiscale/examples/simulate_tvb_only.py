@@ -9,6 +9,8 @@ TvbProfile.set_profile(TvbProfile.LIBRARY_PROFILE)
 from tvb_multiscale.examples.plot_results import plot_results
 from tvb_multiscale.config import CONFIGURED
 from tvb_multiscale.tvb.simulator_builder import SimulatorBuilder
+from tvb_multiscale.simulator_tvb_deprecated.batch import parameters_grid, split_batches, set_parameters_batch
+from tvb_multiscale.simulator_tvb_deprecated.models import reduced_wong_wang_exc_io_inh_i
 from tvb_multiscale.plot.plotter import Plotter
 from tvb.simulator.models.reduced_wong_wang_exc_io_inh_i import ReducedWongWangExcIOInhI
 from tvb.simulator.models.spiking_wong_wang_exc_io_inh_i import SpikingWongWangExcIOInhI
@@ -86,6 +88,34 @@ def main_example(tvb_sim_model=ReducedWongWangExcIOInhI, connectivity=CONFIGURED
     return simulator.connectivity, results
 
 
+def parameters_sweep_example(tvb_sim_model=reduced_wong_wang_exc_io_inh_i.ReducedWongWangExcIOInhI,
+                             connectivity=CONFIGURED.DEFAULT_CONNECTIVITY_ZIP,
+                             simulation_length=100.0, batch_size=100, **sweep_params):
+    # Sweep all combinations of the values of sweep_params, e.g., G=np.linspace(0.0, 20.0, 100),
+    # with one simulation per batch of batch_size parameter sets, integrated at once along the modes' axis.
+    # The model has to support multiple modes, as tvb-multiscale's ReducedWongWangExcIOInhI does.
+
+    grid = parameters_grid(**sweep_params)
+
+    simulator_builder = SimulatorBuilder()
+    simulator_builder.model = tvb_sim_model
+    simulator_builder.connectivity = connectivity
+
+    t_start = time.time()
+    results = []
+    for batch in split_batches(grid, batch_size):
+        simulator = simulator_builder.build()
+        set_parameters_batch(simulator.model, simulator.connectivity.number_of_regions, **batch)
+        simulator.configure()
+        # Results of shape (time, state variables, regions, batch)
+        t, source = simulator.run(simulation_length=simulation_length)[0]
+        results.append(source)
+    print("\nSimulated %d parameter sets in %f secs!" % (grid[list(grid.keys())[0]].size, time.time() - t_start))
+
+    # Results of the i-th parameter set, i.e., grid[parameter][i], are results[:, :, :, i]:
+    return grid, t, np.concatenate(results, axis=-1)
+
+
 def mean_field_per_population(source_ts, populations, pop_sizes):
     from tvb_scripts.time_series.service import TimeSeriesService
 
@@ -243,3 +273,8 @@ if __name__ == "__main__":
     }
 
     main_example(MultiscaleWongWangExcIOInhI, simulation_length=100.0, config=CONFIGURED, **model_params)
+
+    # # --------------ReducedWongWangExcIOInhI parameter sweep, vectorized along the modes' axis------------------------
+    # parameters_sweep_example(reduced_wong_wang_exc_io_inh_i.ReducedWongWangExcIOInhI,
+    #                          simulation_length=100.0, batch_size=250,
+    #                          G=np.linspace(0.0, 20.0, 50), lamda=np.linspace(0.0, 1.0, 20))
@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+from functools import partial
+import numpy as np
 from xarray import DataArray
 import pandas as pd
 from tvb_multiscale.config import CONFIGURED
@@ -14,6 +16,27 @@ LOG = initialize_logger(__name__)
 PARAMETERS = ["current", "potential"]
 
 
+def _read_population_mean_spikes_number(interface, n_steps=1):
+    # Only the spikes recorded since the previous exchange are read, so the full recording is kept for analysis
+    return interface.population_mean_new_spikes_number / n_steps
+
+
+def _read_current_population_mean_values(interface, n_steps=1):
+    return interface.current_population_mean_values
+
+
+# Spiking Network -> TVB state interfaces read the output per TVB time step of a synchronization window,
+# of shape (n_steps, nodes), so that the TVB history of every time step of the window can be set:
+
+
+def _read_population_mean_spikes_number_per_step(interface, dt, n_steps=1):
+    return interface.get_population_mean_new_spikes_number_per_step(n_steps, dt)
+
+
+def _read_population_mean_values_per_step(interface, dt, n_steps=1):
+    return interface.get_population_mean_new_values_per_step(n_steps, dt)
+
+
 class TVBSpikeNetInterface(object):
 
     # This is the actual interface class between TVB and a SpikingNetwork
@@ -41,6 +64,14 @@ class TVBSpikeNetInterface(object):
     spikeNet_to_tvb_sv_interfaces_ids = None
     spikeNet_to_tvb_params = []
 
+    # Weights of the transforms that are set just as weights, for the exchange plan to precompute them
+    transforms_weights = {}
+
+    tvb_state_buffers = None
+    tvb_coupling_buffers = None
+    spikeNet_values_buffers = None
+    i_spikeNet_values_buffer = 0
+
     def __init__(self, config=CONFIGURED):
         self.config = config
         LOG.info("%s created!" % self.__class__)
@@ -69,6 +100,109 @@ class TVBSpikeNetInterface(object):
     def number_of_tvb_state_variables(self):
         return len(self.tvb_model.state_variables)
 
+    def _compile_tvb_to_spikeNet_interface(self, interface):
+        # Return the TVB source (0 for state, 1 for coupling), the source variable index and the transform name
+        if interface.model in self._available_input_devices:
+            # For this output TVB state variable:
+            # ...transmit it to the corresponding devices of the spiking network,
+            # ...which represent each TVB node
+            if interface.model in self._current_input_devices:
+                # We assume that current is a mean field quantity
+                # applied equally and in parallel
+                # to all target neurons of the spiking populations
+                # This is why no scaling has been applied
+                # for the synaptic weight from the dc_generator device, representing a TVB node,
+                # to the target spiking node
+                return 0, interface.tvb_sv_id, "tvb_to_current"
+            elif interface.model in self._spike_rate_input_devices:
+                # Rate is already a meanfield quantity.
+                # All neurons of the target spiking populations
+                # will receive the same spike rate.
+                # No further scaling is required with the population size (number of neurons)
+                # ...convert to spiking rate for every TVB node...
+                return 0, interface.tvb_sv_id, "tvb_to_spike_rate"
+        elif interface.model in PARAMETERS:
+            # We assume that current or potential is a mean field quantity
+            # applied equally and in parallel
+            # to all target neurons of the spiking populations
+            # Instantaneous transmission. TVB history is used to buffer delayed communication.
+            return 1, interface.tvb_coupling_id, "tvb_to_%s" % interface.model
+        raise ValueError("Interface model %s is not supported yet!" % interface.model)
+
+    def _compile_spikeNet_to_tvb_interface(self, interface, per_step=False):
+        # Return the function reading the Spiking Network output
+        # and the name of the transform to be applied to it before communication to TVB.
+        # Instantaneous transmission. TVB history is used to buffer delayed communication.
+        # If per_step, the output is read per TVB time step of the last synchronization window.
+        if interface.model in self._spike_rate_output_devices:
+            # The number of spikes has to be converted to a spike rate via division:
+            #  by the total number of neurons to convert it to a mean field quantity,
+            #  by the number of time steps the Spiking Network has been run for since the last reading,
+            #  and by the time step dt, which is already included in the spikes_to_tvb scaling.
+            if per_step:
+                return partial(_read_population_mean_spikes_number_per_step, interface, self.dt), "spikes_to_tvb"
+            return partial(_read_population_mean_spikes_number, interface), "spikes_to_tvb"
+        elif interface.model in self._multimeter_output_devices + self._voltmeter_output_devices:
+            if interface.model in self._multimeter_output_devices:
+                transform = "spikes_var_to_tvb"
+            else:
+                transform = "potential_to_tvb"
+            if per_step:
+                return partial(_read_population_mean_values_per_step, interface, self.dt), transform
+            return partial(_read_current_population_mean_values, interface), transform
+        # TODO: add any other possible Spiking Network output devices to TVB parameters interfaces here!
+        raise ValueError("Interface model %s is not supported yet!" % interface.model)
+
+    def _tvb_to_spikeNet_setter(self, interface):
+        # The method to set the values of a TVB -> Spiking Network interface,
+        # which subclasses can replace in order to set many interfaces together in _set_tvb_to_spikeNet()
+        return interface.set
+
+    def _set_tvb_to_spikeNet(self):
+        pass
+
+    def _compile_exchange_plan(self):
+        # Compile the interfaces into a static exchange plan of index arrays, scaling vectors and bound methods.
+        # Transformations set as weights are precomputed together with the interface scale.
+        # General form: interface_scale_weight * transformation_of(TVB_or_SpikeNet_state_values)
+        self._tvb_to_spikeNet_plan = []
+        self._tvb_to_spikeNet_fun_plan = []
+        for interface in self.tvb_to_spikeNet_interfaces:
+            source, var_id, transform = self._compile_tvb_to_spikeNet_interface(interface)
+            nodes_ids = np.array(interface.nodes_ids, dtype="i")
+            weights = self.transforms_weights.get(transform, None)
+            if weights is None:
+                self._tvb_to_spikeNet_fun_plan.append(
+                    (source, var_id, nodes_ids, interface.scale, self.transforms[transform],
+                     self._tvb_to_spikeNet_setter(interface)))
+            else:
+                self._tvb_to_spikeNet_plan.append(
+                    (source, var_id, nodes_ids, interface.scale * weights[nodes_ids],
+                     self._tvb_to_spikeNet_setter(interface)))
+        # Spiking Network -> TVB interfaces are grouped into those targeting TVB parameters and state variables:
+        self._spikeNet_to_tvb_plans = {"params": ([], []), "sv": ([], [])}
+        for interface_id, interface in enumerate(self.spikeNet_to_tvb_interfaces):
+            per_step = interface_id in self.spikeNet_to_tvb_sv_interfaces_ids
+            read, transform = self._compile_spikeNet_to_tvb_interface(interface, per_step)
+            nodes_ids = np.array(interface.nodes_ids, dtype="i")
+            weights = self.transforms_weights.get(transform, None)
+            if per_step:
+                plan, fun_plan = self._spikeNet_to_tvb_plans["sv"]
+            else:
+                plan, fun_plan = self._spikeNet_to_tvb_plans["params"]
+            if weights is None:
+                fun_plan.append((interface_id, read, nodes_ids, interface.scale, self.transforms[transform]))
+            else:
+                plan.append((interface_id, read, interface.scale * weights[nodes_ids]))
+        self._spikeNet_to_tvb_params_plan = \
+            [(interface_id, self.spikeNet_to_tvb_interfaces[interface_id].name,
+              np.array(self.spikeNet_to_tvb_interfaces[interface_id].nodes_ids, dtype="i"))
+             for interface_id in self.spikeNet_to_tvb_params_interfaces_ids]
+        self._spikeNet_to_tvb_sv_plan = \
+            [(interface_id, self.spikeNet_to_tvb_interfaces[interface_id].tvb_sv_id,
+              np.array(self.spikeNet_to_tvb_interfaces[interface_id].nodes_ids, dtype="i"))
+             for interface_id in self.spikeNet_to_tvb_sv_interfaces_ids]
+
     def configure(self, tvb_model):
         # Organize the different kinds of interfaces and set the TVB region model of the TVB Simulator
         self.spikeNet_to_tvb_params = []
@@ -83,109 +217,160 @@ class TVBSpikeNetInterface(object):
             # we are going to create a TVB parameter with the same name
             self.spikeNet_to_tvb_params.append(interface.name)
         self.tvb_model = tvb_model
+        self._compile_exchange_plan()
+        # TVB buffers will be configured by the simulator:
+        self.tvb_state_buffers = None
+        self.tvb_coupling_buffers = None
+        self._configure_exchange_buffers()
+
+    def _configure_tvb_to_spikeNet_buffers(self, n_steps=1):
+        self._tvb_to_spikeNet_buffers = [np.empty((n_steps, len(nodes_ids)))
+                                         for _, _, nodes_ids, _, _ in self._tvb_to_spikeNet_plan]
+
+    def _configure_exchange_buffers(self, n_steps=1, n_buffers=1):
+        self._configure_tvb_to_spikeNet_buffers(n_steps)
+        # The values of the state variables' interfaces are time-indexed, of shape (n_steps, nodes):
+        self.spikeNet_values_buffers = \
+            [[np.empty(((n_steps, ) if interface_id in self.spikeNet_to_tvb_sv_interfaces_ids else ())
+                       + (len(interface.nodes_ids), ))
+              for interface_id, interface in enumerate(self.spikeNet_to_tvb_interfaces)]
+             for _ in range(n_buffers)]
+        self.i_spikeNet_values_buffer = 0
+
+    def configure_buffers(self, n_steps, state_shape, coupling_shape, n_buffers=1):
+        # The exchange between TVB and the Spiking Network goes through n_buffers buffers
+        # (two for pipelined co-simulation, so that TVB fills in one, while the Spiking Network uses the other),
+        # each one holding TVB state and coupling for a synchronization window of n_steps time steps,
+        # and the values read from the Spiking Network at the end of that window.
+        self.tvb_state_buffers = np.empty((n_buffers, n_steps) + tuple(state_shape))
+        self.tvb_coupling_buffers = np.empty((n_buffers, n_steps) + tuple(coupling_shape))
+        self._configure_exchange_buffers(n_steps, n_buffers)
+
+    def buffer_tvb_state(self, i_buffer, i_step, state, coupling):
+        self.tvb_state_buffers[i_buffer, i_step] = state
+        self.tvb_coupling_buffers[i_buffer, i_step] = coupling
+
+    def tvb_buffer_to_spikeNet(self, i_buffer, n_steps, stimulus, model):
+        # Communicate the first n_steps time steps of TVB buffer i_buffer to the Spiking Network
+        self.tvb_state_to_spikeNet(self.tvb_state_buffers[i_buffer, :n_steps],
+                                   self.tvb_coupling_buffers[i_buffer, :n_steps], stimulus, model)
 
     def tvb_state_to_spikeNet(self, state, coupling, stimulus, model):
         # Apply TVB -> Spiking Network input at time t before integrating time step t -> t+dt
-        for interface in self.tvb_to_spikeNet_interfaces:
-            if interface.model in self._available_input_devices:
-                values = state[interface.tvb_sv_id].squeeze()  # if we need the state variable
-                if interface.model in self._current_input_devices:
-                    transform_fun = self.transforms["tvb_to_current"]
-                    # We assume that current is a mean field quantity
-                    # applied equally and in parallel
-                    # to all target neurons of the spiking populations
-                    # This is why no scaling has been applied
-                    # for the synaptic weight from the dc_generator device, representing a TVB node,
-                    # to the target spiking node
-                    # For this output TVB state variable:
-                    # ...transmit it to the corresponding devices of the spiking network,
-                    # ...which represent each TVB node
-                elif interface.model in self._spike_rate_input_devices:
-                    # Rate is already a meanfield quantity.
-                    # All neurons of the target spiking populations
-                    # will receive the same spike rate.
-                    # No further scaling is required with the population size (number of neurons)
-                    # For this output TVB state variable:
-                    # ...convert to spiking rate for every TVB node..
-                    # For this output TVB state variable:
-                    # ...convert to spiking rate for every TVB node...
-                    transform_fun = self.transforms["tvb_to_spike_rate"]
-            elif interface.model in PARAMETERS:
-                values = coupling[interface.tvb_coupling_id].squeeze()
-                if interface.model == "current":
-                    transform_fun = self.transforms["tvb_to_current"]
-                    # We assume that current is a mean field quantity
-                    # applied equally and in parallel
-                    # to all target neurons of the spiking populations
-                    # Instantaneous transmission. TVB history is used to buffer delayed communication.
-                elif interface.model == "potential":
-                    transform_fun = self.transforms["tvb_to_potential"]
-                    # We assume that potential is a mean field quantity
-                    # applied equally and in parallel
-                    # to all target neurons of the spiking populations
-                    # Instantaneous transmission. TVB history is used to buffer delayed communication.
+        # state and coupling may also be time-indexed batches of a whole synchronization window,
+        # of shape (time, variables, nodes, modes), all of which are communicated at once,
+        # with shape (nodes, time)
+        if state.ndim > 3 and state.shape[0] == 1:
+            state = state[0]
+            coupling = coupling[0]
+        sources = (state, coupling)
+        if state.ndim > 3:
+            i_out = slice(0, state.shape[0])
+            if len(self._tvb_to_spikeNet_buffers) > 0 and \
+                    state.shape[0] > self._tvb_to_spikeNet_buffers[0].shape[0]:
+                self._configure_tvb_to_spikeNet_buffers(state.shape[0])
+        else:
+            i_out = 0
+        for (source, var_id, nodes_ids, weights, setter), buffer in \
+                zip(self._tvb_to_spikeNet_plan, self._tvb_to_spikeNet_buffers):
+            values = buffer[i_out]
+            np.take(sources[source][..., var_id, :, 0], nodes_ids, axis=-1, out=values)
+            values *= weights
+            setter(values.T)
+        for source, var_id, nodes_ids, scale, transform_fun, setter in self._tvb_to_spikeNet_fun_plan:
+            values = sources[source][..., var_id, :, 0]
+            if values.ndim > 1:
+                setter(np.array([scale * transform_fun(vals, nodes_ids) for vals in values]).T)
             else:
-                raise ValueError("Interface model %s is not supported yet!" % interface.model)
-            # General form: interface_scale_weight * transformation_of(TVB_state_values)
-            values = interface.scale * \
-                     transform_fun(values, interface.nodes_ids)
-            interface.set(values)
+                setter(scale * transform_fun(values, nodes_ids))
+        self._set_tvb_to_spikeNet()
 
-    def spikeNet_state_to_tvb_parameter(self, model):
+    def _values_buffer(self, values, interface_id, n_steps):
+        # Return the part of the values' buffer of an interface to be written by the last reading,
+        # i.e., the last n_steps time steps of time-indexed buffers, which are enlarged if necessary
+        if values[interface_id].ndim < 2:
+            return values[interface_id]
+        if values[interface_id].shape[0] < n_steps:
+            values[interface_id] = np.empty((n_steps, values[interface_id].shape[1]))
+        return values[interface_id][-n_steps:]
+
+    def _read_spikeNet_values(self, values, plans, n_steps=1):
+        for plan, fun_plan in plans:
+            for interface_id, read, weights in plan:
+                np.multiply(read(n_steps), weights, out=self._values_buffer(values, interface_id, n_steps))
+            for interface_id, read, nodes_ids, scale, transform_fun in fun_plan:
+                output = read(n_steps)
+                if output.ndim > 1:
+                    self._values_buffer(values, interface_id, n_steps)[:] = \
+                        np.array([scale * transform_fun(out, nodes_ids) for out in output])
+                else:
+                    values[interface_id] = scale * transform_fun(output, nodes_ids)
+
+    def read_spikeNet_values(self, i_buffer=0, n_steps=1):
+        # Read the output of all Spiking Network -> TVB interfaces into buffer i_buffer,
+        # which becomes the one holding the latest output.
+        # n_steps is the number of TVB time steps the Spiking Network has been run for since the last reading
+        self._read_spikeNet_values(self.spikeNet_values_buffers[i_buffer],
+                                   self._spikeNet_to_tvb_plans.values(), n_steps)
+        self.i_spikeNet_values_buffer = i_buffer
+        return i_buffer
+
+    def spikeNet_state_to_tvb_parameter(self, model, i_buffer=None):
         # Apply Spiking Network -> TVB parameter input at time t before integrating time step t -> t+dt
-        for interface_id in self.spikeNet_to_tvb_params_interfaces_ids:
-            # ...update them:
-            interface = self.spikeNet_to_tvb_interfaces[interface_id]
+        # Values are read from the Spiking Network, unless a buffer i_buffer of already read values is given
+        if i_buffer is None:
+            values = self.spikeNet_values_buffers[0]
+            self._read_spikeNet_values(values, [self._spikeNet_to_tvb_plans["params"]])
+        else:
+            values = self.spikeNet_values_buffers[i_buffer]
+        for interface_id, name, nodes_ids in self._spikeNet_to_tvb_params_plan:
             # Update TVB parameter
-            param_values = getattr(model, interface.name)
-            if interface.model in self._spike_rate_output_devices:
-                transform_fun = self.transforms["spikes_to_tvb"]
-                values = interface.population_mean_spikes_number
-                interface.reset  # We need to erase the spikes we have already read and communicated to TVB
-            elif interface.model == self._multimeter_output_devices:
-                transform_fun = self.transforms["spikes_sv_to_tvb"]
-                values = interface.current_population_mean_values
-            elif interface.model == self._voltmeter_output_devices:
-                transform_fun = self.transforms["potential_to_tvb"]
-                values = interface.current_population_mean_values
-            # TODO: add any other possible Spiking Network output devices to TVB parameters interfaces here!
-            else:
-                raise ValueError("Interface model %s is not supported yet!" % interface.model)
-            # General form: interface_scale_weight * transformation_of(SpikeNet_state_values)
-            param_values[interface.nodes_ids] = \
-                interface.scale * transform_fun(values, interface.nodes_ids)
-            setattr(model, "__" + interface.name, param_values)
+            param_values = getattr(model, name)
+            param_values[nodes_ids] = values[interface_id]
+            setattr(model, "__" + name, param_values)
         return model
 
-    def spikeNet_state_to_tvb_state(self, state):
+    def spikeNet_state_to_tvb_state(self, state, i_buffer=None):
         # Apply Spiking Network -> TVB state input at time t+dt after integrating time step t -> t+dt
-        for interface_id in self.spikeNet_to_tvb_sv_interfaces_ids:
-            interface = self.spikeNet_to_tvb_interfaces[interface_id]
-            # Update TVB state
-            if interface.model in self._spike_rate_output_devices:
-                # The number of spikes has to be converted to a spike rate via division:
-                #  by the total number of neurons to convert it to a mean field quantity,
-                #  and by the time step dt, which is already included in the spikes_to_tvb scaling.
-                # Instantaneous transmission. TVB history is used to buffer delayed communication.
-                transform_fun = self.transforms["spikes_to_tvb"]
-                values = interface.population_mean_spikes_number
-                interface.reset
-            elif interface.model == self._multimeter_output_devices:
-                # Instantaneous transmission. TVB history is used to buffer delayed communication.
-                transform_fun = self.transforms["spikes_sv_to_tvb"]
-                values = interface.current_population_mean_values
-            elif interface.model == self._voltmeter_output_devices:
-                # Instantaneous transmission. TVB history is used to buffer delayed communication.
-                transform_fun = self.transforms["potential_to_tvb"]
-                values = interface.current_population_mean_values
-            # TODO: add any other possible Spiking Network output devices to TVB parameters interfaces here!
-            else:
-                raise ValueError("Interface model %s is not supported yet!" % interface.model)
-            # General form: interface_scale_weight * transformation_of(SpikeNet_state_values)
-            state[interface.tvb_sv_id, interface.nodes_ids, 0] = \
-                interface.scale * transform_fun(values,  interface.nodes_ids)
+        # Values are read from the Spiking Network, unless a buffer i_buffer of already read values is given
+        if i_buffer is None:
+            values = self.spikeNet_values_buffers[0]
+            self._read_spikeNet_values(values, [self._spikeNet_to_tvb_plans["sv"]])
+        else:
+            values = self.spikeNet_values_buffers[i_buffer]
+        for interface_id, sv_id, nodes_ids in self._spikeNet_to_tvb_sv_plan:
+            # Update TVB state with the values of the last time step
+            state[sv_id, nodes_ids, 0] = values[interface_id][-1]
         return state
 
+    def spikeNet_state_window(self, i_buffer, n_steps):
+        # Return the Spiking Network -> TVB state values of the last n_steps time steps of buffer i_buffer,
+        # as (TVB state variable index, nodes' indices, values of shape (n_steps, nodes)) tuples
+        values = self.spikeNet_values_buffers[i_buffer]
+        return [(sv_id, nodes_ids, values[interface_id][-n_steps:])
+                for interface_id, sv_id, nodes_ids in self._spikeNet_to_tvb_sv_plan]
+
+    def get_state(self):
+        # Return a checkpoint of the exchange buffers and of the event cursors of the Spiking Network -> TVB devices
+        return {"tvb_state_buffers": self.tvb_state_buffers,
+                "tvb_coupling_buffers": self.tvb_coupling_buffers,
+                "spikeNet_values_buffers": self.spikeNet_values_buffers,
+                "i_spikeNet_values_buffer": self.i_spikeNet_values_buffer,
+                "devices": [[device.get_events_state(events=False) for device in interface.values]
+                            for interface in self.spikeNet_to_tvb_interfaces]}
+
+    def set_state(self, state):
+        # Restore a checkpoint, after configuration of the interface
+        self.tvb_state_buffers = state["tvb_state_buffers"]
+        self.tvb_coupling_buffers = state["tvb_coupling_buffers"]
+        if self.tvb_state_buffers is not None:
+            self._configure_tvb_to_spikeNet_buffers(self.tvb_state_buffers.shape[1])
+        self.spikeNet_values_buffers = state["spikeNet_values_buffers"]
+        self.i_spikeNet_values_buffer = state["i_spikeNet_values_buffer"]
+        for interface, devices_states in zip(self.spikeNet_to_tvb_interfaces, state["devices"]):
+            for device, device_state in zip(interface.values, devices_states):
+                device.set_events_state(device_state)
+
     def get_mean_data_from_multimeter_to_TVBTimeSeries(self, **kwargs):
         # This method interrogates the Spiking Network's output_devices (if any) for measured quantities
         mean_data = self.spiking_network.get_mean_data_from_multimeter(**kwargs)
@@ -216,6 +216,21 @@ class TVBSpikeNetInterfaceBuilder(object):
             transforms.update(self._prepare_spikeNet_to_tvb_transform_fun(prop, dummy))
         return transforms
 
+    def generate_transforms_weights(self):
+        # The weights of the transformations that are set just as weights (and not as functions),
+        # so that the interface can precompute them. To be called after generate_transforms().
+        transforms_weights = {}
+        for prop in ["w_tvb_to_current",
+                     "w_tvb_to_potential",
+                     "w_tvb_to_spike_rate",
+                     "w_spikes_to_tvb",
+                     "w_spikes_var_to_tvb",
+                     "w_potential_to_tvb"]:
+            weights = getattr(self, prop)
+            if not hasattr(weights, "__call__"):
+                transforms_weights[prop.split("w_")[1]] = weights
+        return transforms_weights
+
     def build_interface(self, tvb_spikeNet_interface):
         """
         Configure the TVB Spiking Network interface of the fine scale as well other aspects of its interface with TVB
@@ -232,6 +247,7 @@ class TVBSpikeNetInterfaceBuilder(object):
         tvb_spikeNet_interface.spiking_network = self.spiking_network
 
         tvb_spikeNet_interface.transforms = self.generate_transforms()
+        tvb_spikeNet_interface.transforms_weights = self.generate_transforms_weights()
 
         tvb_spikeNet_interface.tvb_to_spikeNet_interfaces = Series({})
         # Create a list of input devices for every TVB node inside Spiking Network and connect them to the target Spiking Network nodes:
@@ -2,7 +2,7 @@
 from six import string_types
 
 from pandas import Series
-from numpy import array
+from numpy import array, concatenate
 from tvb_multiscale.spiking_models.devices import DeviceSet
 from tvb_scripts.utils.log_error_utils import initialize_logger, raise_value_error
 
@@ -15,6 +15,9 @@ class SpikeNetToTVBinterface(DeviceSet):
     # This class implements an interface that sends Spiking Network state to TVB
     # via output/measuring devices
 
+    # The name of the events' cursor of this interface's devices
+    _events_reader = "spikeNet_to_tvb"
+
     def __init__(self, spiking_network, name="", model="",
                  tvb_sv_id=None, nodes_ids=[], scale=array([1.0]), device_set=Series()):
         super(SpikeNetToTVBinterface, self).__init__(name, model, device_set)
@@ -24,6 +27,7 @@ class SpikeNetToTVBinterface(DeviceSet):
         # (i.e., region i implemented in Spiking Network updates the region i in TVB):
         self.nodes_ids = nodes_ids
         self.scale = scale  # a scaling weight
+        self._number_of_neurons = None
         LOG.info("%s of model %s for %s created!" % (self.__class__, self.model, self.name))
 
     def from_device_set(self, device_set, tvb_sv_id=None, name=None):
@@ -32,6 +36,7 @@ class SpikeNetToTVBinterface(DeviceSet):
         else:
             raise_value_error("Input device_set is not a DeviceSet!: %s" % str(device_set))
         self.tvb_sv_id = tvb_sv_id
+        self._number_of_neurons = None
         if isinstance(name, string_types):
             self.name = name
         self.update_model()
@@ -41,6 +46,34 @@ class SpikeNetToTVBinterface(DeviceSet):
     def population_mean_spikes_number(self):
         return array(self.do_for_all_devices("mean_number_of_spikes")).flatten()
 
+    @property
+    def population_number_of_neurons(self):
+        # The connectivity doesn't change during simulation, so we count the neurons only once
+        if self._number_of_neurons is None:
+            self._number_of_neurons = self.do_for_all_devices("number_of_neurons")
+        return self._number_of_neurons
+
+    @property
+    def population_mean_new_spikes_number(self):
+        # Only the spikes recorded since the previous read are counted, and the devices are not reset
+        return array([device.get_mean_number_of_new_spikes(self._events_reader, number_of_neurons)
+                      for device, number_of_neurons in zip(self.values, self.population_number_of_neurons)])
+
+    def get_population_mean_new_spikes_number_per_step(self, n_steps, dt):
+        # The new spikes per time step dt, for the last n_steps time steps of the Spiking Network,
+        # of shape (n_steps, devices)
+        time = self.spiking_network.time
+        return array([device.get_mean_number_of_new_spikes_per_step(n_steps, dt, time,
+                                                                    self._events_reader, number_of_neurons)
+                      for device, number_of_neurons in zip(self.values, self.population_number_of_neurons)]).T
+
+    def get_population_mean_new_values_per_step(self, n_steps, dt):
+        # The new mean values per time step dt, for the last n_steps time steps of the Spiking Network,
+        # of shape (n_steps, devices * variables)
+        time = self.spiking_network.time
+        return concatenate([device.get_new_data_mean_values_per_step(n_steps, dt, time, reader=self._events_reader)
+                            for device in self.values], axis=1)
+
     @property
     def population_mean_spikes_activity(self):
         return array(self.do_for_all_devices("mean_spikes_activity")).flatten()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+from pandas import Series
+import numpy as np
+from tvb_multiscale.config import CONFIGURED
+from tvb_multiscale.numpy_models.simulator import NumPySpikingSimulator
+from tvb_multiscale.numpy_models.region_node import NumPyRegionNode
+from tvb_multiscale.numpy_models.network import NumPyNetwork
+from tvb_multiscale.numpy_models.builders.numpy_factory import \
+    NUMPY_MIN_DT, DEFAULT_MODEL, DEFAULT_CONNECTION, NUMPY_OUTPUT_DEVICES_PARAMS_DEF, \
+    create_conn_spec, create_device, connect_device
+from tvb_multiscale.spiking_models.builders.factory import build_and_connect_devices
+from tvb_multiscale.spiking_models.builders.base import SpikingModelBuilder
+from tvb_multiscale.spiking_models.builders.templates import tvb_weight, tvb_delay
+from tvb_scripts.utils.log_error_utils import initialize_logger
+
+
+LOG = initialize_logger(__name__)
+
+
+class NumPyModelBuilder(SpikingModelBuilder):
+
+    # This is a builder of a Spiking Network of the NumPy spiking simulator,
+    # with the same defaults as the NEST one, apart from the neurons' model.
+
+    config = CONFIGURED
+    spiking_simulator = None
+    default_min_spiking_dt = NUMPY_MIN_DT
+    default_min_delay = NUMPY_MIN_DT
+
+    def __init__(self, tvb_simulator, spiking_nodes_ids, spiking_simulator=None, config=CONFIGURED, logger=LOG):
+        super(NumPyModelBuilder, self).__init__(tvb_simulator, spiking_nodes_ids, config, logger)
+        if spiking_simulator is not None:
+            self.spiking_simulator = spiking_simulator
+        else:
+            self.spiking_simulator = NumPySpikingSimulator(self.spiking_dt)
+
+        self.default_population = {"model": DEFAULT_MODEL, "scale": 1, "params": {}, "nodes": None}
+
+        self.default_synaptic_weight_scaling = \
+            lambda weight, n_cons: self.config.DEFAULT_SPIKING_SYNAPTIC_WEIGHT_SCALING(weight, n_cons)
+
+        self.default_populations_connection = dict(DEFAULT_CONNECTION)
+        self.default_populations_connection["delay"] = self.default_min_delay
+        self.default_populations_connection["nodes"] = None
+
+        self.default_nodes_connection = dict(DEFAULT_CONNECTION)
+        self.default_nodes_connection["delay"] = self.default_populations_connection["delay"]
+        self.default_nodes_connection.update({"source_nodes": None, "target_nodes": None})
+
+        # When any of the properties params and scale below depends on regions,
+        # set a handle to a function with
+        # arguments (region_index=None) returning the corresponding property
+        self.populations = [{"label": "E", "model": self.default_population["model"], "params": {},
+                             "scale": 1, "nodes": None}]  # None means "all"
+
+        # When any of the properties weight, delay, receptor_type below
+        # set a handle to a function with
+        # arguments (region_index=None) returning the corresponding property
+        self.populations_connections = \
+            [{"source": "E", "target": "E",  # E -> E This is a self-connection for population "E"
+              "model": self.default_populations_connection["model"],
+              "conn_spec": self.default_populations_connection["conn_spec"],
+              "weight": 1.0, "delay": self.default_populations_connection["delay"],
+              "receptor_type": 0,
+              "nodes": None,  # None means "all"
+              }]
+
+        # When any of the properties weight, delay, receptor_type below
+        # depends on regions, set a handle to a function with
+        # arguments (source_region_index=None, target_region_index=None)
+        self.nodes_connections = \
+            [{"source": "E", "target": "E",
+              "model": self.default_nodes_connection["model"],
+              "conn_spec": self.default_nodes_connection["conn_spec"],
+              "weight": tvb_weight,
+              "delay": tvb_delay,
+              "receptor_type": 0,
+              "source_nodes": None, "target_nodes": None}  # None means "all"
+             ]
+
+        # Use these to observe the Spiking Network behavior
+        # Labels have to be different
+        self.output_devices = [{"model": "spike_detector",
+                                "params": dict(NUMPY_OUTPUT_DEVICES_PARAMS_DEF["spike_detector"]),
+                                #           label <- target population
+                                "connections": {"E": "E"}, "nodes": None},  # None means "all"
+                               {"model": "multimeter",
+                                "params": dict(NUMPY_OUTPUT_DEVICES_PARAMS_DEF["multimeter"]),
+                                #                     label <- target population
+                                "connections": {"Excitatory": "E"}, "nodes": None},  # None means "all"
+                               ]
+        self.output_devices[1]["params"]["interval"] = self.monitor_period
+        self.input_devices = []  # use these for possible external stimulation devices
+
+    def _configure_spiking_simulator(self):
+        self.spiking_simulator.ResetKernel()  # This will restart the simulator!
+        self._update_spiking_dt()
+        self._update_default_min_delay()
+        self.spiking_simulator.SetKernelStatus({"resolution": self.spiking_dt})
+
+    def configure(self):
+        self._configure_spiking_simulator()
+        super(NumPyModelBuilder, self).configure()
+
+    @property
+    def min_delay(self):
+        try:
+            return self.spiking_simulator.GetKernelStatus("min_delay")
+        except:
+            return self.default_min_delay
+
+    def _prepare_populations_connection_params(self, pop_src, pop_trg, conn_spec, syn_spec):
+        return create_conn_spec(n_src=len(pop_src), n_trg=len(pop_trg),
+                                src_is_trg=(pop_src == pop_trg), config=self.config, **conn_spec)
+
+    def _assert_delay(self, delay):
+        if delay < self.spiking_dt:
+            LOG.warning("Coupling spiking neurons with delay = %f < integration step = %s is not possible!\n"
+                        "Setting delay equal to integration step!" % (delay, self.spiking_dt))
+            return self.spiking_dt
+        return delay
+
+    def connect_two_populations(self, source, target, conn_spec, syn_spec):
+        syn_spec["delay"] = self._assert_delay(syn_spec["delay"])
+        self.spiking_simulator.Connect(source, target, conn_spec, syn_spec)
+
+    def connect_populations_batch(self, sources, targets, syn_spec):
+        self.spiking_simulator.Connect(sources, targets, {"rule": "one_to_one"}, syn_spec)
+
+    def build_spiking_populations(self, model, size, params, *args, **kwargs):
+        return self.spiking_simulator.Create(model, int(np.round(size)), params=params)
+
+    def build_spiking_region_node(self, label="", input_node=Series(), *args, **kwargs):
+        return NumPyRegionNode(self.spiking_simulator, label, input_node)
+
+    def build_and_connect_devices(self, devices):
+        return build_and_connect_devices(devices, create_device, connect_device,
+                                         self.nodes, self.config, spiking_simulator=self.spiking_simulator)
+
+    def build(self):
+        return NumPyNetwork(self.spiking_simulator, self.nodes,
+                            self._output_devices, self._input_devices, config=self.config)
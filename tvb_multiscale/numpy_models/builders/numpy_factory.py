@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+from six import string_types
+import numpy as np
+
+from tvb_multiscale.config import CONFIGURED
+from tvb_multiscale.numpy_models.devices import NumPyInputDeviceDict, NumPyOutputDeviceDict
+from tvb_scripts.utils.log_error_utils import initialize_logger, raise_value_error
+
+
+LOG = initialize_logger(__name__)
+
+
+# Defaults of the NumPy spiking simulator, as the NEST ones in tvb_nest.config:
+
+NUMPY_MIN_DT = 0.001
+
+DEFAULT_MODEL = "iaf_cond_exp"
+
+DEFAULT_CONNECTION = {"model": "static_synapse", "weight": 1.0, "delay": 0.0, 'receptor_type': 0,
+                      "conn_spec": {"autapses": False, 'multapses': True, 'rule': "all_to_all",
+                                    "indegree": None, "outdegree": None, "N": None, "p": 0.1}}
+
+NUMPY_OUTPUT_DEVICES_PARAMS_DEF = {"multimeter": {'record_from': ["V_m"]},
+                                   "voltmeter": {},
+                                   "spike_detector": {}}
+
+NUMPY_INPUT_DEVICES_PARAMS_DEF = {"poisson_generator": {},
+                                  "dc_generator": {}}
+
+
+def create_conn_spec(n_src=1, n_trg=1, src_is_trg=False, config=CONFIGURED, **kwargs):
+    # This function returns a conn_spec dictionary
+    # and the expected/accurate number of total connections
+    conn_spec = dict(DEFAULT_CONNECTION["conn_spec"])
+    P_DEF = conn_spec["p"]
+    conn_spec.update(kwargs)
+    rule = conn_spec["rule"]
+    p = conn_spec["p"]
+    N = conn_spec["N"]
+    autapses = conn_spec["autapses"]
+    multapses = conn_spec["multapses"]
+    indegree = conn_spec["indegree"]
+    outdegree = conn_spec["outdegree"]
+    conn_spec = {
+        'rule': rule,
+        'autapses': autapses,  # self-connections flag
+        'multapses': multapses  # multiple connections per neurons' pairs flag
+    }
+    if rule == 'one_to_one':
+        return conn_spec, np.minimum(n_src, n_trg)
+    elif rule == 'fixed_total_number':
+        if N is None:
+            # Assume all to all if N is not given:
+            N = n_src * n_trg
+            if p is not None:
+                # ...prune to end up to connection probability p if p is given
+                N = int(np.round(p * N))
+        conn_spec['N'] = N
+        return conn_spec, N
+    elif rule == 'fixed_indegree':
+        if indegree is None:
+            # Compute indegree following connection probability p if not given
+            if p is None:
+                p = P_DEF
+            indegree = int(np.round(p * n_src))
+        conn_spec['indegree'] = indegree
+        return conn_spec, indegree * n_trg
+    elif rule == 'fixed_outdegree':
+        if outdegree is None:
+            # Compute outdegree following connection probability p if not given
+            if p is None:
+                p = P_DEF
+            outdegree = int(np.round(p * n_trg))
+        conn_spec['outdegree'] = outdegree
+        return conn_spec, outdegree * n_src
+    else:
+        Nall = n_src * n_trg
+        if src_is_trg and autapses is False:
+            Nall -= n_src
+        if rule == 'pairwise_bernoulli':
+            if p is None:
+                p = P_DEF
+            conn_spec['p'] = p
+            return conn_spec, int(np.round(p * Nall))
+        else:  # assuming rule == 'all_to_all':
+            return conn_spec, Nall
+
+
+def create_device(device_model, device_name=None, params=None, config=CONFIGURED, spiking_simulator=None):
+    if spiking_simulator is None:
+        raise_value_error("There is no NumPy spiking simulator!")
+    if not isinstance(device_name, string_types):
+        device_name = device_model
+    else:
+        device_model = device_name
+    if device_model in NumPyInputDeviceDict.keys():
+        devices_dict = NumPyInputDeviceDict
+        default_params_dict = NUMPY_INPUT_DEVICES_PARAMS_DEF
+    elif device_model in NumPyOutputDeviceDict.keys():
+        devices_dict = NumPyOutputDeviceDict
+        default_params_dict = NUMPY_OUTPUT_DEVICES_PARAMS_DEF
+    else:
+        raise_value_error("%s is neither one of the available input devices: %s\n "
+                          "nor of the output ones: %s!" %
+                          (device_model, str(list(NumPyInputDeviceDict.keys())),
+                           str(list(NumPyOutputDeviceDict.keys()))))
+    default_params = dict(default_params_dict.get(device_name, {}))
+    if isinstance(params, dict) and len(params) > 0:
+        default_params.update(params)
+    return devices_dict[device_name](spiking_simulator.Create(device_model, params=default_params),
+                                     spiking_simulator)
+
+
+def connect_device(numpy_device, neurons, weight=1.0, delay=0.0, receptor_type=0, config=CONFIGURED,
+                   spiking_simulator=None):
+    if spiking_simulator is None:
+        raise_value_error("There is no NumPy spiking simulator!")
+    delay = np.maximum(delay, spiking_simulator.GetKernelStatus("resolution"))
+    if numpy_device.model == "spike_detector":
+        #                         source  ->  target
+        spiking_simulator.Connect(neurons, numpy_device.device,
+                                  syn_spec={"weight": weight, "delay": delay, "receptor_type": receptor_type})
+    else:
+        spiking_simulator.Connect(numpy_device.device, neurons,
+                                  syn_spec={"weight": weight, "delay": delay, "receptor_type": receptor_type})
+    return numpy_device
@@ -0,0 +1,184 @@
+from tvb_multiscale.spiking_models.devices import \
+    Device, InputDevice, OutputDevice, SpikeDetector, Multimeter, Voltmeter
+
+
+# These classes wrap around the NumPy spiking simulator's commands, exactly as the tvb_nest ones around NEST.
+
+
+class NumPyDevice(Device):
+
+    def __init__(self, device, spiking_simulator):
+        super(NumPyDevice, self).__init__(device)
+        self.spiking_simulator = spiking_simulator
+        self.model = "device"
+
+    def _assert_device(self):
+        try:
+            self.spiking_simulator.GetStatus(self.device)[0]["element_type"]
+        except:
+            raise ValueError("Failed to Get of device %s!" % str(self.device))
+
+    @property
+    def spiking_simulator_module(self):
+        return self.spiking_simulator
+
+    def Get(self, attr=None, node_id=None):
+        if node_id is None:
+            node_id = self.device
+        if attr is None:
+            return self.spiking_simulator.GetStatus(node_id)[0]
+        else:
+            return self.spiking_simulator.GetStatus(node_id, attr)[0]
+
+    def Set(self, values_dict):
+        self.spiking_simulator.SetStatus(self.device, values_dict)
+
+    def GetFromConnections(self, connections, attr=None):
+        if attr is None:
+            return self.spiking_simulator.GetStatus(connections)[0]
+        else:
+            return self.spiking_simulator.GetStatus(connections, attr)[0]
+
+    def SetToConnections(self, connections, values_dict):
+        self.spiking_simulator.SetStatus(connections, values_dict)
+
+    @property
+    def numpy_model(self):
+        return str(self.spiking_simulator.GetStatus(self.device)[0]["model"])
+
+    def _get_connections(self, **kwargs):
+        return self.spiking_simulator.GetConnections(**kwargs)
+
+    @property
+    def connections(self):
+        return self.spiking_simulator.GetConnections(source=self.device)
+
+    @property
+    def neurons(self):
+        return tuple([conn[1] for conn in self.connections])
+
+
+class NumPyInputDevice(NumPyDevice, InputDevice):
+    model = "input_device"
+
+    def __init__(self, device, spiking_simulator):
+        super(NumPyInputDevice, self).__init__(device, spiking_simulator)
+        self.model = "input_device"
+
+
+class NumPyPoissonGenerator(NumPyInputDevice):
+    model = "poisson_generator"
+
+    def __init__(self, device, spiking_simulator):
+        super(NumPyPoissonGenerator, self).__init__(device, spiking_simulator)
+        self.model = "poisson_generator"
+
+
+class NumPyDCGenerator(NumPyInputDevice):
+    model = "dc_generator"
+
+    def __init__(self, device, spiking_simulator):
+        super(NumPyDCGenerator, self).__init__(device, spiking_simulator)
+        self.model = "dc_generator"
+
+
+NumPyInputDeviceDict = {"poisson_generator": NumPyPoissonGenerator,
+                        "dc_generator": NumPyDCGenerator}
+
+
+class NumPyOutputDevice(NumPyDevice, OutputDevice):
+    model = "output_device"
+
+    def __init__(self, device, spiking_simulator):
+        super(NumPyOutputDevice, self).__init__(device, spiking_simulator)
+        self.model = "output_device"
+
+    @property
+    def events(self):
+        return self.spiking_simulator.GetStatus(self.device, "events")[0]
+
+    @property
+    def number_of_events(self):
+        return self.spiking_simulator.GetStatus(self.device, "n_events")[0]
+
+    @property
+    def n_events(self):
+        return self.number_of_events
+
+    def get_events_since(self, start=0, variables=None):
+        return self.spiking_simulator.GetEvents(self.device, start, variables)[0]
+
+    def _restore_events(self, events):
+        self.spiking_simulator.SetStatus(self.device, {"events": events})
+
+    @property
+    def reset(self):
+        self.spiking_simulator.SetStatus(self.device, {'n_events': 0})
+        self.reset_events_cursors()
+        self._last_sample_offset = 0
+        # The spike trains cached for the events before the reset are no longer valid:
+        self._spike_train_store = None
+
+    def filter_events(self, events=None,  variables=None, neurons=None, times=None,
+                      exclude_neurons=[], exclude_times=[], time_range=None):
+        if events is None:
+            events = self.events
+        return super(NumPyOutputDevice, self).filter_events(events, variables, neurons,
+                                                            times, exclude_neurons, exclude_times, time_range)
+
+
+class NumPySpikeDetector(NumPyOutputDevice, SpikeDetector):
+    model = "spike_detector"
+
+    def __init__(self, device, spiking_simulator):
+        super(NumPySpikeDetector, self).__init__(device, spiking_simulator)
+        self.model = "spike_detector"
+
+    @property
+    def connections(self):
+        return self.spiking_simulator.GetConnections(target=self.device)
+
+    @property
+    def neurons(self):
+        return tuple([conn[0] for conn in self.connections])
+
+
+class NumPyMultimeter(NumPyOutputDevice, Multimeter):
+    model = "multimeter"
+
+    def __init__(self, device, spiking_simulator):
+        super(NumPyMultimeter, self).__init__(device, spiking_simulator)
+        self.model = "multimeter"
+
+    @property
+    def record_from(self):
+        return [str(name) for name in self.spiking_simulator.GetStatus(self.device)[0]['record_from']]
+
+
+class NumPyVoltmeter(NumPyMultimeter, Voltmeter):
+    model = "voltmeter"
+
+    def __init__(self, device, spiking_simulator):
+        super(NumPyVoltmeter, self).__init__(device, spiking_simulator)
+        self.model = "voltmeter"
+        assert self.var in self.record_from
+
+    @property
+    def var(self):
+        return "V_m"
+
+    @property
+    def get_V_m(self):
+        return self.get_var()
+
+    @property
+    def V_m(self):
+        return self.get_var()
+
+
+NumPyOutputDeviceDict = {"spike_detector": NumPySpikeDetector,
+                         "multimeter": NumPyMultimeter,
+                         "voltmeter": NumPyVoltmeter}
+
+
+NumPyOutputSpikeDeviceDict = {"spike_detector": NumPySpikeDetector}
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+import numpy as np
+from tvb_multiscale.config import CONFIGURED
+from tvb_multiscale.spiking_models.network import SpikingNetwork
+from tvb_multiscale.numpy_models.simulator import NumPySpikingSimulator
+from tvb_multiscale.numpy_models.region_node import NumPyRegionNode
+from tvb_scripts.utils.log_error_utils import initialize_logger
+
+
+LOG = initialize_logger(__name__)
+
+
+class NumPyNetwork(SpikingNetwork):
+
+    def __init__(self, spiking_simulator=None,
+                 region_nodes=pd.Series(),
+                 output_devices=pd.Series(),
+                 input_devices=pd.Series(),
+                 config=CONFIGURED):
+        if spiking_simulator is None:
+            spiking_simulator = NumPySpikingSimulator()
+        self.spiking_simulator = spiking_simulator
+        super(NumPyNetwork, self).__init__(region_nodes, output_devices, input_devices, config)
+
+        if isinstance(self.region_nodes, pd.Series):
+            if len(self.region_nodes) > 0 and \
+                    np.any([not isinstance(node, NumPyRegionNode) for node in self.region_nodes]):
+                raise ValueError("Input region_nodes is neither a NumPyRegionNode "
+                                 "nor a pandas.Series of NumPyRegionNode objects!: \n %s" %
+                                 str(self.region_nodes))
+
+        LOG.info("%s created!" % self.__class__)
+
+    @property
+    def resolution(self):
+        return self.spiking_simulator.GetKernelStatus("resolution")
+
+    @property
+    def min_delay(self):
+        return self.spiking_simulator.min_delay
+
+    @property
+    def time(self):
+        return self.spiking_simulator.time
+
+    def _set_time(self, time):
+        self.spiking_simulator.SetKernelStatus({"time": time})
+
+    def configure(self, *args, **kwargs):
+        # Compile the network's connections, now that the network is built
+        self.spiking_simulator.Prepare()
+
+    def Run(self, simulation_length, *args, **kwargs):
+        self.spiking_simulator.Run(simulation_length)
+
+    def Cleanup(self, *args, **kwargs):
+        self.spiking_simulator.Cleanup()
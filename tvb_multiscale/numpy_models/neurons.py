@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+# Vectorized integrate and fire neurons' models of the NumPy spiking simulator.
+# Each model instance is a block of neurons with contiguous global ids,
+# holding its parameters and state variables as arrays.
+# The membrane potential is integrated with forward Euler,
+# whereas synaptic conductances/currents decay exponentially and jump by the weights of the incoming spikes.
+# Incoming spikes' weights are signed: excitatory inputs are positive and inhibitory ones negative.
+# The same update functions are compiled with Numba, if available, or run as NumPy array expressions.
+
+
+def _update_iaf_cond_exp(dt, V_m, g_ex, g_in, refractory, input_ex, input_in, I_stim,
+                         V_th, V_reset, t_ref, g_L, C_m, E_ex, E_in, E_L, tau_syn_ex, tau_syn_in, I_e):
+    g_ex += input_ex
+    g_in -= input_in
+    I = g_ex * (E_ex - V_m) + g_in * (E_in - V_m) - g_L * (V_m - E_L) + I_e + I_stim
+    V_m += np.where(refractory > 0.0, 0.0, dt * I / C_m)
+    g_ex *= np.exp(-dt / tau_syn_ex)
+    g_in *= np.exp(-dt / tau_syn_in)
+    spikes = V_m >= V_th
+    V_m[:] = np.where(spikes, V_reset, V_m)
+    refractory[:] = np.where(spikes, np.floor(t_ref / dt + 0.5), np.maximum(refractory - 1.0, 0.0))
+    return spikes
+
+
+def _update_iaf_psc_exp(dt, V_m, I_syn_ex, I_syn_in, refractory, input_ex, input_in, I_stim,
+                        V_th, V_reset, t_ref, tau_m, C_m, E_L, tau_syn_ex, tau_syn_in, I_e):
+    I_syn_ex += input_ex
+    I_syn_in += input_in
+    I = I_syn_ex + I_syn_in + I_e + I_stim
+    V_m += np.where(refractory > 0.0, 0.0, dt * (I / C_m - (V_m - E_L) / tau_m))
+    I_syn_ex *= np.exp(-dt / tau_syn_ex)
+    I_syn_in *= np.exp(-dt / tau_syn_in)
+    spikes = V_m >= V_th
+    V_m[:] = np.where(spikes, V_reset, V_m)
+    refractory[:] = np.where(spikes, np.floor(t_ref / dt + 0.5), np.maximum(refractory - 1.0, 0.0))
+    return spikes
+
+
+if njit is not None:
+    _numba_update_iaf_cond_exp = njit(_update_iaf_cond_exp)
+    _numba_update_iaf_psc_exp = njit(_update_iaf_psc_exp)
+else:
+    _numba_update_iaf_cond_exp = _update_iaf_cond_exp
+    _numba_update_iaf_psc_exp = _update_iaf_psc_exp
+
+
+class NeuronsModel(object):
+    __metaclass__ = ABCMeta
+
+    model = "neuron"
+    element_type = "neuron"
+    default_params = OrderedDict()
+    default_state = OrderedDict()
+
+    def __init__(self, size, first_gid=1, first_index=0, params=None):
+        self.size = int(size)
+        self.first_gid = first_gid
+        # The index of the first neuron of this block among all neurons of the simulator:
+        self.first_index = first_index
+        self.params = OrderedDict([(key, np.full((self.size, ), val, dtype="float64"))
+                                   for key, val in self.default_params.items()])
+        self.state = OrderedDict([(key, np.full((self.size, ), val, dtype="float64"))
+                                  for key, val in self.default_state.items()])
+        # Remaining refractory time steps:
+        self.refractory = np.zeros((self.size, ))
+        if params is not None:
+            self.set_status(params)
+
+    @property
+    def gids(self):
+        return np.arange(self.first_gid, self.first_gid + self.size)
+
+    @property
+    def keys(self):
+        return list(self.params.keys()) + list(self.state.keys())
+
+    @property
+    def recordables(self):
+        return list(self.state.keys())
+
+    def _values(self, key):
+        if key in self.state:
+            return self.state[key]
+        elif key in self.params:
+            return self.params[key]
+        raise KeyError("%s is neither a parameter nor a state variable of %s neurons!" % (key, self.model))
+
+    def get(self, key, inds=slice(None)):
+        if key == "model":
+            return np.array([self.model] * len(self.gids[inds]))
+        elif key == "element_type":
+            return np.array([self.element_type] * len(self.gids[inds]))
+        elif key == "global_id":
+            return self.gids[inds]
+        return self._values(key)[inds]
+
+    def set(self, key, values, inds=slice(None)):
+        self._values(key)[inds] = values
+
+    def get_status(self, ind):
+        status = OrderedDict([("model", self.model), ("element_type", self.element_type),
+                              ("global_id", self.first_gid + ind), ("recordables", self.recordables)])
+        for key in self.keys:
+            status[key] = float(self._values(key)[ind])
+        return status
+
+    def set_status(self, params, inds=slice(None)):
+        for key, values in params.items():
+            self.set(key, values, inds)
+
+    @abstractmethod
+    def update(self, dt, input_ex, input_in, I_stim, use_numba=True):
+        # Integrate the neurons for one time step, given the incoming spikes' weights and any external current,
+        # and return a boolean array of the neurons that spiked
+        pass
+
+
+class IAFCondExp(NeuronsModel):
+
+    # Conductance based leaky integrate and fire neurons with exponential synaptic conductances,
+    # with NEST's iaf_cond_exp parameters' names, units and defaults
+
+    model = "iaf_cond_exp"
+    default_params = OrderedDict([("V_th", -55.0), ("V_reset", -60.0), ("t_ref", 2.0), ("g_L", 16.6667),
+                                  ("C_m", 250.0), ("E_ex", 0.0), ("E_in", -85.0), ("E_L", -70.0),
+                                  ("tau_syn_ex", 0.2), ("tau_syn_in", 2.0), ("I_e", 0.0)])
+    default_state = OrderedDict([("V_m", -70.0), ("g_ex", 0.0), ("g_in", 0.0)])
+
+    def update(self, dt, input_ex, input_in, I_stim, use_numba=True):
+        if use_numba:
+            update_fun = _numba_update_iaf_cond_exp
+        else:
+            update_fun = _update_iaf_cond_exp
+        return update_fun(dt, self.state["V_m"], self.state["g_ex"], self.state["g_in"], self.refractory,
+                          input_ex, input_in, I_stim,
+                          *[self.params[key] for key in self.default_params.keys()])
+
+
+class IAFPscExp(NeuronsModel):
+
+    # Current based leaky integrate and fire neurons with exponential synaptic currents,
+    # with NEST's iaf_psc_exp parameters' names, units and defaults
+
+    model = "iaf_psc_exp"
+    default_params = OrderedDict([("V_th", -55.0), ("V_reset", -70.0), ("t_ref", 2.0), ("tau_m", 10.0),
+                                  ("C_m", 250.0), ("E_L", -70.0),
+                                  ("tau_syn_ex", 2.0), ("tau_syn_in", 2.0), ("I_e", 0.0)])
+    default_state = OrderedDict([("V_m", -70.0), ("I_syn_ex", 0.0), ("I_syn_in", 0.0)])
+
+    def update(self, dt, input_ex, input_in, I_stim, use_numba=True):
+        if use_numba:
+            update_fun = _numba_update_iaf_psc_exp
+        else:
+            update_fun = _update_iaf_psc_exp
+        return update_fun(dt, self.state["V_m"], self.state["I_syn_ex"], self.state["I_syn_in"], self.refractory,
+                          input_ex, input_in, I_stim,
+                          *[self.params[key] for key in self.default_params.keys()])
+
+
+NumPyNeuronsModelsDict = {"iaf_cond_exp": IAFCondExp,
+                          "iaf_psc_exp": IAFPscExp}
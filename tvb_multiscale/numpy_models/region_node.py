@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+from pandas import Series
+
+from tvb_multiscale.spiking_models.region_node import SpikingRegionNode
+
+
+class NumPyRegionNode(SpikingRegionNode):
+
+    spiking_simulator = None
+
+    def __init__(self, spiking_simulator, label="", input_node=Series()):
+        self.spiking_simulator = spiking_simulator
+        super(NumPyRegionNode, self).__init__(label, input_node)
+
+    def Get(self, params=None, indices_or_keys=None):
+        return self.spiking_simulator.GetStatus(self.neurons(indices_or_keys), params)
+
+    def Set(self, values_dict, indices_or_keys=None):
+        self.spiking_simulator.SetStatus(self.neurons(indices_or_keys), values_dict)
+
+    def _get_connections(self, neuron):
+        return self.spiking_simulator.GetConnections(neuron)
+
+    def GetFromConnections(self, connections, attr=None):
+        if attr is None:
+            return self.spiking_simulator.GetStatus(connections)[0]
+        else:
+            return self.spiking_simulator.GetStatus(connections, attr)[0]
+
+    def SetToConnections(self, connections, values_dict):
+        self.spiking_simulator.SetStatus(connections, values_dict)
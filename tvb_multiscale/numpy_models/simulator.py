@@ -0,0 +1,728 @@
+# -*- coding: utf-8 -*-
+
+"""
+A pure NumPy spiking network simulator, optionally accelerated with Numba.
+
+It offers a NEST-like API (Create, Connect, GetConnections, GetStatus, SetStatus, Prepare, Run, Cleanup, ...),
+so that it can be wrapped by tvb_multiscale exactly like NEST is by tvb_nest,
+as a light and dependency free Spiking Network backend of small and medium sized regions,
+e.g., for testing and benchmarking the TVB and the interface sides of co-simulations.
+
+Neurons are blocks of vectorized integrate and fire neurons (see neurons.py).
+Spikes are delivered after an integer number of time steps, through a ring buffer of the neurons' inputs.
+Stimulating devices (poisson_generator, dc_generator) and recording ones (spike_detector, multimeter)
+are nodes, with global ids, just like neurons.
+"""
+
+from bisect import bisect_right
+from collections import OrderedDict
+
+import numpy as np
+
+from tvb_multiscale.numpy_models.neurons import NumPyNeuronsModelsDict, njit
+from tvb_multiscale.spiking_models.connectivity_rules import generate_connections
+from tvb_scripts.utils.log_error_utils import initialize_logger, raise_value_error
+from tvb_scripts.utils.data_structures_utils import ensure_list
+
+
+LOG = initialize_logger(__name__)
+
+
+EXCITATORY = 0
+INHIBITORY = 1
+
+
+def _deliver_spikes(spiking, indptr, targets, delays, receptors, weights, ring, step):
+    # Add the weights of the synapses of the spiking neurons to the ring buffer of their targets' inputs
+    starts = indptr[spiking]
+    counts = indptr[spiking + 1] - starts
+    n_synapses = np.sum(counts)
+    if n_synapses == 0:
+        return
+    synapses = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(n_synapses)
+    n_slots, n_neurons = ring.shape[1:]
+    np.add.at(ring.reshape(-1),
+              (receptors[synapses] * n_slots + (step + delays[synapses]) % n_slots) * n_neurons
+              + targets[synapses],
+              weights[synapses])
+
+
+def _deliver_spikes_loop(spiking, indptr, targets, delays, receptors, weights, ring, step):
+    n_slots = ring.shape[1]
+    for i_spike in range(spiking.shape[0]):
+        source = spiking[i_spike]
+        for synapse in range(indptr[source], indptr[source + 1]):
+            ring[receptors[synapse], (step + delays[synapse]) % n_slots, targets[synapse]] += weights[synapse]
+
+
+if njit is not None:
+    _numba_deliver_spikes = njit(_deliver_spikes_loop)
+else:
+    _numba_deliver_spikes = _deliver_spikes
+
+
+class DeviceNode(object):
+
+    model = "device"
+    element_type = "device"
+    default_params = OrderedDict([("start", 0.0), ("stop", np.inf)])
+
+    def __init__(self, gid, model=None, params=None):
+        self.gid = gid
+        if model is not None:
+            self.model = model
+        self.params = OrderedDict(self.default_params)
+        if params is not None:
+            self.set_status(params)
+
+    def get_status(self, keys=None):
+        status = OrderedDict([("model", self.model), ("element_type", self.element_type), ("global_id", self.gid)])
+        status.update(self.params)
+        return status
+
+    def set_status(self, params):
+        # Parameters unknown to this simulator, e.g., NEST specific ones, are just kept
+        for key, value in params.items():
+            if np.size(value) == 1 and not isinstance(value, str) \
+                    and not isinstance(self.default_params.get(key, None), list):
+                # e.g., rate = [10.0] from DeviceSet.Set()
+                value = np.asarray(value).item()
+            self.params[key] = value
+
+    def is_active(self, time):
+        return self.params["start"] <= time < self.params["stop"]
+
+
+class PoissonGenerator(DeviceNode):
+
+    # Independent Poisson spike trains of rate (Hz) to each one of its targets
+    model = "poisson_generator"
+    element_type = "stimulator"
+    default_params = OrderedDict([("rate", 0.0), ("start", 0.0), ("stop", np.inf)])
+
+
+class DCGenerator(DeviceNode):
+
+    # Constant current of amplitude (pA) to all of its targets, scaled by the connections' weights
+    model = "dc_generator"
+    element_type = "stimulator"
+    default_params = OrderedDict([("amplitude", 0.0), ("start", 0.0), ("stop", np.inf)])
+
+
+class Recorder(DeviceNode):
+
+    element_type = "recorder"
+    record_variables = ["senders", "times"]
+
+    def __init__(self, gid, model=None, params=None):
+        self._events = []
+        self._n_events = 0
+        self._events_cache = None
+        super(Recorder, self).__init__(gid, model, params)
+
+    @property
+    def n_events(self):
+        return self._n_events
+
+    @property
+    def events(self):
+        if self._events_cache is None:
+            variables = self.record_variables
+            if len(self._events) > 0:
+                self._events_cache = OrderedDict([(var, np.concatenate([events[var] for events in self._events]))
+                                                  for var in variables])
+                # Keep a single chunk of events from now on:
+                self._events = [self._events_cache]
+            else:
+                self._events_cache = OrderedDict([(var, np.array([])) for var in variables])
+        return self._events_cache
+
+    def get_events(self, start=0, variables=None):
+        # Return the events from the start-th event on,
+        # concatenating only the chunks of events that these events belong to.
+        if variables is None:
+            variables = self.record_variables
+        variables = ensure_list(variables)
+        chunks = []
+        first = self._n_events
+        for events in reversed(self._events):
+            if first <= start:
+                break
+            first -= len(events["times"])
+            chunks.append(events)
+        if len(chunks) == 0:
+            return OrderedDict([(var, np.array([])) for var in variables])
+        chunks.reverse()
+        return OrderedDict([(var, np.concatenate([events[var] for events in chunks])[start - first:])
+                            for var in variables])
+
+    def record(self, events):
+        n_events = len(events["times"])
+        if n_events > 0:
+            self._events.append(events)
+            self._n_events += n_events
+            self._events_cache = None
+
+    def clear(self):
+        self._events = []
+        self._n_events = 0
+        self._events_cache = None
+
+    def get_status(self, keys=None):
+        status = super(Recorder, self).get_status(keys)
+        status["n_events"] = self.n_events
+        if keys is None or "events" in ensure_list(keys):
+            # The events are concatenated only if requested
+            status["events"] = self.events
+        return status
+
+    def set_status(self, params):
+        params = dict(params)
+        if params.pop("n_events", None) == 0:
+            self.clear()
+        events = params.pop("events", None)
+        if events is not None:
+            # Unlike NEST, the events can be set, e.g., to restore the recordings of a checkpoint
+            self.clear()
+            self.record(OrderedDict([(var, np.asarray(events[var])) for var in self.record_variables]))
+        super(Recorder, self).set_status(params)
+
+
+class SpikeDetector(Recorder):
+
+    model = "spike_detector"
+
+
+class Multimeter(Recorder):
+
+    # Samples the record_from variables of its target neurons every interval ms
+    model = "multimeter"
+    default_params = OrderedDict([("record_from", ["V_m"]), ("interval", 1.0), ("start", 0.0), ("stop", np.inf)])
+
+    @property
+    def record_variables(self):
+        return ["senders", "times"] + [str(var) for var in self.params["record_from"]]
+
+
+NumPyDevicesNodesDict = {"poisson_generator": PoissonGenerator,
+                         "dc_generator": DCGenerator,
+                         "spike_detector": SpikeDetector,
+                         "multimeter": Multimeter,
+                         "voltmeter": Multimeter}
+
+
+class NumPySpikingSimulator(object):
+
+    # Connections are stored as (source, target, weight, delay, receptor_type) columns,
+    # and are compiled to compressed sparse row arrays of synapses per source neuron by Prepare().
+    # receptor_type 0 means that the receptor is set by the sign of the weight,
+    # whereas 1 and 2 force excitatory and inhibitory receptors, respectively.
+
+    def __init__(self, resolution=0.1, rng_seed=None, use_numba=None):
+        self.ResetKernel()
+        status = {"resolution": resolution, "rng_seed": rng_seed}
+        if use_numba is not None:
+            status["use_numba"] = use_numba
+        self.SetKernelStatus(status)
+
+    # Kernel:
+
+    def ResetKernel(self):
+        self._resolution = 0.1
+        self._rng_seed = None
+        self._rng = np.random.RandomState()
+        self.use_numba = njit is not None
+        self._step = 0
+        self._n_nodes = 0
+        self._neurons = []
+        self._neurons_first_gids = []
+        self._n_neurons = 0
+        self._devices = OrderedDict()
+        self._connections = OrderedDict([(key, []) for key in ["source", "target", "weight", "delay", "receptor_type"]])
+        self._connections_arrays = None
+        self._prepared = False
+        self._ring = None
+        self._spikes_senders = []
+        self._spikes_times = []
+
+    def Models(self):
+        return list(NumPyNeuronsModelsDict.keys()) + list(NumPyDevicesNodesDict.keys())
+
+    def set_verbosity(self, level):
+        pass
+
+    def SetKernelStatus(self, params):
+        params = dict(params)
+        if "resolution" in params:
+            if self._step > 0 or self._n_nodes > 0:
+                raise_value_error("The resolution cannot be changed after nodes have been created "
+                                  "or the simulation has started!")
+            self._resolution = float(params.pop("resolution"))
+        if "rng_seed" in params:
+            self._rng_seed = params.pop("rng_seed")
+            self._rng = np.random.RandomState(self._rng_seed)
+        if "use_numba" in params:
+            self.use_numba = bool(params.pop("use_numba")) and njit is not None
+        if "time" in params:
+            # e.g., to resume from a checkpoint
+            self._step = int(np.round(params.pop("time") / self._resolution))
+        # Other, e.g., NEST specific, kernel properties are ignored
+
+    def GetKernelStatus(self, keys=None):
+        status = OrderedDict([("resolution", self._resolution),
+                              ("time", self._step * self._resolution),
+                              ("min_delay", self.min_delay),
+                              ("max_delay", self.max_delay),
+                              ("rng_seed", self._rng_seed),
+                              ("use_numba", self.use_numba),
+                              ("network_size", self._n_nodes),
+                              ("num_connections", self.number_of_connections)])
+        if keys is None:
+            return status
+        elif isinstance(keys, (list, tuple)):
+            return [status[key] for key in keys]
+        return status[keys]
+
+    @property
+    def time(self):
+        return self._step * self._resolution
+
+    def _delays_steps(self, delays):
+        return np.maximum(1, np.round(np.asarray(delays, dtype="float64") / self._resolution)).astype("i8")
+
+    @property
+    def min_delay(self):
+        connections = self._get_connections_arrays()
+        if len(connections["delay"]) == 0:
+            return self._resolution
+        return self._delays_steps(np.min(connections["delay"])) * self._resolution
+
+    @property
+    def max_delay(self):
+        connections = self._get_connections_arrays()
+        if len(connections["delay"]) == 0:
+            return self._resolution
+        return self._delays_steps(np.max(connections["delay"])) * self._resolution
+
+    # Nodes:
+
+    def Create(self, model, n=1, params=None):
+        first_gid = self._n_nodes + 1
+        if model in NumPyNeuronsModelsDict.keys():
+            neurons = NumPyNeuronsModelsDict[model](n, first_gid, self._n_neurons, params)
+            self._neurons.append(neurons)
+            self._neurons_first_gids.append(first_gid)
+            self._n_neurons += neurons.size
+            n = neurons.size
+        elif model in NumPyDevicesNodesDict.keys():
+            for gid in range(first_gid, first_gid + n):
+                self._devices[gid] = NumPyDevicesNodesDict[model](gid, model, params)
+                if model == "voltmeter":
+                    self._devices[gid].params["record_from"] = ["V_m"]
+        else:
+            raise_value_error("Model %s is not one of the available models of the NumPy spiking simulator: %s!"
+                              % (str(model), str(self.Models())))
+        self._n_nodes += n
+        self._prepared = False
+        return tuple(range(first_gid, first_gid + n))
+
+    def _get_neurons_block(self, gid):
+        i_block = bisect_right(self._neurons_first_gids, gid) - 1
+        if i_block >= 0:
+            neurons = self._neurons[i_block]
+            if gid < neurons.first_gid + neurons.size:
+                return neurons
+        return None
+
+    def _get_node(self, gid):
+        device = self._devices.get(gid, None)
+        if device is not None:
+            return device
+        neurons = self._get_neurons_block(gid)
+        if neurons is None:
+            raise_value_error("Node %s does not exist!" % str(gid))
+        return neurons
+
+    def _group_by_neurons_blocks(self, gids):
+        # Return a list of (neurons' block, indices of gids, local indices of neurons in the block),
+        # or None, if not all gids are neurons
+        gids = np.asarray(gids, dtype="i8")
+        if len(self._neurons) == 0 or np.any([gid in self._devices for gid in gids.tolist()]):
+            return None
+        i_blocks = np.searchsorted(self._neurons_first_gids, gids, side="right") - 1
+        groups = []
+        for i_block in np.unique(i_blocks).tolist():
+            if i_block < 0:
+                return None
+            neurons = self._neurons[i_block]
+            inds = np.where(i_blocks == i_block)[0]
+            local_inds = gids[inds] - neurons.first_gid
+            if np.any(local_inds >= neurons.size):
+                return None
+            groups.append((neurons, inds, local_inds))
+        return groups
+
+    @staticmethod
+    def _is_connections(nodes):
+        nodes = ensure_list(nodes)
+        return len(nodes) > 0 and isinstance(nodes[0], (tuple, list, np.ndarray))
+
+    def GetStatus(self, nodes, keys=None):
+        if self._is_connections(nodes):
+            return self._get_connections_status(nodes, keys)
+        gids = ensure_list(nodes)
+        if isinstance(keys, str):
+            groups = self._group_by_neurons_blocks(gids)
+            if groups is not None:
+                # Vectorized reading of neurons' parameters or state variables:
+                values = np.empty((len(gids), ), dtype="O")
+                for neurons, inds, local_inds in groups:
+                    values[inds] = neurons.get(keys, local_inds)
+                return tuple(values.tolist())
+        status = []
+        for gid in gids:
+            node = self._get_node(gid)
+            if isinstance(node, DeviceNode):
+                status.append(node.get_status(keys))
+            else:
+                status.append(node.get_status(gid - node.first_gid))
+        if keys is None:
+            return tuple(status)
+        elif isinstance(keys, (list, tuple)):
+            return tuple([tuple([node_status[key] for key in keys]) for node_status in status])
+        return tuple([node_status[keys] for node_status in status])
+
+    def GetEvents(self, nodes, start=0, variables=None):
+        # Return the events of recording devices from the start-th event on,
+        # without concatenating all the events recorded so far
+        return tuple([self._get_node(gid).get_events(start, variables) for gid in ensure_list(nodes)])
+
+    def SetStatus(self, nodes, params):
+        if self._is_connections(nodes):
+            return self._set_connections_status(nodes, params)
+        gids = ensure_list(nodes)
+        if isinstance(params, dict):
+            groups = self._group_by_neurons_blocks(gids)
+            if groups is not None:
+                # Vectorized setting of the same parameters' values to all neurons:
+                for neurons, inds, local_inds in groups:
+                    neurons.set_status(params, local_inds)
+                return
+            params = [params] * len(gids)
+        params = ensure_list(params)
+        if len(params) != len(gids):
+            raise_value_error("The number of parameters' dictionaries (%d) does not match the number of nodes (%d)!"
+                              % (len(params), len(gids)))
+        for gid, node_params in zip(gids, params):
+            node = self._get_node(gid)
+            if isinstance(node, DeviceNode):
+                node.set_status(node_params)
+            else:
+                node.set_status(node_params, gid - node.first_gid)
+
+    # Connections:
+
+    def _draw_values(self, values, n):
+        # Connections' weights and delays can be scalars, arrays of n values,
+        # or dictionaries of a normal, lognormal or uniform distribution
+        if isinstance(values, dict):
+            distribution = values.get("distribution", "normal")
+            if distribution == "normal":
+                return self._rng.normal(values.get("mu", 0.0), values.get("sigma", 1.0), n)
+            elif distribution == "lognormal":
+                return self._rng.lognormal(values.get("mu", 0.0), values.get("sigma", 1.0), n)
+            elif distribution == "uniform":
+                return self._rng.uniform(values.get("low", 0.0), values.get("high", 1.0), n)
+            raise_value_error("Distribution %s is not available!" % str(distribution))
+        values = np.asarray(values, dtype="float64").flatten()
+        if values.size == 1:
+            return np.full((n, ), values[0])
+        elif values.size != n:
+            raise_value_error("%d values given for %d connections!" % (values.size, n))
+        return values
+
+    def _connect_rule(self, pre, post, conn_spec):
+        # Return the sources and targets of the connections following the connectivity rule
+        return generate_connections(pre, post, conn_spec, self._rng)
+
+    def Connect(self, pre, post, conn_spec=None, syn_spec=None):
+        # Arrays of neurons, e.g., of batched connections, are not converted to lists:
+        pre = np.asarray(pre if isinstance(pre, np.ndarray) else ensure_list(pre), dtype="i8")
+        post = np.asarray(post if isinstance(post, np.ndarray) else ensure_list(post), dtype="i8")
+        if conn_spec is None:
+            conn_spec = {"rule": "all_to_all"}
+        elif isinstance(conn_spec, str):
+            conn_spec = {"rule": conn_spec}
+        if syn_spec is None:
+            syn_spec = {}
+        sources, targets = self._connect_rule(pre, post, conn_spec)
+        n = len(sources)
+        self._connections["source"].append(sources)
+        self._connections["target"].append(targets)
+        self._connections["weight"].append(self._draw_values(syn_spec.get("weight", 1.0), n))
+        self._connections["delay"].append(self._draw_values(syn_spec.get("delay", self._resolution), n))
+        self._connections["receptor_type"].append(
+            np.full((n, ), int(syn_spec.get("receptor_type", 0)), dtype="i8"))
+        self._connections_arrays = None
+        self._prepared = False
+
+    def _get_connections_arrays(self):
+        if self._connections_arrays is None:
+            self._connections_arrays = OrderedDict()
+            for key, values in self._connections.items():
+                if len(values) > 0:
+                    self._connections_arrays[key] = np.concatenate(values)
+                else:
+                    self._connections_arrays[key] = np.array([], dtype="i8")
+                # Keep a single chunk of connections from now on:
+                self._connections[key] = [self._connections_arrays[key]]
+        return self._connections_arrays
+
+    @property
+    def number_of_connections(self):
+        return len(self._get_connections_arrays()["source"])
+
+    def GetConnections(self, source=None, target=None, synapse_model=None):
+        # Connections are returned as (source, target, connection index) tuples
+        connections = self._get_connections_arrays()
+        inds = np.ones(connections["source"].shape, dtype="bool")
+        if source is not None:
+            inds = np.logical_and(inds, np.isin(connections["source"], ensure_list(source)))
+        if target is not None:
+            inds = np.logical_and(inds, np.isin(connections["target"], ensure_list(target)))
+        inds = np.where(inds)[0]
+        return list(zip(connections["source"][inds].tolist(), connections["target"][inds].tolist(), inds.tolist()))
+
+    def _get_connections_status(self, connections, keys=None):
+        arrays = self._get_connections_arrays()
+        inds = np.array([connection[2] for connection in connections], dtype="i8")
+        status = OrderedDict([("source", arrays["source"][inds]),
+                              ("target", arrays["target"][inds]),
+                              ("weight", arrays["weight"][inds]),
+                              ("delay", arrays["delay"][inds]),
+                              ("receptor", arrays["receptor_type"][inds]),
+                              ("receptor_type", arrays["receptor_type"][inds]),
+                              ("synapse_model", np.array(["static_synapse"] * len(inds)))])
+        if keys is None:
+            return tuple([OrderedDict([(key, val[i_conn].item()) for key, val in status.items()])
+                          for i_conn in range(len(inds))])
+        elif isinstance(keys, (list, tuple)):
+            return tuple(zip(*[status[key].tolist() for key in keys]))
+        return tuple(status[keys].tolist())
+
+    def _set_connections_status(self, connections, params):
+        arrays = self._get_connections_arrays()
+        inds = np.array([connection[2] for connection in connections], dtype="i8")
+        for key, values in params.items():
+            if key == "receptor":
+                key = "receptor_type"
+            if key not in ["weight", "delay", "receptor_type"]:
+                raise_value_error("Connections' property %s cannot be set!" % str(key))
+            arrays[key][inds] = values
+        self._prepared = False
+
+    # Simulation:
+
+    def _receptors(self, weights, receptor_types):
+        return np.where(receptor_types == 0,
+                        np.where(weights < 0.0, INHIBITORY, EXCITATORY),
+                        np.where(receptor_types == 2, INHIBITORY, EXCITATORY)).astype("i8")
+
+    def _signed_weights(self, weights, receptors):
+        # Inhibitory inputs are negative, whatever the sign of the weight of a forced inhibitory receptor
+        weights = np.abs(weights).astype("float64")
+        return np.where(receptors == INHIBITORY, -weights, weights)
+
+    def _devices_indices(self, gids, model):
+        devices_gids = [gid for gid, device in self._devices.items() if device.model == model]
+        lookup = np.full((self._n_nodes + 1, ), -1, dtype="i8")
+        lookup[np.array(devices_gids, dtype="i8")] = np.arange(len(devices_gids))
+        return lookup[gids], [self._devices[gid] for gid in devices_gids]
+
+    def Prepare(self):
+        # Compile the connections to arrays per kind of connection, and the ring buffer of the neurons' inputs
+        connections = self._get_connections_arrays()
+        sources = connections["source"].astype("i8")
+        targets = connections["target"].astype("i8")
+        # Global index of neurons, -1 for devices:
+        self._neuron_index = np.full((self._n_nodes + 1, ), -1, dtype="i8")
+        for neurons in self._neurons:
+            self._neuron_index[neurons.gids] = np.arange(neurons.first_index, neurons.first_index + neurons.size)
+        self._neuron_gid = np.where(self._neuron_index >= 0)[0]
+        sources_inds = self._neuron_index[sources]
+        targets_inds = self._neuron_index[targets]
+        delays = self._delays_steps(connections["delay"])
+        receptors = self._receptors(connections["weight"], connections["receptor_type"])
+        kinds = np.zeros(sources.shape, dtype="bool")
+
+        # Synapses among neurons, sorted by source neuron:
+        synapses = np.where(np.logical_and(sources_inds >= 0, targets_inds >= 0))[0]
+        synapses = synapses[np.argsort(sources_inds[synapses], kind="mergesort")]
+        kinds[synapses] = True
+        self._synapses_indptr = np.concatenate([[0], np.cumsum(np.bincount(sources_inds[synapses],
+                                                                           minlength=self._n_neurons))])
+        self._synapses_targets = targets_inds[synapses]
+        self._synapses_delays = delays[synapses]
+        self._synapses_receptors = receptors[synapses]
+        self._synapses_weights = self._signed_weights(connections["weight"][synapses], self._synapses_receptors)
+
+        # Poisson generators -> neurons:
+        generators, self._poisson_generators = self._devices_indices(sources, "poisson_generator")
+        inds = np.where(np.logical_and(generators >= 0, targets_inds >= 0))[0]
+        kinds[inds] = True
+        self._poisson_generator = generators[inds]
+        self._poisson_targets = targets_inds[inds]
+        self._poisson_delays = delays[inds]
+        self._poisson_receptors = receptors[inds]
+        self._poisson_weights = self._signed_weights(connections["weight"][inds], self._poisson_receptors)
+
+        # DC generators -> neurons:
+        generators, self._dc_generators = self._devices_indices(sources, "dc_generator")
+        inds = np.where(np.logical_and(generators >= 0, targets_inds >= 0))[0]
+        kinds[inds] = True
+        self._dc_generator = generators[inds]
+        self._dc_targets = targets_inds[inds]
+        self._dc_weights = connections["weight"][inds].astype("float64")
+
+        # Neurons -> spike detectors:
+        detectors, spike_detectors = self._devices_indices(targets, "spike_detector")
+        inds = np.where(np.logical_and(detectors >= 0, sources_inds >= 0))[0]
+        kinds[inds] = True
+        self._spike_detectors = []
+        for i_detector, spike_detector in enumerate(spike_detectors):
+            self._spike_detectors.append((spike_detector,
+                                          np.unique(sources_inds[inds[detectors[inds] == i_detector]])))
+
+        # Multimeters -> neurons:
+        self._multimeters = []
+        for model in ["multimeter", "voltmeter"]:
+            recorders, multimeters = self._devices_indices(sources, model)
+            inds = np.where(np.logical_and(recorders >= 0, targets_inds >= 0))[0]
+            kinds[inds] = True
+            for i_multimeter, multimeter in enumerate(multimeters):
+                recorded = np.unique(targets[inds[recorders[inds] == i_multimeter]])
+                groups = self._group_by_neurons_blocks(recorded)
+                if groups is None:
+                    groups = []
+                interval = int(np.maximum(1, np.round(multimeter.params["interval"] / self._resolution)))
+                self._multimeters.append((multimeter, interval, recorded, groups))
+
+        if not np.all(kinds):
+            i_conn = np.where(~kinds)[0][0]
+            raise_value_error("Connection from %s to %s is not possible in the NumPy spiking simulator!"
+                              % (self._get_node(sources[i_conn]).model, self._get_node(targets[i_conn]).model))
+
+        # Ring buffer of excitatory and inhibitory inputs per future time step and neuron:
+        max_delay = np.max(np.concatenate([[1], self._synapses_delays, self._poisson_delays]))
+        ring = np.zeros((2, max_delay + 1, self._n_neurons))
+        if self._ring is not None and self._ring.shape[2] == self._n_neurons:
+            # Keep the inputs of spikes already in flight:
+            n_slots = np.minimum(self._ring.shape[1], ring.shape[1])
+            steps = self._step + np.arange(n_slots)
+            ring[:, steps % ring.shape[1]] = self._ring[:, steps % self._ring.shape[1]]
+        self._ring = ring
+        self._prepared = True
+
+    def _update_generators_params(self):
+        # Generators' parameters may have been set between runs
+        self._poisson_params = np.array([[generator.params["rate"], generator.params["start"],
+                                          generator.params["stop"]] for generator in self._poisson_generators])
+        self._dc_params = np.array([[generator.params["amplitude"], generator.params["start"],
+                                     generator.params["stop"]] for generator in self._dc_generators])
+
+    def _active(self, params, time):
+        if len(params) == 0:
+            return np.array([], dtype="bool")
+        return np.logical_and(params[:, 1] <= time, time < params[:, 2])
+
+    def _poisson_input(self, time):
+        if len(self._poisson_generator) == 0:
+            return
+        active = self._active(self._poisson_params, time)
+        rates = np.where(active, self._poisson_params[:, 0], 0.0)[self._poisson_generator]
+        counts = self._rng.poisson(rates * self._resolution * 1e-3)
+        inds = np.where(counts > 0)[0]
+        if len(inds) > 0:
+            n_slots = self._ring.shape[1]
+            np.add.at(self._ring.reshape(-1),
+                      (self._poisson_receptors[inds] * n_slots + (self._step + self._poisson_delays[inds]) % n_slots)
+                      * self._n_neurons + self._poisson_targets[inds],
+                      self._poisson_weights[inds] * counts[inds])
+
+    def _dc_input(self, time):
+        if len(self._dc_generator) == 0:
+            return np.zeros((self._n_neurons, ))
+        active = self._active(self._dc_params, time)
+        amplitudes = np.where(active, self._dc_params[:, 0], 0.0)[self._dc_generator]
+        return np.bincount(self._dc_targets, weights=amplitudes * self._dc_weights, minlength=self._n_neurons)
+
+    def _record_multimeters(self, time):
+        for multimeter, interval, recorded, groups in self._multimeters:
+            if self._step % interval == 0 and multimeter.is_active(time) and len(recorded) > 0:
+                events = OrderedDict([("senders", recorded), ("times", np.full(recorded.shape, time))])
+                for var in multimeter.record_variables[2:]:
+                    values = np.empty(recorded.shape)
+                    for neurons, inds, local_inds in groups:
+                        values[inds] = neurons.get(var, local_inds)
+                    events[var] = values
+                multimeter.record(events)
+
+    def _record_spikes(self):
+        # Distribute the spikes of the last run to the spike detectors
+        if len(self._spikes_senders) == 0:
+            return
+        senders = np.concatenate(self._spikes_senders)
+        times = np.concatenate(self._spikes_times)
+        self._spikes_senders = []
+        self._spikes_times = []
+        for spike_detector, sources in self._spike_detectors:
+            inds = np.isin(senders, sources)
+            inds = np.logical_and(inds, np.logical_and(times > spike_detector.params["start"],
+                                                       times <= spike_detector.params["stop"]))
+            spike_detector.record(OrderedDict([("senders", self._neuron_gid[senders[inds]]),
+                                               ("times", times[inds])]))
+
+    def _step_neurons(self):
+        time = self._step * self._resolution
+        self._poisson_input(time)
+        I_stim = self._dc_input(time)
+        n_slots = self._ring.shape[1]
+        inputs = self._ring[:, self._step % n_slots]
+        spiking = []
+        for neurons in self._neurons:
+            neurons_slice = slice(neurons.first_index, neurons.first_index + neurons.size)
+            spikes = neurons.update(self._resolution, inputs[EXCITATORY, neurons_slice],
+                                    inputs[INHIBITORY, neurons_slice], I_stim[neurons_slice], self.use_numba)
+            spiking.append(np.where(spikes)[0] + neurons.first_index)
+        inputs[:] = 0.0
+        if len(spiking) > 0:
+            spiking = np.concatenate(spiking)
+        if len(spiking) > 0:
+            if self.use_numba:
+                deliver_spikes = _numba_deliver_spikes
+            else:
+                deliver_spikes = _deliver_spikes
+            deliver_spikes(spiking, self._synapses_indptr, self._synapses_targets, self._synapses_delays,
+                           self._synapses_receptors, self._synapses_weights, self._ring, self._step)
+            if len(self._spike_detectors) > 0:
+                self._spikes_senders.append(spiking)
+                self._spikes_times.append(np.full(spiking.shape, (self._step + 1) * self._resolution))
+        self._step += 1
+        self._record_multimeters(self._step * self._resolution)
+
+    def Run(self, simulation_length):
+        if not self._prepared:
+            self.Prepare()
+        self._update_generators_params()
+        n_steps = int(np.round(simulation_length / self._resolution))
+        for _ in range(n_steps):
+            self._step_neurons()
+        self._record_spikes()
+
+    def Simulate(self, simulation_length):
+        self.Prepare()
+        self.Run(simulation_length)
+        self.Cleanup()
+
+    def Cleanup(self):
+        self._record_spikes()
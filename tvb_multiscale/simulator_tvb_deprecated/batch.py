@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+"""
+Simulation of a batch of model parameter sets at once, along the modes' axis of the TVB state.
+
+Every mode of the state (state variables, nodes, modes) then integrates the model for one parameter set,
+so that a parameter sweep runs as a few vectorized simulations, instead of one simulation per parameter set.
+Model parameters, compiled kernels, coupling and monitors all broadcast along the modes' axis,
+and the results of mode i, e.g., data[:, :, :, i] of a monitor's output, are those of the i-th parameter set.
+"""
+
+import numpy
+
+from tvb_scripts.utils.log_error_utils import initialize_logger, raise_value_error
+
+
+LOG = initialize_logger(__name__)
+
+
+def parameters_grid(**parameters):
+    # Return the flattened grid of all combinations of the values of the parameters,
+    # i.e., a dictionary of parameters' values' arrays of equal size
+    names = list(parameters.keys())
+    grid = numpy.meshgrid(*[numpy.asarray(parameters[name], dtype="float64").flatten() for name in names],
+                          indexing="ij")
+    return dict(zip(names, [values.flatten() for values in grid]))
+
+
+def split_batches(parameters, batch_size):
+    # Split a dictionary of parameters' values' arrays of equal size (e.g., a parameters_grid)
+    # into a list of such dictionaries of at most batch_size values each
+    batch_sizes = numpy.unique([numpy.shape(values)[-1] for values in parameters.values()])
+    if batch_sizes.size != 1:
+        raise_value_error("All batch parameters should have the same number of values, not %s!"
+                          % str(batch_sizes.tolist()))
+    return [dict([(name, values[..., start:start + batch_size]) for name, values in parameters.items()])
+            for start in range(0, batch_sizes[0], batch_size)]
+
+
+def set_parameters_batch(model, number_of_nodes, **parameters):
+    # Set the batch of model parameters' values along the modes' axis, and the number of modes to the batch size.
+    # Parameters' values are of shape (batch size, ), or (number_of_nodes, batch size) for regional parameters.
+    # They are set with shape (number_of_nodes, batch size),
+    # so that the Simulator does not confuse them for regional parameters of shape (number_of_nodes, ).
+    batch_size = None
+    for name, values in parameters.items():
+        values = numpy.asarray(values, dtype="float64")
+        if values.ndim == 1:
+            values = values[numpy.newaxis]
+        if values.ndim != 2 or values.shape[0] not in (1, number_of_nodes) or \
+                (batch_size is not None and values.shape[1] != batch_size):
+            raise_value_error("Batch values of parameter %s of shape %s are neither of shape (%s, ) nor (%d, %s)!"
+                              % (name, str(values.shape), str(batch_size), number_of_nodes, str(batch_size)))
+        batch_size = values.shape[1]
+        setattr(model, name, numpy.tile(values, (number_of_nodes // values.shape[0], 1)))
+    if batch_size is not None:
+        model.number_of_modes = batch_size
+        LOG.info("Model %s is simulated for a batch of %d parameter sets, along the modes' axis."
+                 % (model.__class__.__name__, batch_size))
+    return batch_size
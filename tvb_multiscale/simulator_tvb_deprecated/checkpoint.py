@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+"""
+Writing and reading of co-simulation checkpoints.
+"""
+
+import os
+import pickle
+
+from tvb_scripts.utils.log_error_utils import initialize_logger, raise_value_error
+
+
+LOG = initialize_logger(__name__)
+
+
+def write_checkpoint(path, checkpoint):
+    # The checkpoint is written to a temporary file first, which then replaces any previous checkpoint,
+    # so that a job killed while writing cannot leave a corrupt checkpoint behind.
+    folder = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as file:
+        pickle.dump(checkpoint, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+    LOG.info("Checkpoint of step %d saved to %s" % (checkpoint["current_step"], path))
+
+
+def read_checkpoint(path):
+    if not os.path.isfile(path):
+        raise_value_error("No checkpoint file found at path %s!" % str(path))
+    with open(path, "rb") as file:
+        checkpoint = pickle.load(file)
+    LOG.info("Checkpoint of step %d loaded from %s" % (checkpoint["current_step"], path))
+    return checkpoint
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compiled kernels of the delayed node coupling of the co-simulation Simulator.
+
+They read the delayed values of the coupling variables straight from the ring buffer of TVB's SparseHistory,
+for the connections of non-zero weight only, and apply linear (Linear, Scaling) or sigmoidal (Sigmoidal)
+coupling functions, in parallel over the target regions, into preallocated outputs.
+The history update and the coupling of the next time step are computed in the same compiled call.
+"""
+
+import numpy
+from tvb.simulator import coupling as tvb_coupling
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+
+LINEAR = 0
+SIGMOIDAL = 1
+
+
+def _delayed_coupling(buffer, step, indptr, sources, weights, idelays, post, params, out):
+    # out[cvar, target, mode] = post(sum_k weights[k] * buffer[step - 1 - idelays[k], cvar, sources[k], mode]),
+    # for the connections k of every target (rows of the connectivity)
+    n_time, n_cvar, n_node, n_mode = buffer.shape
+    # Delays are smaller than n_time, so the ring buffer index needs at most one addition of n_time:
+    i_last = (step - 1) % n_time
+    for i_node in prange(n_node):
+        for i_cvar in range(n_cvar):
+            for i_mode in range(n_mode):
+                gx = 0.0
+                for i_con in range(indptr[i_node], indptr[i_node + 1]):
+                    i_time = i_last - idelays[i_con]
+                    if i_time < 0:
+                        i_time += n_time
+                    gx += weights[i_con] * buffer[i_time, i_cvar, sources[i_con], i_mode]
+                if post == LINEAR:
+                    out[i_cvar, i_node, i_mode] = params[0] * gx + params[1]
+                else:
+                    # cmin + (cmax - cmin) / (1.0 + exp(-a * (gx - midpoint) / sigma))
+                    out[i_cvar, i_node, i_mode] = \
+                        params[0] + (params[1] - params[0]) / \
+                        (1.0 + numpy.exp(-params[2] * (gx - params[3]) / params[4]))
+
+
+def _update_history_and_delayed_coupling(buffer, step, state, cvars, indptr, sources, weights, idelays,
+                                         post, params, out):
+    # Write the state of this step to the history buffer first,
+    # and then compute the coupling of the next step, which reads only the time slots step - delay:
+    n_time, n_cvar, n_node, n_mode = buffer.shape
+    i_time = step % n_time
+    for i_node in prange(n_node):
+        for i_cvar in range(n_cvar):
+            for i_mode in range(n_mode):
+                buffer[i_time, i_cvar, i_node, i_mode] = state[cvars[i_cvar], i_node, i_mode]
+    _delayed_coupling(buffer, step + 1, indptr, sources, weights, idelays, post, params, out)
+
+
+if njit is not None:
+    _delayed_coupling = njit(parallel=True)(_delayed_coupling)
+    _update_history_and_delayed_coupling = njit(parallel=True)(_update_history_and_delayed_coupling)
+
+
+def coupling_function_params(coupling):
+    # Return the type of post-summation function and its parameters, for the supported coupling functions,
+    # or None, if the coupling function is not supported by the compiled kernels
+    if type(coupling) is tvb_coupling.Linear:
+        post, params = LINEAR, [coupling.a, coupling.b]
+    elif type(coupling) is tvb_coupling.Scaling:
+        post, params = LINEAR, [coupling.a, 0.0]
+    elif type(coupling) is tvb_coupling.Sigmoidal:
+        post, params = SIGMOIDAL, [coupling.cmin, coupling.cmax, coupling.a, coupling.midpoint, coupling.sigma]
+    else:
+        return None
+    params = [numpy.asarray(param, dtype="float64").flatten() for param in params]
+    # Only global (i.e., not regional) parameters are supported:
+    if numpy.any([param.size != 1 for param in params]):
+        return None
+    return post, numpy.concatenate(params)
+
+
+class DelayedCouplingKernel(object):
+
+    """Compiled delayed node coupling of a SparseHistory, with two alternating output buffers."""
+
+    def __init__(self, history, post, params):
+        self.history = history
+        self.post = post
+        self.params = params
+        # Connections of non-zero weight, sorted by target (row):
+        targets = numpy.asarray(history.nnz_row_el_idx)
+        order = numpy.argsort(targets, kind="stable")
+        self.indptr = numpy.concatenate([[0], numpy.cumsum(numpy.bincount(targets, minlength=history.n_node))])
+        self.indptr = self.indptr.astype("i8")
+        self.sources = numpy.asarray(history.nnz_col_el_idx)[order].astype("i8")
+        self.weights = numpy.asarray(history.nnz_weights)[order].astype("float64")
+        self.idelays = numpy.asarray(history.nnz_idelays)[order].astype("i8")
+        self.cvars = numpy.asarray(history.cvars).astype("i8")
+        # The coupling of a step is still used, while the one of the next step is computed:
+        self._outputs = [numpy.zeros((history.n_cvar, history.n_node, history.n_mode)) for _ in range(2)]
+        self._i_output = 0
+
+    def _next_output(self):
+        self._i_output = (self._i_output + 1) % 2
+        return self._outputs[self._i_output]
+
+    def __call__(self, step):
+        # Compute the coupling of this step
+        out = self._next_output()
+        _delayed_coupling(self.history.buffer, step, self.indptr, self.sources, self.weights, self.idelays,
+                          self.post, self.params, out)
+        return out
+
+    def update_history_and_couple(self, step, state):
+        # Update the history with the state of this step, and compute the coupling of the next step
+        out = self._next_output()
+        _update_history_and_delayed_coupling(self.history.buffer, step, state, self.cvars,
+                                             self.indptr, self.sources, self.weights, self.idelays,
+                                             self.post, self.params, out)
+        return out
+
+
+def build_delayed_coupling_kernel(history, coupling):
+    # Return a DelayedCouplingKernel, or None if Numba or the coupling function are not supported
+    if njit is None:
+        return None
+    post_params = coupling_function_params(coupling)
+    if post_params is None:
+        return None
+    return DelayedCouplingKernel(history, *post_params)
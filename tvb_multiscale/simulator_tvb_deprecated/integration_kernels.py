@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compiled kernels of the integration of the co-simulation Simulator.
+
+For the supported models, a whole Heun (deterministic or stochastic) step, i.e., both dfun evaluations,
+the update of the model's non-state variables and the bounding and clamping of the intermediate and new states,
+is computed in one compiled pass over nodes and modes, into preallocated state buffers.
+For large enough numbers of nodes and modes, and more than one thread, the pass is parallel over nodes.
+"""
+
+import numpy
+from tvb.simulator import integrators
+
+from tvb_multiscale.simulator_tvb_deprecated.parallel import use_parallel, node_parameter
+
+try:
+    from tvb_multiscale.simulator_tvb_deprecated.models import reduced_wong_wang_exc_io_inh_i as rww
+except ImportError:
+    rww = None
+
+
+# The compiled Heun step, state update and the parameters' names of every supported model class,
+# for serial and parallel (over nodes) execution:
+FUSED_MODELS = {}
+FUSED_MODELS_PARALLEL = {}
+if rww is not None:
+    FUSED_MODELS[rww.ReducedWongWangExcIOInhI] = (rww.numba_heun_step, rww.numba_update_state, rww.NUMBA_PARAMETERS)
+    FUSED_MODELS_PARALLEL[rww.ReducedWongWangExcIOInhI] = \
+        (rww.numba_heun_step_parallel, rww.numba_update_state_parallel, rww.NUMBA_PARAMETERS)
+
+
+class FusedHeunKernel(object):
+
+    """Compiled Heun integration step of a model, fused with the update of its non-state variables
+       and the bounding and clamping of its state, into two alternating state buffers."""
+
+    def __init__(self, integrator, model, heun_step, update_state, parameters, shape):
+        self.integrator = integrator
+        self.model = model
+        self.heun_step = heun_step
+        self._update_state = update_state
+        self.parameters = parameters
+        self.stochastic = isinstance(integrator, integrators.IntegratorStochastic)
+        n_svar = shape[0]
+        # Boundaries are NaN for unbounded state variables:
+        self.lo = numpy.full((n_svar, ), numpy.nan)
+        self.hi = numpy.full((n_svar, ), numpy.nan)
+        if integrator.state_variable_boundaries is not None:
+            boundaries = numpy.array(integrator.state_variable_boundaries, dtype="float64")
+            self.lo[integrator.bounded_state_variable_indices] = boundaries[:, 0]
+            self.hi[integrator.bounded_state_variable_indices] = boundaries[:, 1]
+        self.clamped = numpy.zeros((n_svar, ), dtype=numpy.bool_)
+        self.clamp_values = numpy.zeros(shape)
+        if integrator.clamped_state_variable_values is not None:
+            self.clamped[integrator.clamped_state_variable_indices] = True
+            self.clamp_values[integrator.clamped_state_variable_indices] = integrator.clamped_state_variable_values
+        self._parameters_values = [None] * len(parameters)
+        self._parameters_views = [None] * len(parameters)
+        # No noise or stimulus:
+        self._zeros = numpy.zeros(shape)
+        # The new state is computed from the one of the previous step, which is still in use:
+        self._outputs = [numpy.zeros(shape) for _ in range(2)]
+
+    def _parameters(self):
+        # Views of the model parameters, broadcast to shape (nodes, modes), which follow any in place changes
+        # of the parameters, e.g., by the Spiking Network in between steps. They are renewed for any new parameters.
+        for i_param, param in enumerate(self.parameters):
+            value = getattr(self.model, param)
+            if value is not self._parameters_values[i_param]:
+                self._parameters_values[i_param] = value
+                self._parameters_views[i_param] = node_parameter(value, self._zeros.shape[1:])
+        return tuple(self._parameters_views)
+
+    def _stimulus(self, stimulus, shape):
+        if numpy.ndim(stimulus) == 0:
+            if stimulus == 0.0:
+                return self._zeros
+            return numpy.full(shape, stimulus)
+        return numpy.broadcast_to(stimulus, shape)
+
+    def scheme(self, X, coupling, local_coupling=0.0, stimulus=0.0):
+        # Return the new state, integrated from state X with integrator's Heun scheme
+        out = self._outputs[0] if X is not self._outputs[0] else self._outputs[1]
+        if self.stochastic:
+            # Noise is generated exactly as by the integrator's scheme, with the same random stream:
+            noise = self.integrator.noise.generate(X.shape)
+            noise *= self.integrator.noise.gfun(X)
+        else:
+            noise = self._zeros
+        self.heun_step(X, coupling, float(local_coupling), self._stimulus(stimulus, X.shape), noise,
+                       float(self.integrator.dt), self._parameters(), self.lo, self.hi, self.clamped,
+                       self.clamp_values, out)
+        return out
+
+    def update_state(self, state, coupling, local_coupling=0.0):
+        # Update any non-state variables of state and bound and clamp it, in place
+        self._update_state(state, coupling, float(local_coupling), self._parameters(),
+                           self.lo, self.hi, self.clamped, self.clamp_values)
+        return state
+
+
+def build_integration_kernel(integrator, model, shape):
+    # Return a FusedHeunKernel for states of this shape, parallel over nodes for large enough states,
+    # or None if the integration scheme or the model are not supported
+    if type(integrator) not in (integrators.HeunDeterministic, integrators.HeunStochastic):
+        return None
+    if use_parallel(numpy.prod(shape[1:])):
+        fused_model = FUSED_MODELS_PARALLEL.get(type(model), None)
+    else:
+        fused_model = FUSED_MODELS.get(type(model), None)
+    if fused_model is None or shape[0] != model.nvar:
+        return None
+    return FusedHeunKernel(integrator, model, *fused_model, shape=shape)
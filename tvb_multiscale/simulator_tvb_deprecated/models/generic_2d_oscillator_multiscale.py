@@ -31,10 +31,14 @@ Oscillator builders.
 
 """
 import numexpr
-from numba import guvectorize, float64
+from numba import guvectorize, njit, prange, float64
 from tvb.simulator.models.base import numpy
 from tvb.basic.neotraits.api import NArray, Range  # , Final, List
 from tvb.simulator.models.oscillator import Generic2dOscillator as TVBGeneric2dOscillator
+from tvb_multiscale.simulator_tvb_deprecated.parallel import use_parallel, node_parameters
+
+
+NUMBA_PARAMETERS = ("tau", "I", "a", "b", "c", "d", "e", "f", "g", "beta", "alpha", "gamma", "V_m")
 
 
 class Generic2dOscillator(TVBGeneric2dOscillator):
@@ -281,6 +285,12 @@ class Generic2dOscillator(TVBGeneric2dOscillator):
         return derivative
 
     def dfun(self, vw, c, local_coupling=0.0):
+        if (use_parallel(vw[0].size) or vw.shape[2] > 1) and numpy.ndim(local_coupling) == 0:
+            # Parallel loop over nodes, which also supports multiple modes, e.g., batches of parameters:
+            deriv = numpy.empty_like(vw)
+            _numba_dfun_g2d_parallel(vw, c, float(local_coupling),
+                                     node_parameters(self, NUMBA_PARAMETERS, vw.shape[1:]), deriv)
+            return deriv
         vw[0, :] = numpy.where(self.V_m == 0, vw[0, :].squeeze(), self.V_m)[:, numpy.newaxis]
         lc_0 = local_coupling * vw[0, :, 0]
         vw_ = vw.reshape(vw.shape[:-1]).T
@@ -299,3 +309,25 @@ def _numba_dfun_g2d(vw, c_0, tau, I, a, b, c, d, e, f, g, beta, alpha, gamma, lc
     dx[0] = d[0] * tau[0] * (alpha[0] * W - f[0] * V2*V + e[0] * V2 + g[0] * V + gamma[0] * I[0] + gamma[0] * c_0[0] + lc_0[0])
     dx[1] = d[0] * (a[0] + b[0] * V + c[0] * V2 - beta[0] * W) / tau[0]
 
+
+@njit(parallel=True, error_model="numpy")
+def _numba_dfun_g2d_parallel(vw, c_0, local_coupling, P, dx):
+    """Parallel over nodes model equations, for parameters P in the order of NUMBA_PARAMETERS,
+       as (broadcast) arrays of shape (nodes, modes). Like the dfun, it sets V to V_m in place, where V_m != 0."""
+    tau, I, a, b, c, d, e, f, g, beta, alpha, gamma, V_m = P
+    n_svar, n_node, n_mode = vw.shape
+    for i_node in prange(n_node):
+        for i_mode in range(n_mode):
+            if V_m[i_node, i_mode] != 0.0:
+                vw[0, i_node, i_mode] = V_m[i_node, i_mode]
+            V = vw[0, i_node, i_mode]
+            V2 = V * V
+            W = vw[1, i_node, i_mode]
+            dx[0, i_node, i_mode] = \
+                d[i_node, i_mode] * tau[i_node, i_mode] * \
+                (alpha[i_node, i_mode] * W - f[i_node, i_mode] * V2 * V + e[i_node, i_mode] * V2
+                 + g[i_node, i_mode] * V + gamma[i_node, i_mode] * I[i_node, i_mode]
+                 + gamma[i_node, i_mode] * c_0[0, i_node, i_mode] + local_coupling * V)
+            dx[1, i_node, i_mode] = \
+                d[i_node, i_mode] * (a[i_node, i_mode] + b[i_node, i_mode] * V + c[i_node, i_mode] * V2
+                                     - beta[i_node, i_mode] * W) / tau[i_node, i_mode]
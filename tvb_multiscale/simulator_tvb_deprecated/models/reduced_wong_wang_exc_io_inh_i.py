@@ -31,9 +31,10 @@ Models based on Wong-Wang's work.
 
 """
 
-from numba import guvectorize, float64
+from numba import guvectorize, njit, prange, float64
 from tvb.simulator.models.base import numpy, ModelNumbaDfun
 from tvb.basic.neotraits.api import NArray, Final, List, Range
+from tvb_multiscale.simulator_tvb_deprecated.parallel import use_parallel, node_parameters
 
 
 @guvectorize([(float64[:],)*19], '(n),(m)' + ',()'*16 + '->(n)', nopython=True)
@@ -56,10 +57,8 @@ def _numba_update_non_state_variables(S, c, ae, be, de, wp, we, jn, re, ai, bi,
         h = x / (1 - numpy.exp(-di[0]*x))
         S[3] = h
 
-    newS[0] = S[0]
-    newS[1] = S[1]
-    newS[3] = S[2]
-    newS[4] = S[4]
+    for i_svar in range(S.shape[0]):
+        newS[i_svar] = S[i_svar]
 
 
 @guvectorize([(float64[:],)*6], '(n)' + ',()'*4 + '->(n)', nopython=True)
@@ -73,6 +72,151 @@ def _numba_dfun(S, ge, te, gi, ti, dx):
     dx[3] = 0.0
 
 
+def _loop_parameter(param):
+    # Regional parameters of shape (number of nodes, ) are broadcast along the modes' loop axis of the gufuncs
+    if param.ndim == 1 and param.size > 1:
+        return param[:, numpy.newaxis]
+    return param
+
+
+# The model parameters of the fused kernels, in this order:
+NUMBA_PARAMETERS = ("a_e", "b_e", "d_e", "gamma_e", "tau_e", "w_p", "J_N", "W_e", "R_e",
+                    "a_i", "b_i", "d_i", "gamma_i", "tau_i", "J_i", "W_i", "R_i", "G", "lamda", "I_o")
+
+
+@njit(inline="always", error_model="numpy")
+def _node_parameters(P, i_node, i_mode):
+    # The parameters of a node and mode, from their views P of shape (nodes, modes), in the order of NUMBA_PARAMETERS
+    return (P[0][i_node, i_mode], P[1][i_node, i_mode], P[2][i_node, i_mode], P[3][i_node, i_mode],
+            P[4][i_node, i_mode], P[5][i_node, i_mode], P[6][i_node, i_mode], P[7][i_node, i_mode],
+            P[8][i_node, i_mode], P[9][i_node, i_mode], P[10][i_node, i_mode], P[11][i_node, i_mode],
+            P[12][i_node, i_mode], P[13][i_node, i_mode], P[14][i_node, i_mode], P[15][i_node, i_mode],
+            P[16][i_node, i_mode], P[17][i_node, i_mode], P[18][i_node, i_mode], P[19][i_node, i_mode])
+
+
+@njit(inline="always", error_model="numpy")
+def _rates(S_e, S_i, R_e, R_i, c, p):
+    # Only rates with parameters R_e, R_i < 0 are computed by TVB, the rest are left unchanged.
+    # p are the parameters of this node and mode, in the order of NUMBA_PARAMETERS
+    cc = p[17] * p[6] * c
+    J_N_S_e = p[6] * S_e
+    if p[8] < 0.0:
+        x = p[5] * J_N_S_e - p[14] * S_i + p[7] * p[19] + cc
+        x = p[0] * x - p[1]
+        R_e = x / (1 - numpy.exp(-p[2] * x))
+    if p[16] < 0.0:
+        x = J_N_S_e - S_i + p[15] * p[19] + p[18] * cc
+        x = p[9] * x - p[10]
+        R_i = x / (1 - numpy.exp(-p[11] * x))
+    return R_e, R_i
+
+
+@njit(inline="always", error_model="numpy")
+def _dS(S_e, S_i, R_e, R_i, p):
+    # The derivatives of the synaptic gating variables S_e, S_i; the rates have no dynamics
+    return - (S_e / p[4]) + (1.0 - S_e) * R_e * p[3], - (S_i / p[13]) + R_i * p[12]
+
+
+@njit(inline="always", error_model="numpy")
+def _bound_and_clamp(x, lo, hi, clamped, clamp_value):
+    # Boundaries are NaN for unbounded state variables, for which both comparisons are False
+    if clamped:
+        return clamp_value
+    if x < lo:
+        return lo
+    if x > hi:
+        return hi
+    return x
+
+
+def _heun_step(X, c, local_coupling, stimulus, noise, dt, P, lo, hi, clamped, clamp_values, X_next):
+    """Fused Heun step (deterministic if noise is zero) of the model,
+       including the update of its rates and the bounding and clamping of the intermediate and the new state,
+       in one pass over nodes and modes, writing into X_next. Like the dfun, it updates the rates of X in place.
+       P are the parameters in the order of NUMBA_PARAMETERS, as (broadcast) arrays of shape (nodes, modes)."""
+    n_svar, n_node, n_mode = X.shape
+    for i_node in prange(n_node):
+        for i_mode in range(n_mode):
+            p = _node_parameters(P, i_node, i_mode)
+            c0 = c[0, i_node, i_mode]
+            S_e = X[0, i_node, i_mode]
+            S_i = X[1, i_node, i_mode]
+            R_e, R_i = _rates(S_e, S_i, X[2, i_node, i_mode], X[3, i_node, i_mode], c0 + local_coupling * S_e, p)
+            X[2, i_node, i_mode] = R_e
+            X[3, i_node, i_mode] = R_i
+            dS_e, dS_i = _dS(S_e, S_i, R_e, R_i, p)
+            # Noise and stimulus increments:
+            n_S_e = noise[0, i_node, i_mode] + dt * stimulus[0, i_node, i_mode]
+            n_S_i = noise[1, i_node, i_mode] + dt * stimulus[1, i_node, i_mode]
+            n_R_e = noise[2, i_node, i_mode] + dt * stimulus[2, i_node, i_mode]
+            n_R_i = noise[3, i_node, i_mode] + dt * stimulus[3, i_node, i_mode]
+            # Predictor:
+            iS_e = _bound_and_clamp(S_e + dt * dS_e + n_S_e, lo[0], hi[0], clamped[0], clamp_values[0, i_node, i_mode])
+            iS_i = _bound_and_clamp(S_i + dt * dS_i + n_S_i, lo[1], hi[1], clamped[1], clamp_values[1, i_node, i_mode])
+            iR_e = _bound_and_clamp(R_e + n_R_e, lo[2], hi[2], clamped[2], clamp_values[2, i_node, i_mode])
+            iR_i = _bound_and_clamp(R_i + n_R_i, lo[3], hi[3], clamped[3], clamp_values[3, i_node, i_mode])
+            iR_e, iR_i = _rates(iS_e, iS_i, iR_e, iR_i, c0 + local_coupling * iS_e, p)
+            idS_e, idS_i = _dS(iS_e, iS_i, iR_e, iR_i, p)
+            # Corrector:
+            X_next[0, i_node, i_mode] = _bound_and_clamp(S_e + (dS_e + idS_e) * dt / 2.0 + n_S_e,
+                                                         lo[0], hi[0], clamped[0], clamp_values[0, i_node, i_mode])
+            X_next[1, i_node, i_mode] = _bound_and_clamp(S_i + (dS_i + idS_i) * dt / 2.0 + n_S_i,
+                                                         lo[1], hi[1], clamped[1], clamp_values[1, i_node, i_mode])
+            X_next[2, i_node, i_mode] = _bound_and_clamp(R_e + n_R_e,
+                                                         lo[2], hi[2], clamped[2], clamp_values[2, i_node, i_mode])
+            X_next[3, i_node, i_mode] = _bound_and_clamp(R_i + n_R_i,
+                                                         lo[3], hi[3], clamped[3], clamp_values[3, i_node, i_mode])
+
+
+def _update_state(X, c, local_coupling, P, lo, hi, clamped, clamp_values):
+    """Fused update of the rates of state X, and bounding and clamping of X, in place."""
+    n_svar, n_node, n_mode = X.shape
+    for i_node in prange(n_node):
+        for i_mode in range(n_mode):
+            R_e, R_i = _rates(X[0, i_node, i_mode], X[1, i_node, i_mode], X[2, i_node, i_mode], X[3, i_node, i_mode],
+                              c[0, i_node, i_mode] + local_coupling * X[0, i_node, i_mode],
+                              _node_parameters(P, i_node, i_mode))
+            X[2, i_node, i_mode] = R_e
+            X[3, i_node, i_mode] = R_i
+            for i_svar in range(n_svar):
+                X[i_svar, i_node, i_mode] = _bound_and_clamp(X[i_svar, i_node, i_mode], lo[i_svar], hi[i_svar],
+                                                             clamped[i_svar], clamp_values[i_svar, i_node, i_mode])
+
+
+def _update_non_state_variables(X, c, local_coupling, P):
+    """Update of the rates of state X, in place."""
+    n_svar, n_node, n_mode = X.shape
+    for i_node in prange(n_node):
+        for i_mode in range(n_mode):
+            R_e, R_i = _rates(X[0, i_node, i_mode], X[1, i_node, i_mode], X[2, i_node, i_mode], X[3, i_node, i_mode],
+                              c[0, i_node, i_mode] + local_coupling * X[0, i_node, i_mode],
+                              _node_parameters(P, i_node, i_mode))
+            X[2, i_node, i_mode] = R_e
+            X[3, i_node, i_mode] = R_i
+
+
+def _dfun(X, P, dX):
+    """The derivatives of state X, given its rates."""
+    n_svar, n_node, n_mode = X.shape
+    for i_node in prange(n_node):
+        for i_mode in range(n_mode):
+            dS_e, dS_i = _dS(X[0, i_node, i_mode], X[1, i_node, i_mode], X[2, i_node, i_mode], X[3, i_node, i_mode],
+                             _node_parameters(P, i_node, i_mode))
+            dX[0, i_node, i_mode] = dS_e
+            dX[1, i_node, i_mode] = dS_i
+            dX[2, i_node, i_mode] = 0.0
+            dX[3, i_node, i_mode] = 0.0
+
+
+# Serial and parallel (over nodes) compiled kernels:
+numba_heun_step = njit(error_model="numpy")(_heun_step)
+numba_heun_step_parallel = njit(parallel=True, error_model="numpy")(_heun_step)
+numba_update_state = njit(error_model="numpy")(_update_state)
+numba_update_state_parallel = njit(parallel=True, error_model="numpy")(_update_state)
+_numba_update_non_state_variables_parallel = njit(parallel=True, error_model="numpy")(_update_non_state_variables)
+_numba_dfun_parallel = njit(parallel=True, error_model="numpy")(_dfun)
+
+
 class ReducedWongWangExcIOInhI(ModelNumbaDfun):
     r"""
     .. [WW_2006] Kong-Fatt Wong and Xiao-Jing Wang,  *A Recurrent Network
@@ -270,14 +414,22 @@ class ReducedWongWangExcIOInhI(ModelNumbaDfun):
         self.update_derived_parameters()
 
     def update_non_state_variables(self, state_variables, coupling, local_coupling=0.0, use_numba=True):
+        if use_numba and use_parallel(state_variables[0].size) and numpy.ndim(local_coupling) == 0:
+            # Parallel loop over nodes:
+            _numba_update_non_state_variables_parallel(
+                state_variables, coupling, float(local_coupling),
+                node_parameters(self, NUMBA_PARAMETERS, state_variables.shape[1:]))
+            return state_variables
         if use_numba:
-            _numba_update_non_state_variables(state_variables.reshape(state_variables.shape[:-1]).T,
-                                              coupling.reshape(coupling.shape[:-1]).T+local_coupling*state_variables[0],
-                                              self.a_e, self.b_e, self.d_e,
-                                              self.w_p, self.W_e, self.J_N, self.R_e,
-                                              self.a_i, self.b_i, self.d_i,
-                                              self.W_i, self.J_i, self.R_i,
-                                              self.G, self.lamda, self.I_o)
+            # Loop over nodes and modes, with the state variables, updated in place, as the core dimension:
+            _numba_update_non_state_variables(numpy.moveaxis(state_variables, 0, -1),
+                                              numpy.moveaxis(coupling + local_coupling * state_variables[0], 0, -1),
+                                              *[_loop_parameter(param) for param in
+                                                [self.a_e, self.b_e, self.d_e,
+                                                 self.w_p, self.W_e, self.J_N, self.R_e,
+                                                 self.a_i, self.b_i, self.d_i,
+                                                 self.W_i, self.J_i, self.R_i,
+                                                 self.G, self.lamda, self.I_o]])
             return state_variables
 
         # In this case, rates (H_e, H_i) are non-state variables,
@@ -352,6 +504,12 @@ class ReducedWongWangExcIOInhI(ModelNumbaDfun):
     def dfun(self, x, c, local_coupling=0.0, update_non_state_variables=True):
         if update_non_state_variables:
             self.update_non_state_variables(x, c, local_coupling, use_numba=True)
-        deriv = _numba_dfun(x.reshape(x.shape[:-1]).T, self.gamma_e, self.tau_e, self.gamma_i, self.tau_i)
-        return deriv.T[..., numpy.newaxis]
+        if use_parallel(x[0].size):
+            # Parallel loop over nodes:
+            deriv = numpy.empty_like(x)
+            _numba_dfun_parallel(x, node_parameters(self, NUMBA_PARAMETERS, x.shape[1:]), deriv)
+            return deriv
+        deriv = _numba_dfun(numpy.moveaxis(x, 0, -1), *[_loop_parameter(param) for param in
+                                                        [self.gamma_e, self.tau_e, self.gamma_i, self.tau_i]])
+        return numpy.moveaxis(deriv, -1, 0)
 
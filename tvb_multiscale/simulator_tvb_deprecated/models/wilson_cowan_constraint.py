@@ -31,8 +31,14 @@ Wilson-Cowan equations based model definition.
 
 """
 import numpy
+from numba import njit, prange
 from tvb.basic.neotraits.api import Final  #, NArray, List, Range
 from tvb.simulator.models.wilson_cowan import WilsonCowan as TVBWilsonCowan
+from tvb_multiscale.simulator_tvb_deprecated.parallel import use_parallel, node_parameters
+
+
+NUMBA_PARAMETERS = ("c_ee", "c_ie", "c_ei", "c_ii", "tau_e", "tau_i", "a_e", "b_e", "c_e", "theta_e",
+                    "a_i", "b_i", "c_i", "theta_i", "r_e", "r_i", "k_e", "k_i", "P", "Q", "alpha_e", "alpha_i")
 
 
 class WilsonCowan(TVBWilsonCowan):
@@ -165,3 +171,37 @@ class WilsonCowan(TVBWilsonCowan):
         parameters, it is used as a mechanism for bounding random inital
         conditions when the simulation isn't started from an explicit history,
         it is also provides the default range of phase-plane plots.""")
+
+    def dfun(self, state_variables, coupling, local_coupling=0.0):
+        if use_parallel(state_variables[0].size) and numpy.ndim(local_coupling) == 0:
+            # Parallel loop over nodes:
+            derivative = numpy.empty_like(state_variables)
+            _numba_dfun_wc_parallel(state_variables, coupling, float(local_coupling),
+                                    node_parameters(self, NUMBA_PARAMETERS, state_variables.shape[1:]), derivative)
+            return derivative
+        return super(WilsonCowan, self).dfun(state_variables, coupling, local_coupling)
+
+
+@njit(parallel=True, error_model="numpy")
+def _numba_dfun_wc_parallel(state_variables, coupling, local_coupling, P, derivative):
+    """Parallel over nodes model equations, for parameters P in the order of NUMBA_PARAMETERS,
+       as (broadcast) arrays of shape (nodes, modes)."""
+    c_ee, c_ie, c_ei, c_ii, tau_e, tau_i, a_e, b_e, c_e, theta_e, \
+        a_i, b_i, c_i, theta_i, r_e, r_i, k_e, k_i, P_e, Q, alpha_e, alpha_i = P
+    n_svar, n_node, n_mode = state_variables.shape
+    for i_node in prange(n_node):
+        for i_mode in range(n_mode):
+            E = state_variables[0, i_node, i_mode]
+            I = state_variables[1, i_node, i_mode]
+            # short-range (local) coupling
+            lc = local_coupling * (E + I)
+            x_e = alpha_e[i_node, i_mode] * (c_ee[i_node, i_mode] * E - c_ei[i_node, i_mode] * I + P_e[i_node, i_mode]
+                                             - theta_e[i_node, i_mode] + coupling[0, i_node, i_mode] + lc)
+            x_i = alpha_i[i_node, i_mode] * (c_ie[i_node, i_mode] * E - c_ii[i_node, i_mode] * I + Q[i_node, i_mode]
+                                             - theta_i[i_node, i_mode] + lc)
+            s_e = c_e[i_node, i_mode] / (1.0 + numpy.exp(-a_e[i_node, i_mode] * (x_e - b_e[i_node, i_mode])))
+            s_i = c_i[i_node, i_mode] / (1.0 + numpy.exp(-a_i[i_node, i_mode] * (x_i - b_i[i_node, i_mode])))
+            derivative[0, i_node, i_mode] = \
+                (-E + (k_e[i_node, i_mode] - r_e[i_node, i_mode] * E) * s_e) / tau_e[i_node, i_mode]
+            derivative[1, i_node, i_mode] = \
+                (-I + (k_i[i_node, i_mode] - r_i[i_node, i_mode] * I) * s_i) / tau_i[i_node, i_mode]
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+"""
+Utilities of the parallel compiled kernels of the TVB models, which use Numba's prange over nodes and modes.
+
+The number of threads is set by set_num_threads, e.g., from Config.TVB_NUM_THREADS, if not None, by the Simulator.
+The parallel kernels are used only if there is more than one thread,
+and for at least PARALLEL_MIN_SIZE nodes times modes, below which the threads' overhead outweighs the gain.
+"""
+
+import numpy
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+PARALLEL_MIN_SIZE = 512
+
+
+def set_num_threads(n_threads=None):
+    # Set the number of threads of the parallel kernels,
+    # which cannot exceed Numba's maximum number of threads (i.e., environment variable NUMBA_NUM_THREADS).
+    # All of them are used if n_threads is None.
+    if numba is None:
+        return 1
+    if n_threads is None:
+        n_threads = numba.config.NUMBA_NUM_THREADS
+    numba.set_num_threads(int(numpy.clip(n_threads, 1, numba.config.NUMBA_NUM_THREADS)))
+    return numba.get_num_threads()
+
+
+def use_parallel(size):
+    # Whether the parallel kernels should be used for size nodes times modes
+    return numba is not None and size >= PARALLEL_MIN_SIZE and numba.get_num_threads() > 1
+
+
+def node_parameter(value, shape):
+    # A view of a model parameter, broadcast to shape (nodes, modes), which follows any in place changes of it.
+    # Regional parameters of shape (nodes, ) are broadcast along the modes' axis.
+    value = numpy.asarray(value, dtype="float64")
+    if value.ndim == 1 and value.size > 1:
+        value = value[:, numpy.newaxis]
+    return numpy.broadcast_to(value, shape)
+
+
+def node_parameters(model, parameters, shape):
+    # The views of the model parameters, broadcast to shape (nodes, modes), as a tuple for the compiled kernels
+    return tuple([node_parameter(getattr(model, parameter), shape) for parameter in parameters])
@@ -41,18 +41,25 @@ simulation and the method for running the simulation.
 import sys
 import time
 import math
+from concurrent.futures import ThreadPoolExecutor
 import numpy
-from tvb.basic.neotraits.api import Attr, List
+import scipy.sparse
+from tvb.basic.neotraits.api import Attr, Float, List
 from tvb.datatypes import connectivity
 from tvb.simulator import models
 from tvb.simulator import monitors
 from tvb.simulator import integrators
-from tvb.simulator.common import numpy_add_at
 from tvb.simulator.history import SparseHistory
 from tvb.simulator.simulator import Simulator as SimulatorTVB
 from tvb_multiscale.config import CONFIGURED
-from tvb_multiscale.simulator_tvb.models.reduced_wong_wang_exc_io_inh_i import ReducedWongWangExcIOInhI
+from tvb_multiscale.simulator_tvb_deprecated.models.reduced_wong_wang_exc_io_inh_i import ReducedWongWangExcIOInhI
+from tvb_multiscale.simulator_tvb_deprecated.streaming import ChunkedMonitorsReader
+from tvb_multiscale.simulator_tvb_deprecated.checkpoint import write_checkpoint, read_checkpoint
+from tvb_multiscale.simulator_tvb_deprecated.coupling_kernels import build_delayed_coupling_kernel
+from tvb_multiscale.simulator_tvb_deprecated.integration_kernels import build_integration_kernel
+from tvb_multiscale.simulator_tvb_deprecated.parallel import set_num_threads
 from tvb_scripts.utils.log_error_utils import initialize_logger, raise_value_error
+from tvb_scripts.utils.timing_utils import PhaseTimer, NullPhaseTimer
 
 
 LOG = initialize_logger(__name__)
@@ -63,6 +70,26 @@ class Simulator(SimulatorTVB):
     tvb_spikeNet_interface = None
     configure_spiking_simulator = None
     run_spiking_simulator = None
+    cleanup_spiking_simulator = None
+    synchronization_n_step = 1
+    # An optional OnlineSpikesRates instance, updated after every run of the Spiking Network
+    online_spikes_rates = None
+    checkpoint_n_step = 0
+    # The coupling of the next time step, if the co-simulation is resumed from a checkpoint
+    _checkpoint_node_coupling = None
+    # A PhaseTimer of the co-simulation loop phases, if profile_phases is True
+    phase_timer = None
+    # A DelayedCouplingKernel, if fused_coupling is True and the coupling function is supported
+    coupling_kernel = None
+    integration_kernel = None
+    # Maximum number of (nodes x modes x time points) of a chunk of the vectorized history initialization
+    history_chunk_size = 2 ** 16
+    _region_averaging_matrix = None
+    _phases = ["spikeNet_to_tvb_parameter", "buffer_tvb_state", "integration", "nan_check",
+               "tvb_to_spikeNet", "spiking_run", "spikeNet_read", "spiking_wait", "spikeNet_to_tvb_state",
+               "coupling", "stimulus", "update_state", "history", "monitors"]
+    # Attributes of TVB monitors that hold their state across time steps
+    _monitors_state_attributes = ["_stock", "_interim_stock", "_state", "_last_step"]
 
     model = Attr(
         field_type=models.Model,
@@ -110,6 +137,76 @@ class Simulator(SimulatorTVB):
         connections. These couplings undergo a time delay via signal propagation
         with a propagation speed of ``Conduction Speed``""")
 
+    synchronization_time = Float(
+        label="Synchronization time (ms)",
+        default=0.0,
+        required=True,
+        doc="""The time window (ms) of synchronization between TVB and the Spiking Network.
+        TVB is integrated for a whole window, before its state is transmitted to the Spiking Network
+        as one time-indexed batch, and the Spiking Network is run once for the same window.
+        If it is not larger than the integration time step, synchronization takes place at every time step.
+        It is bounded by the minimum delay of the connections among TVB and Spiking Network nodes,
+        which is used if it is set to numpy.inf.""")
+
+    pipelined = Attr(
+        field_type=bool,
+        label="Pipelined co-simulation",
+        default=False,
+        required=True,
+        doc="""If True, the Spiking Network is run for a synchronization window in a worker thread,
+        while TVB integrates the next window. The Spiking Network output of a window is then written
+        only to the history of the coupling variables of the spiking nodes, at the end of the next window.
+        For causality, the synchronization window is bounded by half the minimum delay
+        of the connections among TVB and Spiking Network nodes. Co-simulations with Spiking Network -> TVB
+        interfaces to model parameters, or to state variables that are not coupling variables, are not pipelined.
+        Both simulators overlap in time as long as the Spiking Network simulator releases Python's GIL while running.""")
+
+    profile_phases = Attr(
+        field_type=bool,
+        label="Profile co-simulation phases",
+        default=False,
+        required=True,
+        doc="""If True, the wall time of every phase of the co-simulation loop is accumulated in phase_timer,
+        e.g., TVB integration, coupling, history and monitors, TVB - Spiking Network transfers
+        and the Spiking Network run. See phase_timer.report().""")
+
+    fused_coupling = Attr(
+        field_type=bool,
+        label="Fused compiled coupling",
+        default=False,
+        required=True,
+        doc="""If True, and Numba is available, the delayed node coupling is computed by a compiled kernel,
+        parallel over regions, that reads the history buffer directly, for Linear, Scaling and Sigmoidal
+        coupling functions with global parameters and no surface. The history update and the coupling
+        of the next time step are then computed in the same call.
+        Otherwise, TVB's coupling and history are used.""")
+
+    fused_integration = Attr(
+        field_type=bool,
+        label="Fused compiled integration",
+        default=False,
+        required=True,
+        doc="""If True, and the model and the integrator are supported (e.g., ReducedWongWangExcIOInhI and
+        HeunDeterministic or HeunStochastic), every integration step, including the update of the model's
+        non-state variables and the bounding and clamping of the state, is computed by a compiled kernel,
+        in one pass over regions, into preallocated buffers. There should be no surface.
+        Otherwise, the integrator's scheme and the model's dfun are used.""")
+
+    checkpoint_period = Float(
+        label="Checkpoint period (ms)",
+        default=0.0,
+        required=True,
+        doc="""The period (ms) of writing a checkpoint of the co-simulation to checkpoint_path,
+        so that it can be resumed later with load_checkpoint. It is rounded up to a whole number of
+        synchronization windows. If it is 0.0, no checkpoints are written.""")
+
+    checkpoint_path = Attr(
+        field_type=str,
+        label="Checkpoint file path",
+        default="checkpoint.pkl",
+        required=True,
+        doc="""The path of the file that the latest checkpoint is written to.""")
+
     @property
     def config(self):
         try:
@@ -150,18 +247,62 @@ class Simulator(SimulatorTVB):
             # ...use the integrator's clamp_state
             self.integrator.clamp_state(state)
 
+    def _update_non_state_variables_of_history(self, history):
+        # Update any non-state variables of the history (time, state variables, nodes, modes) with no coupling,
+        # vectorized over chunks of time points, which are passed to the model as extra modes:
+        n_time, n_svar, n_node, n_mode = history.shape
+        n_chunk = int(max(1, self.history_chunk_size // (n_node * n_mode)))
+        for i_time in range(0, n_time, n_chunk):
+            chunk = history[i_time:i_time + n_chunk]
+            n_chunk_time = chunk.shape[0]
+            # (time, state variables, nodes, modes) -> (state variables, nodes, time * modes):
+            state = numpy.ascontiguousarray(chunk.transpose((1, 2, 0, 3))).reshape((n_svar, n_node, -1))
+            self.model.update_non_state_variables(state, numpy.zeros((len(self.model.cvar),) + state.shape[1:]), 0.0)
+            chunk[:] = state.reshape((n_svar, n_node, n_chunk_time, n_mode)).transpose((2, 0, 1, 3))
+
     def _update_and_bound_history(self, history):
-        self.bound_and_clamp(history)
+        # history is of shape (time, state variables, nodes, modes)
+        self.bound_and_clamp(numpy.swapaxes(history, 0, 1))
         # If there are non-state variables, they need to be updated for history:
-        try:
-            # Assuming that node_coupling can have a maximum number of dimensions equal to the state variables,
-            # in the extreme case where all state variables are cvars as well, we set:
-            node_coupling = numpy.zeros((history.shape[0], 1, history.shape[2], 1))
-            for i_time in range(history.shape[1]):
-                self.model.update_non_state_variables(history[:, i_time], node_coupling[:, 0], 0.0)
-            self.bound_and_clamp(history)
-        except:
-            pass
+        if hasattr(self.model, "update_non_state_variables"):
+            self._update_non_state_variables_of_history(history)
+            self.bound_and_clamp(numpy.swapaxes(history, 0, 1))
+
+    def _initial_coupling_history(self, n_time, n_node, n_mode, rng):
+        # Generate a (time, coupling variables, nodes, modes) history, as model.initial() does for all state variables,
+        # i.e., uniformly distributed within the state variables' ranges, and bounded and clamped as the state is:
+        cvar = list(self.model.cvar)
+        history = numpy.empty((n_time, len(cvar), n_node, n_mode))
+        for i_cvar, i_svar in enumerate(cvar):
+            lo, hi = self.model.state_variable_range[self.model.state_variables[i_svar]]
+            history[:, i_cvar] = rng.uniform(low=lo, high=hi, size=(n_time, n_node, n_mode))
+        if self.integrator.state_variable_boundaries is not None:
+            for i_svar, (lo, hi) in zip(self.integrator.bounded_state_variable_indices,
+                                        self.integrator.state_variable_boundaries):
+                if i_svar in cvar:
+                    # NaN stands for a one-sided boundary:
+                    numpy.clip(history[:, cvar.index(i_svar)],
+                               None if numpy.isnan(lo) else lo, None if numpy.isnan(hi) else hi,
+                               out=history[:, cvar.index(i_svar)])
+        if self.integrator.clamped_state_variable_values is not None:
+            for i_svar, value in zip(self.integrator.clamped_state_variable_indices,
+                                     self.integrator.clamped_state_variable_values):
+                if i_svar in cvar:
+                    history[:, cvar.index(i_svar)] = value
+        return history
+
+    def _region_average(self, history):
+        # Average a (time, variables, surface nodes, modes) history to regions,
+        # with a precomputed sparse (regions x surface nodes) averaging matrix
+        if self._region_averaging_matrix is None:
+            n_reg = self.connectivity.number_of_regions
+            n_node = self._regmap.shape[0]
+            self._region_averaging_matrix = \
+                scipy.sparse.csr_matrix((1.0 / numpy.bincount(self._regmap)[self._regmap],
+                                         (self._regmap, numpy.arange(n_node))), shape=(n_reg, n_node))
+        n_time, n_var, n_node, n_mode = history.shape
+        region_history = self._region_averaging_matrix.dot(history.transpose((2, 0, 1, 3)).reshape((n_node, -1)))
+        return region_history.reshape((-1, n_time, n_var, n_mode)).transpose((1, 2, 0, 3))
 
     def _configure_history(self, initial_conditions):
         """
@@ -173,7 +314,8 @@ class Simulator(SimulatorTVB):
         to have dimensions 1, 2, and 3 with shapse corresponding to the number
         of state_variables, nodes and modes, respectively. If the provided
         inital_conditions are shorter in time (dim=0) than the required history
-        the model's initial() method is called to make up the difference.
+        the coupling variables are drawn as in model's initial() method to make up
+        the difference. Only the coupling variables are kept in history.
 
         """
         rng = numpy.random
@@ -182,10 +324,12 @@ class Simulator(SimulatorTVB):
         # Default initial conditions
         if initial_conditions is None:
             n_time, n_svar, n_node, n_mode = self.good_history_shape
-            LOG.info('Preparing initial history of shape %r using model.initial()', self.good_history_shape)
             if self.surface is not None:
                 n_node = self.number_of_nodes
-            history = self.model.initial(self.integrator.dt, (n_time, n_svar, n_node, n_mode), rng)
+            # Only the initial state needs all state variables,
+            # the rest of the history is padded with the coupling variables below:
+            LOG.info('Preparing initial state of shape %r using model.initial()', (n_svar, n_node, n_mode))
+            initial_conditions = self.model.initial(self.integrator.dt, (1, n_svar, n_node, n_mode), rng)
         # ICs provided
         else:
             # history should be [timepoints, state_variables, nodes, modes]
@@ -197,34 +341,36 @@ class Simulator(SimulatorTVB):
                 return self._configure_history(initial_conditions)
             elif ic_shape[1:] != self.good_history_shape[1:]:
                 raise_value_error("Incorrect history sample shape %s, expected %s"
-                                  % ic_shape[1:], self.good_history_shape[1:])
-            else:
-                if ic_shape[0] >= self.horizon:
-                    LOG.debug("Using last %d time-steps for history.", self.horizon)
-                    history = initial_conditions[-self.horizon:, :, :, :].copy()
-                else:
-                    LOG.debug('Padding initial conditions with model.initial')
-                    history = self.model.initial(self.integrator.dt, self.good_history_shape, rng)
-                    shift = self.current_step % self.horizon
-                    history = numpy.roll(history, -shift, axis=0)
-                    history[:ic_shape[0], :, :, :] = initial_conditions
-                    history = numpy.roll(history, shift, axis=0)
-                self.current_step += ic_shape[0] - 1
-        # Make sure that history values are bounded,
-        # and any possible non-state variables are initialized
-        # based on state variable ones (but with no coupling yet...)
-        self._update_and_bound_history(numpy.swapaxes(history, 0, 1))
+                                  % (ic_shape[1:], self.good_history_shape[1:]))
+        n_time, n_svar, n_node, n_mode = ic_shape = initial_conditions.shape
+        if n_time >= self.horizon:
+            LOG.debug("Using last %d time-steps for history.", self.horizon)
+            history = initial_conditions[-self.horizon:, :, :, :].copy()
+            # Make sure that history values are bounded,
+            # and any possible non-state variables are initialized
+            # based on state variable ones (but with no coupling yet...)
+            self._update_and_bound_history(history)
+            self.current_step += ic_shape[0] - 1
+            # create initial state from history
+            self.current_state = history[self.current_step % self.horizon].copy()
+            # Only the coupling variables are kept in history:
+            history = history[:, self.model.cvar]
+        else:
+            LOG.debug('Padding initial conditions with the coupling variables of model.initial')
+            initial_conditions = initial_conditions.copy()
+            self._update_and_bound_history(initial_conditions)
+            history = self._initial_coupling_history(self.horizon, n_node, n_mode, rng)
+            # Place the initial conditions at the ring buffer positions following the current step,
+            # instead of rolling the whole history there and back:
+            shift = self.current_step % self.horizon
+            history[(numpy.arange(ic_shape[0]) + shift) % self.horizon] = initial_conditions[:, self.model.cvar]
+            self.current_step += ic_shape[0] - 1
+            # create initial state from the last initial conditions
+            self.current_state = initial_conditions[-1].copy()
         LOG.info('Final initial history shape is %r', history.shape)
-        # create initial state from history
-        self.current_state = history[self.current_step % self.horizon].copy()
         LOG.debug('initial state has shape %r' % (self.current_state.shape, ))
         if self.surface is not None and history.shape[2] > self.connectivity.number_of_regions:
-            n_reg = self.connectivity.number_of_regions
-            (nt, ns, _, nm), ax = history.shape, (2, 0, 1, 3)
-            region_history = numpy.zeros((nt, ns, n_reg, nm))
-            numpy_add_at(region_history.transpose(ax), self._regmap, history.transpose(ax))
-            region_history /= numpy.bincount(self._regmap).reshape((-1, 1))
-            history = region_history
+            history = self._region_average(history)
         # create history query implementation
         self.history = SparseHistory(
             self.connectivity.weights,
@@ -234,6 +380,84 @@ class Simulator(SimulatorTVB):
         )
         # initialize its buffer
         self.history.initialize(history)
+        self._configure_coupling_kernel()
+
+    def _configure_coupling_kernel(self):
+        self.coupling_kernel = None
+        if self.fused_coupling and self.surface is None:
+            self.coupling_kernel = build_delayed_coupling_kernel(self.history, self.coupling)
+            if self.coupling_kernel is None:
+                LOG.info("Coupling function %s is computed by TVB, not by a compiled kernel!"
+                         % self.coupling.__class__.__name__)
+
+    def _configure_integration_kernel(self):
+        self.integration_kernel = None
+        if self.fused_integration and self.surface is None:
+            self.integration_kernel = \
+                build_integration_kernel(self.integrator, self.model, self.current_state.shape)
+            if self.integration_kernel is None:
+                LOG.info("Model %s is integrated by %s, not by a compiled kernel!"
+                         % (self.model.__class__.__name__, self.integrator.__class__.__name__))
+
+    def _loop_integrate(self, state, node_coupling, local_coupling, stimulus):
+        if self.integration_kernel is not None:
+            return self.integration_kernel.scheme(state, node_coupling, local_coupling, stimulus)
+        return self.integrator.scheme(state, self.model.dfun, node_coupling, local_coupling, stimulus)
+
+    def _loop_compute_node_coupling(self, step):
+        if self.coupling_kernel is not None:
+            return self.coupling_kernel(step)
+        return super(Simulator, self)._loop_compute_node_coupling(step)
+
+    def _configure_synchronization_time(self):
+        # The synchronization window cannot exceed the minimum delay (in integration steps)
+        # of the connections from or to Spiking Network nodes,
+        # so that nothing exchanged within a window is needed before the window ends:
+        spiking_nodes = numpy.zeros((self.connectivity.number_of_regions, ), dtype="bool")
+        spiking_nodes[self.tvb_spikeNet_interface.spiking_nodes_ids] = True
+        connections = numpy.logical_and(self.connectivity.weights != 0.0,
+                                        numpy.logical_or(spiking_nodes[:, None], spiking_nodes[None, :]))
+        if numpy.any(connections):
+            max_n_step = self.connectivity.idelays[connections].min()
+        else:
+            max_n_step = self.horizon
+        interface = self.tvb_spikeNet_interface
+        if self.pipelined and \
+                (len(interface.spikeNet_to_tvb_params_interfaces_ids) > 0 or
+                 numpy.any([interface.spikeNet_to_tvb_interfaces[interface_id].tvb_sv_id not in self.model.cvar
+                            for interface_id in interface.spikeNet_to_tvb_sv_interfaces_ids])):
+            LOG.warning("Pipelined co-simulation writes the Spiking Network output "
+                        "only to the history of TVB coupling variables!\n"
+                        "Setting pipelined = False, because there are Spiking Network -> TVB interfaces "
+                        "to TVB model parameters or to other state variables.")
+            self.pipelined = False
+        if self.pipelined:
+            # The Spiking Network output of a window is written to the history at the end of the next window:
+            max_n_step = int(max_n_step / 2)
+            if max_n_step < 1:
+                LOG.warning("The minimum TVB - Spiking Network delay is too short for pipelined co-simulation!\n"
+                            "Setting pipelined = False.")
+                self.pipelined = False
+                max_n_step = 1
+        n_step = self.synchronization_time / self.integrator.dt
+        if n_step > max_n_step:
+            if not numpy.isinf(n_step):
+                LOG.warning("Synchronization time %f is larger than the minimum TVB - Spiking Network delay %f!\n"
+                            "Setting it equal to the latter."
+                            % (self.synchronization_time, max_n_step * self.integrator.dt))
+            n_step = max_n_step
+        self.synchronization_n_step = int(numpy.maximum(1, numpy.round(n_step)))
+        self.synchronization_time = self.synchronization_n_step * self.integrator.dt
+        LOG.info("TVB and Spiking Network synchronize every %d integration steps." % self.synchronization_n_step)
+
+    def _configure_checkpoints(self):
+        # Checkpoints are written only at the end of synchronization windows
+        if self.checkpoint_period > 0.0:
+            n_windows = numpy.ceil(self.checkpoint_period / self.synchronization_time)
+            self.checkpoint_n_step = int(numpy.maximum(1, n_windows)) * self.synchronization_n_step
+            self.checkpoint_period = self.checkpoint_n_step * self.integrator.dt
+        else:
+            self.checkpoint_n_step = 0
 
     def configure(self, tvb_spikeNet_interface, full_configure=True):
         """Configure simulator and its components.
@@ -300,6 +524,8 @@ class Simulator(SimulatorTVB):
         self._configure_monitors()
 
         # TODO: find out why the model instance is different in simulator and interface...
+        # The Spiking Network output is read per TVB time step:
+        self.tvb_spikeNet_interface.dt = self.integrator.dt
         self.tvb_spikeNet_interface.configure(self.model)
 
         dummy = -numpy.ones((self.connectivity.number_of_regions, ))
@@ -308,9 +534,10 @@ class Simulator(SimulatorTVB):
         for param in self.tvb_spikeNet_interface.spikeNet_to_tvb_params:
             setattr(self.model, param, dummy)
 
-        # Setup Spiking Simulator configure() and Run() method
+        # Setup Spiking Simulator configure(), Run() and Cleanup() method
         self.configure_spiking_simulator = self.tvb_spikeNet_interface.spiking_network.configure
         self.run_spiking_simulator = self.tvb_spikeNet_interface.spiking_network.Run
+        self.cleanup_spiking_simulator = self.tvb_spikeNet_interface.spiking_network.Cleanup
 
         # If there are Spiking nodes and are represented exclusively in Spiking Network...
         if self.tvb_spikeNet_interface.exclusive_nodes and len(self.tvb_spikeNet_interface.spiking_nodes_ids) > 0:
@@ -318,20 +545,89 @@ class Simulator(SimulatorTVB):
             self.connectivity.weights[self.tvb_spikeNet_interface.spiking_nodes_ids] \
                 [:, self.tvb_spikeNet_interface.spiking_nodes_ids] = 0.0
 
+        self._configure_synchronization_time()
+        self._configure_checkpoints()
+        if self.profile_phases:
+            self.phase_timer = PhaseTimer(self._phases)
+        else:
+            self.phase_timer = NullPhaseTimer()
+        if self.online_spikes_rates is not None:
+            self.online_spikes_rates.configure(self.synchronization_time)
+
+        # Threads of the parallel compiled kernels, if configured, otherwise Numba's current setting is kept:
+        if CONFIGURED.TVB_NUM_THREADS is not None:
+            LOG.info("TVB compiled kernels run with %d threads." % set_num_threads(CONFIGURED.TVB_NUM_THREADS))
+
         # Setup history
         # TODO: Reflect upon the idea to allow SpikeNet initialization and history setting via TVB
         self._configure_history(self.initial_conditions)
+        self._configure_integration_kernel()
 
+        # Multiple modes, e.g., batches of model parameters (see batch.py), are supported only on the TVB side,
+        # i.e., for regions not coupled to the Spiking Network.
         # TODO: Shall we implement a parallel implentation for multiple modes for SpikeNet as well?!
-        if self.current_state.shape[2] > 1:
-            raise_value_error("Multiple modes' simulation not supported for TVB multiscale simulations!\n"
-                              "Current modes number is %d." % self.initial_conditions.shape[3])
+        if self.current_state.shape[2] > 1 and len(self.tvb_spikeNet_interface.spiking_nodes_ids) > 0:
+            raise_value_error("Multiple modes' simulation not supported for TVB multiscale simulations "
+                              "with Spiking Network nodes!\n"
+                              "Current modes number is %d." % self.current_state.shape[2])
 
         # Estimate of memory usage.
         self._census_memory_requirement()
 
         return self
 
+    def get_checkpoint(self, step=None, state=None, node_coupling=None):
+        """
+        Return a checkpoint of the co-simulation at the end of time step step, with TVB state state,
+        and, within a simulation, the already computed coupling node_coupling of the next time step:
+        TVB state, history, random state and monitors, the interface exchange buffers,
+        and the state of the Spiking Network.
+        """
+        if step is None:
+            step = self.current_step
+            state = self.current_state
+        checkpoint = {"current_step": step,
+                      "current_state": state.copy(),
+                      "history": self.history.buffer.copy(),
+                      "monitors": [dict([(attr, numpy.copy(getattr(monitor, attr)))
+                                         for attr in self._monitors_state_attributes if hasattr(monitor, attr)])
+                                   for monitor in self.monitors]}
+        if node_coupling is not None:
+            checkpoint["node_coupling"] = node_coupling.copy()
+        if isinstance(self.integrator, integrators.IntegratorStochastic):
+            checkpoint["random_state"] = self.integrator.noise.random_stream.get_state()
+        checkpoint["tvb_spikeNet_interface"] = self.tvb_spikeNet_interface.get_state()
+        checkpoint["spiking_network"] = self.tvb_spikeNet_interface.spiking_network.get_state()
+        return checkpoint
+
+    def save_checkpoint(self, path=None, step=None, state=None, node_coupling=None):
+        if path is None:
+            path = self.checkpoint_path
+        write_checkpoint(path, self.get_checkpoint(step, state, node_coupling))
+
+    def load_checkpoint(self, path=None):
+        """
+        Resume from a checkpoint, after the simulator has been configured, and before it is run.
+        The Spiking Network should be newly built, and not run yet. Its neurons' state, its time
+        and its devices' recordings are restored, but the spikes in transit at the time of the checkpoint are lost.
+        """
+        if path is None:
+            path = self.checkpoint_path
+        checkpoint = read_checkpoint(path)
+        self.current_step = checkpoint["current_step"]
+        self.current_state = checkpoint["current_state"]
+        self._checkpoint_node_coupling = checkpoint.get("node_coupling", None)
+        self.history.buffer[:] = checkpoint["history"]
+        for monitor, monitor_state in zip(self.monitors, checkpoint["monitors"]):
+            for attr, value in monitor_state.items():
+                setattr(monitor, attr, value)
+        if "random_state" in checkpoint:
+            self.integrator.noise.random_stream.set_state(checkpoint["random_state"])
+        # The devices' recordings are restored first, before the interface's event cursors are rebased to them:
+        self.tvb_spikeNet_interface.spiking_network.set_state(checkpoint["spiking_network"])
+        self.tvb_spikeNet_interface.set_state(checkpoint["tvb_spikeNet_interface"])
+        return checkpoint
+
     # TODO: update all those functions below to compute the fine scale requirements as well, ...if you can! :)
 
     # used by simulator adaptor
@@ -364,6 +660,9 @@ class Simulator(SimulatorTVB):
         return super(Simulator, self).storage_requirement(simulation_length)
 
     def update_state(self, state, node_coupling, local_coupling=0.0):
+        if self.integration_kernel is not None:
+            self.integration_kernel.update_state(state, node_coupling, local_coupling)
+            return
         # If there are non-state variables, they need to be updated for the initial condition:
         try:
             self.model.update_non_state_variables(state, node_coupling, local_coupling)
@@ -372,12 +671,61 @@ class Simulator(SimulatorTVB):
             # If not, the kwarg will fail and nothing will happen
             pass
 
+    def _spikeNet_state_to_history(self, step, n_steps, i_values, exclude_last=True):
+        # Write the Spiking Network output of a synchronization window of n_steps time steps ending at step
+        # to the history slots of the coupling variables of the spiking nodes,
+        # excluding the last time step, if the TVB state of that one is updated with the Spiking Network output.
+        # These slots are not read yet, since the window does not exceed the minimum delay from the spiking nodes
+        # (or half of it, for pipelined co-simulation, which writes the history at the end of the next window).
+        n_history_steps = n_steps - 1 if exclude_last else n_steps
+        if n_history_steps < 1:
+            return
+        cvars = list(self.model.cvar)
+        slots = numpy.arange(step - n_steps + 1, step - n_steps + 1 + n_history_steps) % self.history.n_time
+        for sv_id, nodes_ids, values in self.tvb_spikeNet_interface.spikeNet_state_window(i_values, n_steps):
+            if sv_id not in cvars:
+                continue
+            window = numpy.zeros((self.model.nvar, n_history_steps, len(nodes_ids)))
+            window[sv_id] = values[:n_history_steps]
+            if self.integrator.state_variable_boundaries is not None:
+                self.integrator.bound_state(window)
+            self.history.buffer[slots[:, None], cvars.index(sv_id), nodes_ids[None, :], 0] = window[sv_id]
+
+    def _run_spiking_window(self, i_buffer, n_steps, stimulus):
+        timer = self.phase_timer
+        t = timer.tic()
+        # TVB state -> SpikeNet (state or parameter)
+        # Communicate TVB state to some SpikeNet device (TVB proxy) or TVB coupling to SpikeNet nodes,
+        # including any necessary conversions from TVB state to SpikeNet variables,
+        # in a model specific manner,
+        # as one time-indexed batch for the whole synchronization window
+        self.tvb_spikeNet_interface.tvb_buffer_to_spikeNet(i_buffer, n_steps, stimulus, self.model)
+        t = timer.lap("tvb_to_spikeNet", t)
+        # Integrate Spiking Network to get the new Spiking Network state
+        self.run_spiking_simulator(n_steps * self.integrator.dt)
+        t = timer.lap("spiking_run", t)
+        if self.online_spikes_rates is not None:
+            # Count the new spikes for the online rates' estimation
+            self.online_spikes_rates.update(n_steps * self.integrator.dt)
+        # Read the new Spiking Network state to be communicated to TVB
+        i_values = self.tvb_spikeNet_interface.read_spikeNet_values(i_buffer, n_steps)
+        timer.lap("spikeNet_read", t)
+        return i_values
+
     def __call__(self, simulation_length=None, random_state=None):
         """
         Return an iterator which steps through simulation time, generating monitor outputs.
 
         See the run method for a convenient way to collect all output in one call.
 
+        TVB and the Spiking Network are synchronized every synchronization_n_step integration steps:
+        TVB is integrated for a whole synchronization window first,
+        and then the Spiking Network is run once for the same window,
+        receiving the buffered TVB state as one time-indexed batch.
+        If pipelined, the Spiking Network runs a window in a worker thread,
+        while TVB integrates the next window, at the end of which the Spiking Network output
+        is written to the history of the previous window.
+
         :param simulation_length: Length of the simulation to perform in ms.
         :param random_state:  State of NumPy RNG to use for stochastic integration.
         :return: Iterator over monitor outputs.
@@ -398,72 +746,191 @@ class Simulator(SimulatorTVB):
         # Do for initial condition:
         step = self.current_step + 1  # the first step in the loop
         node_coupling = self._loop_compute_node_coupling(step)
-        self._loop_update_stimulus(step, stimulus)
+        # The coupling of the next time step, if it is computed together with the history update:
+        next_node_coupling = None if self.coupling_kernel is None else node_coupling
+        if self._checkpoint_node_coupling is None:
+            self._loop_update_stimulus(step, stimulus)
+        else:
+            # Resuming from a checkpoint, continue exactly as the checkpointed simulation would,
+            # integrating the first step with the coupling and stimulus computed at the checkpointed step:
+            node_coupling = self._checkpoint_node_coupling
+            self._checkpoint_node_coupling = None
+            self._loop_update_stimulus(self.current_step, stimulus)
         # This is not necessary in most cases
         # if update_non_state_variables=True in the model dfun by default
         self.update_state(state, node_coupling, local_coupling)
 
-        # spikeNet simulation preparation:
+        # spikeNet simulation preparation (only once per spiking simulator session):
         self.configure_spiking_simulator()
 
         # A flag to skip unnecessary steps when Spiking Simulator does NOT update TVB state
         updateTVBstateFromSpikeNet = len(self.tvb_spikeNet_interface.spikeNet_to_tvb_sv_interfaces_ids) > 0
 
+        # Buffers of TVB state and coupling, for a whole synchronization window,
+        # and of the Spiking Network output, read at the end of the window.
+        # Pipelined co-simulation alternates between two buffers:
+        interface = self.tvb_spikeNet_interface
+        n_sync = self.synchronization_n_step
+        n_buffers = 2 if self.pipelined else 1
+        if interface.tvb_state_buffers is None or interface.tvb_state_buffers.shape[:2] != (n_buffers, n_sync):
+            interface.configure_buffers(n_sync, state.shape, node_coupling.shape, n_buffers)
+            # Read the Spiking Network output before the first window:
+            interface.read_spikeNet_values(0)
+        # The first window uses the latest Spiking Network output, and fills in the next buffer:
+        i_values = interface.i_spikeNet_values_buffer
+        i_buffer = (i_values + 1) % n_buffers
+        i_sync = 0
+        spiking_window = None
+        spiking_window_step = spiking_window_n_steps = None
+        executor = ThreadPoolExecutor(max_workers=1) if self.pipelined else None
+        if self.phase_timer is None:
+            self.phase_timer = NullPhaseTimer()
+        timer = self.phase_timer
+
         # integration loop
         n_steps = int(math.ceil(self.simulation_length / self.integrator.dt))
+        last_step = self.current_step + n_steps
         tic = time.time()
         tic_ratio = 0.1
         tic_point = tic_ratio * n_steps
-        for step in range(self.current_step + 1,  self.current_step + n_steps + 1):
-            # TVB state -> SpikeNet (state or parameter)
-            # Communicate TVB state to some SpikeNet device (TVB proxy) or TVB coupling to SpikeNet nodes,
-            # including any necessary conversions from TVB state to SpikeNet variables,
-            # in a model specific manner
-            # TODO: find what is the general treatment of local coupling, if any!
-            #  Is this addition correct in all cases for all builders?
-            self.tvb_spikeNet_interface.tvb_state_to_spikeNet(state, node_coupling+local_coupling, stimulus, self.model)
-            # SpikeNet state -> TVB model parameter
-            # Couple the SpikeNet state to some TVB model parameter,
-            # including any necessary conversions in a model specific manner
-            self.model = self.tvb_spikeNet_interface.spikeNet_state_to_tvb_parameter(self.model)
-            # Integrate TVB to get the new TVB state
-            state = self.integrator.scheme(state, self.model.dfun, node_coupling, local_coupling, stimulus)
-            if numpy.any(numpy.isnan(state)) or numpy.any(numpy.isinf(state)):
-                raise ValueError("NaN or Inf values detected in simulator state!:\n%s" % str(state))
-            # Integrate Spiking Network to get the new Spiking Network state
-            self.run_spiking_simulator(self.integrator.dt)
-            if updateTVBstateFromSpikeNet:
-                # SpikeNet state -> TVB state
-                # Update the new TVB state variable with the new SpikeNet state,
-                # including any necessary conversions from SpikeNet variables to TVB state,
-                # in a model specific manner
-                state = self.tvb_spikeNet_interface.spikeNet_state_to_tvb_state(state)
-                self.bound_and_clamp(state)
-            # Prepare coupling and stimulus for next time step
-            # and, therefore, for the new TVB state:
-            node_coupling = self._loop_compute_node_coupling(step)
-            self._loop_update_stimulus(step, stimulus)
-            # Update any non-state variables and apply any boundaries again to the new state:
-            self.update_state(state, node_coupling, local_coupling)
-            # Now direct the new state to history buffer and monitors
-            self._loop_update_history(step, n_reg, state)
-            output = self._loop_monitor_output(step, state)
-            if output is not None:
-                yield output
-            if step-self.current_step >= tic_point:
-                toc = time.time() - tic
-                if toc > 600:
-                    if toc > 7200:
-                        time_string = "%0.1f hours" % (toc / 3600)
+        try:
+            for step in range(self.current_step + 1,  last_step + 1):
+                t = timer.tic()
+                if i_sync == 0:
+                    # SpikeNet state -> TVB model parameter
+                    # Couple the SpikeNet state to some TVB model parameter,
+                    # including any necessary conversions in a model specific manner,
+                    # once per synchronization window
+                    self.model = interface.spikeNet_state_to_tvb_parameter(self.model, i_values)
+                    t = timer.lap("spikeNet_to_tvb_parameter", t)
+                # Buffer TVB state and coupling to be communicated to the Spiking Network:
+                # TODO: find what is the general treatment of local coupling, if any!
+                #  Is this addition correct in all cases for all builders?
+                interface.buffer_tvb_state(i_buffer, i_sync, state, node_coupling + local_coupling)
+                i_sync += 1
+                t = timer.lap("buffer_tvb_state", t)
+                # Integrate TVB to get the new TVB state
+                state = self._loop_integrate(state, node_coupling, local_coupling, stimulus)
+                t = timer.lap("integration", t)
+                if numpy.any(numpy.isnan(state)) or numpy.any(numpy.isinf(state)):
+                    raise ValueError("NaN or Inf values detected in simulator state!:\n%s" % str(state))
+                t = timer.lap("nan_check", t)
+                if i_sync == n_sync or step == last_step:
+                    n_window_steps = i_sync
+                    if executor is None:
+                        # Run the Spiking Network for this window
+                        i_values = self._run_spiking_window(i_buffer, i_sync, stimulus)
+                        t = timer.tic()
                     else:
-                        time_string = "%0.1f min" % (toc / 60)
+                        if spiking_window is not None:
+                            # Wait for the Spiking Network to complete the previous window...
+                            i_values = spiking_window.result()
+                            t = timer.lap("spiking_wait", t)
+                            # ...write its output to the history of the previous window...
+                            self._spikeNet_state_to_history(spiking_window_step, spiking_window_n_steps, i_values,
+                                                            exclude_last=False)
+                            t = timer.lap("spikeNet_to_tvb_state", t)
+                        # ...and run it for this window, while TVB integrates the next one
+                        spiking_window = executor.submit(self._run_spiking_window, i_buffer, i_sync, stimulus)
+                        spiking_window_step, spiking_window_n_steps = step, i_sync
+                        i_buffer = (i_buffer + 1) % n_buffers
+                    i_sync = 0
+                    if updateTVBstateFromSpikeNet and executor is None:
+                        # SpikeNet state -> TVB state
+                        # Update the new TVB state variable with the new SpikeNet state,
+                        # including any necessary conversions from SpikeNet variables to TVB state,
+                        # in a model specific manner
+                        state = interface.spikeNet_state_to_tvb_state(state, i_values)
+                        self.bound_and_clamp(state)
+                        # ...and the history of the previous time steps of the window:
+                        self._spikeNet_state_to_history(step, n_window_steps, i_values)
+                        t = timer.lap("spikeNet_to_tvb_state", t)
+                # Prepare coupling and stimulus for next time step
+                # and, therefore, for the new TVB state:
+                if next_node_coupling is None:
+                    node_coupling = self._loop_compute_node_coupling(step)
+                else:
+                    node_coupling = next_node_coupling
+                t = timer.lap("coupling", t)
+                self._loop_update_stimulus(step, stimulus)
+                t = timer.lap("stimulus", t)
+                # Update any non-state variables and apply any boundaries again to the new state:
+                self.update_state(state, node_coupling, local_coupling)
+                t = timer.lap("update_state", t)
+                # Now direct the new state to history buffer and monitors
+                if next_node_coupling is None:
+                    self._loop_update_history(step, n_reg, state)
                 else:
-                    time_string = "%0.1f sec" % toc
-                print_this = "\r...%0.1f%% done in %s" % \
-                            (100.0 * (step - self.current_step) / n_steps, time_string)
-                sys.stdout.write(print_this)
-                sys.stdout.flush()
-                tic_point += tic_ratio * n_steps
-
-        self.current_state = state
+                    # ...and compute the coupling of the next time step in the same pass:
+                    next_node_coupling = self.coupling_kernel.update_history_and_couple(step, state)
+                t = timer.lap("history", t)
+                output = self._loop_monitor_output(step, state)
+                timer.lap("monitors", t)
+                if output is not None:
+                    yield output
+                if self.checkpoint_n_step > 0 and i_sync == 0 \
+                        and (step - self.current_step) % self.checkpoint_n_step == 0:
+                    if spiking_window is not None:
+                        # The Spiking Network has to complete its window,
+                        # and its output has to be written to the history, before they are checkpointed
+                        i_values = spiking_window.result()
+                        self._spikeNet_state_to_history(spiking_window_step, spiking_window_n_steps, i_values,
+                                                        exclude_last=False)
+                        spiking_window = None
+                    self.save_checkpoint(step=step, state=state, node_coupling=node_coupling)
+                if step-self.current_step >= tic_point:
+                    toc = time.time() - tic
+                    if toc > 600:
+                        if toc > 7200:
+                            time_string = "%0.1f hours" % (toc / 3600)
+                        else:
+                            time_string = "%0.1f min" % (toc / 60)
+                    else:
+                        time_string = "%0.1f sec" % toc
+                    print_this = "\r...%0.1f%% done in %s" % \
+                                (100.0 * (step - self.current_step) / n_steps, time_string)
+                    sys.stdout.write(print_this)
+                    sys.stdout.flush()
+                    tic_point += tic_ratio * n_steps
+
+            if spiking_window is not None:
+                # The last window's Spiking Network output is written to its history,
+                # which is read in the next call
+                i_values = spiking_window.result()
+                self._spikeNet_state_to_history(spiking_window_step, spiking_window_n_steps, i_values,
+                                                exclude_last=False)
+        except Exception:
+            # End the spiking simulation safely, before raising the error
+            if executor is not None:
+                executor.shutdown()
+            self.cleanup_spiking_simulator()
+            raise
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        # The state may be one of the integration kernel's buffers, which are overwritten by the next call:
+        self.current_state = state if self.integration_kernel is None else state.copy()
         self.current_step = self.current_step + n_steps - 1  # -1 : don't repeat last point
+
+    def run(self, monitors_writer=None, **kwds):
+        """
+        Call the simulator with **kwds and collect output data.
+
+        If a monitors_writer (e.g., a ChunkedMonitorsWriter) is given,
+        the monitors' output is streamed to disk during the simulation, instead of being kept in memory,
+        and a ChunkedMonitorsReader of the output is returned.
+        """
+        if monitors_writer is None:
+            return super(Simulator, self).run(**kwds)
+        wall_time_start = time.time()
+        monitors_writer.open(len(self.monitors))
+        try:
+            for output in self(**kwds):
+                monitors_writer.write_output(output)
+        finally:
+            monitors_writer.close()
+        elapsed_wall_time = time.time() - wall_time_start
+        LOG.info("%.3f s elapsed, %.3fx real time", elapsed_wall_time,
+                 elapsed_wall_time * 1e3 / self.simulation_length)
+        return ChunkedMonitorsReader(monitors_writer.path, monitors_writer.backend)
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+
+"""
+Streaming of the Simulator's monitors' output to chunked files on disk, during simulation.
+
+Monitors' (time, data) samples are gathered in bounded in-memory chunks,
+which are appended to disk by a background writer thread,
+either to an HDF5 file (if h5py is available), or to raw binary files, read back as NumPy memory maps.
+The output can then be read lazily, without loading the whole simulation in memory.
+"""
+
+import os
+import json
+import tempfile
+import threading
+from queue import Queue
+
+import numpy as np
+
+from tvb_scripts.utils.log_error_utils import initialize_logger, raise_value_error, raise_import_error
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+
+LOG = initialize_logger(__name__)
+
+
+HDF5 = "hdf5"
+MEMMAP = "memmap"
+MONITORS_HEADER = "monitors.json"
+
+
+def _default_backend():
+    if h5py is None:
+        return MEMMAP
+    return HDF5
+
+
+class ChunkedMonitorsWriter(object):
+
+    # This class streams the monitors' outputs to disk, in chunks of chunk_size samples per monitor.
+    # At most max_queued_chunks chunks wait to be written, so that memory is bounded,
+    # and the simulation waits for the writer thread if the disk cannot keep up.
+
+    def __init__(self, path, backend=None, chunk_size=1000, max_queued_chunks=4, dtype=None):
+        if backend is None:
+            backend = _default_backend()
+        if backend not in [HDF5, MEMMAP]:
+            raise_value_error("Monitors' writer backend %s is neither %s nor %s!" % (str(backend), HDF5, MEMMAP))
+        if backend == HDF5 and h5py is None:
+            raise_import_error("h5py is needed for writing monitors' output to HDF5 files!", LOG)
+        self.path = path
+        self.backend = backend
+        self.chunk_size = int(chunk_size)
+        self.max_queued_chunks = int(max_queued_chunks)
+        self.dtype = dtype
+        self.n_monitors = 0
+        self._times = []
+        self._data = []
+        self._n_buffered = []
+        self._n_written = []
+        self._queue = None
+        self._thread = None
+        self._error = None
+        self._file = None
+
+    # Methods called from the simulation loop:
+
+    def open(self, n_monitors):
+        self.n_monitors = n_monitors
+        self._times = [None] * n_monitors
+        self._data = [None] * n_monitors
+        self._n_buffered = [0] * n_monitors
+        self._n_written = [0] * n_monitors
+        self._error = None
+        # The number of monitors is written to the header of the output,
+        # since monitors without any output have no group or files:
+        if self.backend == HDF5:
+            self._file = h5py.File(self.path, "w")
+            self._file.attrs["n_monitors"] = n_monitors
+        else:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path)
+            with open(os.path.join(self.path, MONITORS_HEADER), "w") as file:
+                json.dump({"n_monitors": n_monitors}, file)
+        self._queue = Queue(maxsize=self.max_queued_chunks)
+        self._thread = threading.Thread(target=self._write_chunks, name="ChunkedMonitorsWriter")
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def write(self, i_monitor, time, data):
+        if self._error is not None:
+            raise self._error
+        if self._data[i_monitor] is None:
+            dtype = self.dtype
+            if dtype is None:
+                dtype = np.asarray(data).dtype
+            self._times[i_monitor] = np.empty((self.chunk_size, ))
+            self._data[i_monitor] = np.empty((self.chunk_size, ) + np.shape(data), dtype=dtype)
+        i_sample = self._n_buffered[i_monitor]
+        self._times[i_monitor][i_sample] = time
+        self._data[i_monitor][i_sample] = data
+        self._n_buffered[i_monitor] += 1
+        if self._n_buffered[i_monitor] == self.chunk_size:
+            self._flush(i_monitor)
+
+    def write_output(self, output):
+        # Write the output of one iteration of the Simulator, i.e., a (time, data) tuple or None per monitor
+        for i_monitor, time_data in enumerate(output):
+            if time_data is not None:
+                self.write(i_monitor, *time_data)
+
+    def close(self):
+        if self._thread is None:
+            return
+        try:
+            if self._error is None:
+                for i_monitor in range(self.n_monitors):
+                    self._flush(i_monitor)
+        finally:
+            # Stop the writer thread, after it writes all the queued chunks
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            self._close_files()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _flush(self, i_monitor):
+        n_samples = self._n_buffered[i_monitor]
+        if n_samples > 0:
+            # The buffers are handed over to the writer thread, and new ones are allocated for the next chunk
+            self._queue.put((i_monitor, self._times[i_monitor][:n_samples], self._data[i_monitor][:n_samples]))
+            self._times[i_monitor] = np.empty_like(self._times[i_monitor])
+            self._data[i_monitor] = np.empty_like(self._data[i_monitor])
+            self._n_buffered[i_monitor] = 0
+
+    # Methods of the writer thread:
+
+    def _write_chunks(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            if self._error is not None:
+                continue  # Just empty the queue
+            try:
+                self._write_chunk(*chunk)
+            except Exception as error:
+                LOG.error("Failed to write monitors' output chunk to %s!" % self.path)
+                self._error = error
+
+    def _write_chunk(self, i_monitor, times, data):
+        n_written = self._n_written[i_monitor]
+        n_samples = len(times)
+        if self.backend == HDF5:
+            group_name = "monitor_%d" % i_monitor
+            if group_name not in self._file:
+                group = self._file.create_group(group_name)
+                group.create_dataset("time", shape=(0, ), maxshape=(None, ), dtype=times.dtype,
+                                     chunks=(self.chunk_size, ))
+                group.create_dataset("data", shape=(0, ) + data.shape[1:], maxshape=(None, ) + data.shape[1:],
+                                     dtype=data.dtype, chunks=(self.chunk_size, ) + data.shape[1:])
+            group = self._file[group_name]
+            for name, values in zip(["time", "data"], [times, data]):
+                group[name].resize(n_written + n_samples, axis=0)
+                group[name][n_written:] = values
+        else:
+            for name, values in zip(["time", "data"], [times, data]):
+                with open(os.path.join(self.path, "monitor_%d_%s.bin" % (i_monitor, name)), "ab") as file:
+                    file.write(np.ascontiguousarray(values).tobytes())
+            # The header is rewritten after every chunk, so that the output is readable up to the last chunk:
+            with open(os.path.join(self.path, "monitor_%d.json" % i_monitor), "w") as file:
+                json.dump({"n_samples": n_written + n_samples,
+                           "time_dtype": times.dtype.str,
+                           "data_dtype": data.dtype.str,
+                           "data_shape": list(data.shape[1:])}, file)
+        self._n_written[i_monitor] = n_written + n_samples
+
+    def _close_files(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ChunkedMonitorsReader(object):
+
+    # This class reads lazily the monitors' output written by a ChunkedMonitorsWriter:
+    # data are HDF5 datasets or NumPy memory maps, loaded only when they are sliced.
+
+    def __init__(self, path, backend=None):
+        if backend is None:
+            if os.path.isdir(path):
+                backend = MEMMAP
+            else:
+                backend = HDF5
+        if backend == HDF5 and h5py is None:
+            raise_import_error("h5py is needed for reading monitors' output from HDF5 files!", LOG)
+        self.path = path
+        self.backend = backend
+        self._file = None
+        if self.backend == HDF5:
+            self._file = h5py.File(self.path, "r")
+
+    @property
+    def n_monitors(self):
+        if self.backend == HDF5:
+            return int(self._file.attrs["n_monitors"])
+        with open(os.path.join(self.path, MONITORS_HEADER), "r") as file:
+            return json.load(file)["n_monitors"]
+
+    def _read(self, i_monitor, name):
+        if i_monitor >= self.n_monitors:
+            raise_value_error("Monitor index %d is out of the %d monitors' output!" % (i_monitor, self.n_monitors))
+        if self.backend == HDF5:
+            group_name = "monitor_%d" % i_monitor
+            if group_name not in self._file:
+                # A monitor without any output
+                return np.empty((0, ))
+            return self._file[group_name][name]
+        header_path = os.path.join(self.path, "monitor_%d.json" % i_monitor)
+        if not os.path.isfile(header_path):
+            # A monitor without any output
+            return np.empty((0, ))
+        with open(header_path, "r") as file:
+            header = json.load(file)
+        if name == "time":
+            dtype = header["time_dtype"]
+            shape = (header["n_samples"], )
+        else:
+            dtype = header["data_dtype"]
+            shape = (header["n_samples"], ) + tuple(header["data_shape"])
+        if header["n_samples"] == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, "monitor_%d_%s.bin" % (i_monitor, name)),
+                         dtype=dtype, mode="r", shape=shape)
+
+    def get_time(self, i_monitor=0):
+        return np.asarray(self._read(i_monitor, "time"))
+
+    def get_data(self, i_monitor=0):
+        # Lazy data array, i.e., an HDF5 dataset or a NumPy memory map
+        return self._read(i_monitor, "data")
+
+    @property
+    def results(self):
+        # As Simulator.run returns them: a list of (time, data) tuples, one per monitor
+        return [(self.get_time(i_monitor), self.get_data(i_monitor)) for i_monitor in range(self.n_monitors)]
+
+    @staticmethod
+    def _copy_to_memmap(dataset, time_slice=slice(None)):
+        # Copy the samples time_slice of a dataset, block by block, to a NumPy memory map of a temporary file,
+        # which is deleted when the memory map is closed, so that they are never all loaded in memory.
+        samples = range(dataset.shape[0])[time_slice]
+        shape = (len(samples), ) + tuple(dataset.shape[1:])
+        if shape[0] == 0:
+            return np.empty(shape, dtype=dataset.dtype)
+        data = np.memmap(tempfile.TemporaryFile(), dtype=dataset.dtype, mode="w+", shape=shape)
+        block_size = (getattr(dataset, "chunks", None) or (1000, ))[0]
+        for start in range(0, shape[0], block_size):
+            block = samples[start:start + block_size]
+            data[start:start + len(block)] = dataset[block.start:block.stop:block.step]
+        return data
+
+    def to_TimeSeries(self, time_series, i_monitor=0, time_slice=slice(None), **kwargs):
+        # Convert to a TimeSeries object, e.g., TimeSeries() or TimeSeriesRegion(connectivity=connectivity),
+        # optionally only for the samples time_slice.
+        # TimeSeries need NumPy arrays: the memory maps of the memmap backend are sliced lazily,
+        # whereas the data of HDF5 files are copied to a temporary memory map, instead of being loaded.
+        data = self.get_data(i_monitor)
+        if self.backend == HDF5:
+            data = self._copy_to_memmap(data, time_slice)
+        else:
+            data = data[time_slice]
+        return time_series.duplicate(data=data, time=self.get_time(i_monitor)[time_slice], **kwargs)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -5,6 +5,7 @@ from collections import OrderedDict
 import numpy as np
 from pandas import Series
 from tvb_multiscale.config import CONFIGURED
+from tvb_multiscale.spiking_models.connectivity_rules import generate_connections
 from tvb_scripts.utils.log_error_utils import initialize_logger, raise_value_error
 from tvb_scripts.utils.data_structures_utils import ensure_list, flatten_tuple, property_to_fun
 
@@ -30,6 +31,17 @@ class SpikingModelBuilder(object):
 
     population_order = 100
 
+    # Set to True in order to connect Spiking nodes among each other
+    # with a few array based connection calls, instead of one call per pair of Spiking nodes:
+    batch_nodes_connections = False
+    # Seed of the random generation of the batched connections (None for a random seed):
+    batch_connections_seed = None
+    # Maximum number of explicit connections gathered before each batched connection call:
+    batch_connections_chunk_size = 10 ** 6
+    # Connectivity rules that are connected by the Spiking Simulator's rule, instead of explicit connections,
+    # since their connections are not sampled:
+    batch_connections_simulator_rules = ["all_to_all", "one_to_one"]
+
     # User inputs:
     tvb_simulator = None
     spiking_nodes_ids = []
@@ -455,26 +467,134 @@ class SpikingModelBuilder(object):
                                        )
                 )
 
+    def _connect_spiking_nodes_pairwise(self, conn):
+        # Form the connection for every distinct pair of Spiking nodes
+        for source_index in conn["source_nodes"]:
+            i_source_node = np.where(self.spiking_nodes_ids == source_index)[0][0]
+            src_pop = self._get_node_populations_neurons(self.nodes[i_source_node], conn["source"])
+            for target_index in conn["target_nodes"]:
+                if source_index != target_index:
+                    i_target_node = np.where(self.spiking_nodes_ids == target_index)[0][0]
+                    trg_pop = self._get_node_populations_neurons(self.nodes[i_target_node], conn["target"])
+                    self._connect_two_populations(
+                        src_pop, trg_pop,
+                        conn['conn_spec'],
+                        self._set_syn_spec(conn["model"],
+                                           conn["weight"](source_index, target_index),
+                                           conn["delay"](source_index, target_index),
+                                           conn["receptor_type"](source_index, target_index)
+                                           )
+                    )
+
+    def _nodes_connection_property_matrix(self, property, source_nodes, target_nodes):
+        # Evaluate a (weight or delay) property of a connection for all pairs of source and target Spiking nodes.
+        # A single vectorized call is tried first, e.g., for tvb_weight and tvb_delay,
+        # falling back to one call per pair of Spiking nodes,
+        # unless it returns numbers for all pairs, i.e., of shape (sources, targets).
+        # None is returned if any value is not a number, e.g., a dictionary of a distribution.
+        shape = (len(source_nodes), len(target_nodes))
+        try:
+            values = np.asarray(property(source_nodes[:, None], target_nodes[None, :]))
+            if values.dtype.kind in "biuf" and values.shape == shape:
+                return values.astype("float64")
+        except (TypeError, ValueError, IndexError) as e:
+            # The property cannot take arrays of Spiking nodes:
+            LOG.info("Evaluating a connection property per pair of Spiking nodes, "
+                     "since it failed for arrays of Spiking nodes with:\n%s" % str(e))
+        values = [[property(source_index, target_index) for target_index in target_nodes]
+                  for source_index in source_nodes]
+        try:
+            return np.array(values, dtype="float64").reshape(shape)
+        except (TypeError, ValueError):
+            return None
+
+    def _assert_nodes_connection_synapse(self, synapse_model, delay):
+        # Return the synapse model and the delay of a batched connection,
+        # where delay is None for connections without a delay
+        return synapse_model, self._assert_delay(delay)
+
+    def connect_populations_batch(self, sources, targets, syn_spec):
+        # Connect the arrays of sources and targets neurons one to one,
+        # with arrays of weights and delays, one per connection
+        raise_value_error("Batched connections of Spiking nodes are not available for %s!"
+                          % self.__class__.__name__)
+
+    def _connect_spiking_nodes_batch(self, conn):
+        source_nodes = np.array(ensure_list(conn["source_nodes"]))
+        target_nodes = np.array(ensure_list(conn["target_nodes"]))
+        # Weights and delays are evaluated once, for all pairs of Spiking nodes:
+        weights = self._nodes_connection_property_matrix(conn["weight"], source_nodes, target_nodes)
+        delays = self._nodes_connection_property_matrix(conn["delay"], source_nodes, target_nodes)
+        if weights is None or delays is None:
+            # Distributions of weights or delays are left to the Spiking Simulator:
+            self._connect_spiking_nodes_pairwise(conn)
+            return
+        # The neurons of the source and target populations are gathered once per Spiking node:
+        src_pops = [self._get_node_populations_neurons(
+                        self.nodes[np.where(self.spiking_nodes_ids == source_index)[0][0]], conn["source"])
+                    for source_index in source_nodes]
+        trg_pops = [self._get_node_populations_neurons(
+                        self.nodes[np.where(self.spiking_nodes_ids == target_index)[0][0]], conn["target"])
+                    for target_index in target_nodes]
+        src_neurons = [np.array(src_pop) for src_pop in src_pops]
+        trg_neurons = [np.array(trg_pop) for trg_pop in trg_pops]
+        rng = np.random.RandomState(self.batch_connections_seed)
+        # The explicit connections are gathered per synapse model and receptor type:
+        connections = OrderedDict()
+        for i_src, (source_index, src_pop) in enumerate(zip(source_nodes, src_pops)):
+            for i_trg, (target_index, trg_pop) in enumerate(zip(target_nodes, trg_pops)):
+                # Pairs of Spiking nodes that are not connected in TVB are skipped:
+                if source_index == target_index or weights[i_src, i_trg] == 0.0:
+                    continue
+                conn_spec, n_cons = \
+                    self._prepare_populations_connection_params(src_pop, trg_pop, conn['conn_spec'], {})
+                weight = self._synaptic_weight_scaling(weights[i_src, i_trg], n_cons)
+                receptors = ensure_list(conn["receptor_type"](source_index, target_index))
+                if conn_spec.get("rule", "all_to_all") in self.batch_connections_simulator_rules:
+                    # Connections that are not sampled are left to the Spiking Simulator's rule:
+                    for receptor in receptors:
+                        self.connect_two_populations(src_pop, trg_pop, conn_spec,
+                                                     self._set_syn_spec(conn["model"], weight,
+                                                                        delays[i_src, i_trg], receptor))
+                    continue
+                model, delay = self._assert_nodes_connection_synapse(conn["model"], delays[i_src, i_trg])
+                sources, targets = generate_connections(src_neurons[i_src], trg_neurons[i_trg], conn_spec, rng)
+                for receptor in receptors:
+                    this_connections = connections.setdefault((model, receptor),
+                                                              {"source": [], "target": [],
+                                                               "weight": [], "delay": [], "size": 0})
+                    this_connections["source"].append(sources)
+                    this_connections["target"].append(targets)
+                    this_connections["weight"].append(np.full(sources.shape, weight))
+                    if delay is not None:
+                        this_connections["delay"].append(np.full(sources.shape, delay))
+                    this_connections["size"] += sources.size
+                    # ...and connected in chunks of a bounded number of connections:
+                    if this_connections["size"] >= self.batch_connections_chunk_size:
+                        self._connect_populations_batch(model, receptor, connections.pop((model, receptor)))
+        # ...and then connected with one call per synapse model and receptor type:
+        for (model, receptor), this_connections in connections.items():
+            self._connect_populations_batch(model, receptor, this_connections)
+
+    def _connect_populations_batch(self, model, receptor, connections):
+        # Connect gathered explicit connections of a synapse model and receptor type
+        if len(connections["delay"]) > 0:
+            delays = np.concatenate(connections["delay"])
+        else:
+            delays = None
+        self.connect_populations_batch(np.concatenate(connections["source"]),
+                                       np.concatenate(connections["target"]),
+                                       self._set_syn_spec(model, np.concatenate(connections["weight"]),
+                                                          delays, receptor))
+
     def connect_spiking_nodes(self):
         # For every different type of connections between distinct Spiking nodes' populations
         for i_conn, conn in enumerate(ensure_list(self._nodes_connections)):
             # ...form the connection for every distinct pair of Spiking nodes
-            for source_index in conn["source_nodes"]:
-                i_source_node = np.where(self.spiking_nodes_ids == source_index)[0][0]
-                src_pop = self._get_node_populations_neurons(self.nodes[i_source_node], conn["source"])
-                for target_index in conn["target_nodes"]:
-                    if source_index != target_index:
-                        i_target_node = np.where(self.spiking_nodes_ids == target_index)[0][0]
-                        trg_pop = self._get_node_populations_neurons(self.nodes[i_target_node], conn["target"])
-                        self._connect_two_populations(
-                            src_pop, trg_pop,
-                            conn['conn_spec'],
-                            self._set_syn_spec(conn["model"],
-                                               conn["weight"](source_index, target_index),
-                                               conn["delay"](source_index, target_index),
-                                               conn["receptor_type"](source_index, target_index)
-                                               )
-                        )
+            if self.batch_nodes_connections:
+                self._connect_spiking_nodes_batch(conn)
+            else:
+                self._connect_spiking_nodes_pairwise(conn)
 
     def _build_and_connect_devices(self, devices):
         # Build devices by the variable model they measure or stimulate (Series),
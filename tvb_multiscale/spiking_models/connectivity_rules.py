@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from tvb_scripts.utils.log_error_utils import raise_value_error
+
+
+def generate_connections(pre, post, conn_spec, rng=np.random):
+    # Return the explicit sources and targets of the connections between the neurons' arrays pre and post,
+    # following a NEST-like connectivity rule (conn_spec),
+    # using the random number generator rng (a numpy.random.RandomState or the numpy.random module)
+    pre = np.asarray(pre)
+    post = np.asarray(post)
+    rule = conn_spec.get("rule", "all_to_all")
+    autapses = conn_spec.get("autapses", True)
+    multapses = conn_spec.get("multapses", True)
+    n_pre = len(pre)
+    n_post = len(post)
+    if rule == "all_to_all":
+        sources = np.repeat(pre, n_post)
+        targets = np.tile(post, n_pre)
+    elif rule == "one_to_one":
+        if n_pre != n_post:
+            raise_value_error("one_to_one connections need populations of equal size, not %d and %d!"
+                              % (n_pre, n_post))
+        sources = pre
+        targets = post
+    elif rule == "pairwise_bernoulli":
+        connected = rng.random_sample((n_pre, n_post)) < conn_spec.get("p", 1.0)
+        sources = np.repeat(pre, n_post)[connected.flatten()]
+        targets = np.tile(post, n_pre)[connected.flatten()]
+    elif rule == "fixed_indegree":
+        indegree = int(conn_spec["indegree"])
+        targets = np.repeat(post, indegree)
+        if multapses:
+            sources = pre[rng.randint(0, n_pre, n_post * indegree)]
+        else:
+            sources = np.concatenate([rng.choice(pre, indegree, replace=False) for _ in range(n_post)])
+    elif rule == "fixed_outdegree":
+        outdegree = int(conn_spec["outdegree"])
+        sources = np.repeat(pre, outdegree)
+        if multapses:
+            targets = post[rng.randint(0, n_post, n_pre * outdegree)]
+        else:
+            targets = np.concatenate([rng.choice(post, outdegree, replace=False) for _ in range(n_pre)])
+    elif rule == "fixed_total_number":
+        N = int(conn_spec["N"])
+        if multapses:
+            sources = pre[rng.randint(0, n_pre, N)]
+            targets = post[rng.randint(0, n_post, N)]
+        else:
+            pairs = rng.choice(n_pre * n_post, N, replace=False)
+            sources = pre[pairs // n_post]
+            targets = post[pairs % n_post]
+    else:
+        raise_value_error("Connectivity rule %s is not available!" % str(rule))
+    if not autapses:
+        # Autapses are removed, i.e., for fixed degree rules, there may be slightly less connections
+        keep = sources != targets
+        sources = sources[keep]
+        targets = targets[keep]
+    return sources, targets
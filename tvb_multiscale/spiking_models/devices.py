@@ -8,9 +8,10 @@ import numpy as np
 
 from tvb_scripts.utils.log_error_utils import initialize_logger, raise_value_error
 from tvb_scripts.utils.data_structures_utils \
-    import ensure_list, flatten_list, list_of_dicts_to_dict_of_lists, \
-    sort_events_by_x_and_y, data_xarray_from_continuous_events
-from tvb_scripts.utils.computations_utils import spikes_rate_convolution, compute_spikes_counts
+    import ensure_list, flatten_list, list_of_dicts_to_dict_of_lists, data_xarray_from_continuous_events
+from tvb_multiscale.spiking_models.spike_trains import SpikeTrainStore
+from tvb_scripts.utils.computations_utils import \
+    spikes_rate_convolution, compute_spikes_counts, compute_spikes_counts_matrix
 
 
 LOG = initialize_logger(__name__)
@@ -60,8 +61,9 @@ class Device(object):
 
     def filter_neurons(self, neurons=None, exclude_neurons=[]):
         # Method to select or exclude some of the connected neurons to the device:
-        temp_neurons = self.neurons
         if neurons is not None:
+            temp_neurons = flatten_list(neurons)
+        else:
             temp_neurons = list(self.neurons)
         for neuron in exclude_neurons:
             if neuron in temp_neurons:
@@ -174,47 +176,46 @@ InputDeviceDict = {}
 
 class OutputDevice(Device):
     model = "output_device"
+    _events_cursors = None
     
     def __init__(self, device, *args, **kwargs):
         super(OutputDevice, self).__init__(device, *args, **kwargs)
         self.model = "output_device"
 
     def filter_events(self, events, variables=None, neurons=None, times=None,
-                      exclude_neurons=[], exclude_times=[]):
-        # This method will select/exclude part of the measured events, depending on user inputs
+                      exclude_neurons=[], exclude_times=[], time_range=None):
+        # This method will select/exclude part of the measured events, depending on user inputs.
+        # time_range = (start, stop) selects the events with start <= time < stop.
+        if events is None:
+            events = self.events
         if variables is None:
             variables = events.keys()
         output_events = OrderedDict()
-        if events is None:
-            events = self.events
-        events_times = np.array(events["times"])
-        senders = np.array(events["senders"])
-        inds = np.ones((self.n_events,))
-        if len(inds) > 0:
-            if times is not None:
-                if senders is not None:
-                    inds = np.logical_and(inds, [time in flatten_list(times) and
-                                                 time not in flatten_list(exclude_times) and
-                                                 sender in flatten_list(neurons) and
-                                                 sender not in flatten_list(exclude_neurons)
-                                                 for time, sender in zip(events_times, senders)])
+        events_times = np.asarray(events["times"])
+        n_events = len(events_times)
+        if n_events > 0:
+            # First, restrict to the time window, using a slice if the events are sorted in time:
+            window = slice(0, n_events)
+            if time_range is not None:
+                if np.all(events_times[1:] >= events_times[:-1]):
+                    window = slice(*np.searchsorted(events_times, time_range[:2], side="left"))
                 else:
-                    inds = np.logical_and(inds, [time in flatten_list(times) and
-                                                 time not in flatten_list(exclude_times) and
-                                                 sender not in flatten_list(exclude_neurons)
-                                                 for time, sender in zip(events_times, senders)])
-            else:
+                    window = np.where(np.logical_and(events_times >= time_range[0],
+                                                     events_times < time_range[1]))[0]
+            events_times = events_times[window]
+            inds = np.ones(events_times.shape, dtype="bool")
+            if neurons is not None or len(exclude_neurons) > 0:
+                senders = np.asarray(events["senders"])[window]
                 if neurons is not None:
-                    inds = np.logical_and(inds, [time not in flatten_list(exclude_times) and
-                                                 sender in flatten_list(neurons) and
-                                                 sender not in flatten_list(exclude_neurons)
-                                                 for time, sender in zip(events_times, senders)])
-                else:
-                    inds = np.logical_and(inds, [time not in flatten_list(exclude_times) and
-                                                 sender not in flatten_list(exclude_neurons)
-                                                 for time, sender in zip(events_times, senders)])
+                    inds = np.isin(senders, flatten_list(neurons))
+                if len(exclude_neurons) > 0:
+                    inds = np.logical_and(inds, ~np.isin(senders, flatten_list(exclude_neurons)))
+            if times is not None:
+                inds = np.logical_and(inds, np.isin(events_times, flatten_list(times)))
+            if len(exclude_times) > 0:
+                inds = np.logical_and(inds, ~np.isin(events_times, flatten_list(exclude_times)))
             for var in ensure_list(variables):
-                output_events[var] = events[var][inds]
+                output_events[var] = np.asarray(events[var])[window][inds]
         else:
             for var in ensure_list(variables):
                 output_events[var] = np.array([])
@@ -230,6 +231,70 @@ class OutputDevice(Device):
     def number_of_events(self):
         pass
 
+    # Event cursors hold the number of events already consumed by each reader,
+    # so that readers can get only the events recorded since their last read, without resetting the device:
+
+    def _consume_events(self, reader="default"):
+        # Return the (start, stop) indices of the events not read yet by this reader and advance its cursor
+        if self._events_cursors is None:
+            self._events_cursors = {}
+        n_events = self.number_of_events
+        start = self._events_cursors.get(reader, 0)
+        if n_events < start:
+            # The device has been reset since the last read of this reader
+            start = 0
+        self._events_cursors[reader] = n_events
+        return start, n_events
+
+    def number_of_new_events(self, reader="default"):
+        start, stop = self._consume_events(reader)
+        return stop - start
+
+    def get_events_since(self, start=0, variables=None):
+        # Return the events recorded from the start-th event on.
+        # Subclasses may override it, so that the events before start are not fetched from the device.
+        events = self.events
+        if variables is None:
+            variables = events.keys()
+        output_events = OrderedDict()
+        for var in ensure_list(variables):
+            output_events[var] = np.array(events[var])[start:]
+        return output_events
+
+    def get_new_events(self, variables=None, reader="default"):
+        start, stop = self._consume_events(reader)
+        events = self.get_events_since(start, variables)
+        return OrderedDict([(var, values[:stop - start]) for var, values in events.items()])
+
+    def reset_events_cursors(self, reader=None):
+        if reader is None:
+            self._events_cursors = None
+        elif self._events_cursors is not None:
+            self._events_cursors.pop(reader, None)
+
+    def get_events_state(self, events=True):
+        # Return the number of events, the event cursors and, optionally, the recorded events, for checkpoints
+        state = {"number_of_events": self.number_of_events,
+                 "events_cursors": dict(self._events_cursors or {})}
+        if events:
+            state["events"] = OrderedDict([(key, np.array(val)) for key, val in self.events.items()])
+        return state
+
+    def _restore_events(self, events):
+        # Set the recorded events of an empty device, if the device supports it
+        pass
+
+    def set_events_state(self, state):
+        # Restore the checkpointed events to an empty, e.g., newly built, device, if there are any,
+        # and rebase the checkpointed event cursors to the events of this device,
+        # so that the readers continue from the events recorded after the checkpoint.
+        if "events" in state and self.number_of_events == 0:
+            self._restore_events(state["events"])
+        shift = self.number_of_events - state["number_of_events"]
+        self._events_cursors = dict([(reader, max(0, cursor + shift))
+                                     for reader, cursor in state["events_cursors"].items()])
+        self._last_sample_offset = 0
+
     @property
     @abstractmethod
     def reset(self):
@@ -246,6 +311,8 @@ class OutputDevice(Device):
 
 class SpikeDetector(OutputDevice):
     model = "spike_detector"
+    _spike_train_store = None
+    _spike_train_store_n_events = 0
 
     def __init__(self, device, *args, **kwargs):
         super(SpikeDetector, self).__init__(device, *args, **kwargs)
@@ -272,30 +339,47 @@ class SpikeDetector(OutputDevice):
 
     # The following properties are time summaries without taking into consideration spike timing:
 
-    def get_spikes_times(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[]):
-        return self.filter_events(None, "times", neurons, times, exclude_neurons, exclude_times)["times"]
+    def get_spikes_times(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[], time_range=None):
+        return self.filter_events(None, "times", neurons, times, exclude_neurons, exclude_times,
+                                  time_range)["times"]
 
-    def get_spikes_senders(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[]):
-        return self.filter_events(None, "senders", neurons, times, exclude_neurons, exclude_times)["senders"]
+    def get_spikes_senders(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[], time_range=None):
+        return self.filter_events(None, "senders", neurons, times, exclude_neurons, exclude_times,
+                                  time_range)["senders"]
 
-    def get_number_of_spikes(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[]):
-        return len(self.get_spikes_times(neurons, times, exclude_neurons, exclude_times))
+    def get_number_of_spikes(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[],
+                             time_range=None):
+        return len(self.get_spikes_times(neurons, times, exclude_neurons, exclude_times, time_range))
 
-    def get_mean_number_of_spikes(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[]):
+    def get_mean_number_of_spikes(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[],
+                                  time_range=None):
         n_neurons = self.get_number_of_neurons(neurons, exclude_neurons)
         if n_neurons > 0:
-            return len(self.get_spikes_times(neurons, times, exclude_neurons, exclude_times)) / n_neurons
+            return len(self.get_spikes_times(neurons, times, exclude_neurons, exclude_times, time_range)) / n_neurons
         else:
             return 0.0
 
     def get_spikes_rate(self, dt=1.0, neurons=None, times=None, exclude_neurons=[], exclude_times=[]):
         return self.get_mean_number_of_spikes(neurons, times, exclude_neurons, exclude_times) / dt
 
+    def _get_spike_train_store_events(self):
+        return self.events
+
+    @property
+    def spike_train_store(self):
+        # The spikes in a CSR format, cached and rebuilt only when new events have been recorded
+        n_events = self.number_of_events
+        if self._spike_train_store is None or self._spike_train_store_n_events != n_events:
+            events = self._get_spike_train_store_events()
+            self._spike_train_store = SpikeTrainStore(events["senders"], events["times"])
+            self._spike_train_store_n_events = n_events
+        return self._spike_train_store
+
     def get_spikes_times_by_neurons(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[],
-                                    full_senders=False):
-        sorted_events = sort_events_by_x_and_y(self.events, x="senders", y="times",
-                                               filter_x=neurons, filter_y=times,
-                                               exclude_x=exclude_neurons, exclude_y=exclude_times)
+                                    full_senders=False, time_range=None):
+        sorted_events = self.spike_train_store.get_spikes_times_by_neurons(neurons, times,
+                                                                           exclude_neurons, exclude_times,
+                                                                           time_range)
         if full_senders:
             # In this case we also include neurons with 0 spikes in the output
             sender_neurons = self.filter_neurons(neurons=neurons, exclude_neurons=exclude_neurons)
@@ -307,10 +391,41 @@ class SpikeDetector(OutputDevice):
         else:
             return sorted_events
 
-    def get_spikes_neurons_by_times(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[]):
-        return sort_events_by_x_and_y(self.events, x="times", y="senders",
-                                      filter_x=times, filter_y=neurons,
-                                      exclude_x=exclude_times, exclude_y=exclude_neurons)
+    def get_spikes_neurons_by_times(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[],
+                                    time_range=None):
+        return self.spike_train_store.get_spikes_neurons_by_times(neurons, times, exclude_neurons, exclude_times,
+                                                                  time_range)
+
+    # The following methods count only the spikes recorded since the last read of a reader:
+
+    def number_of_new_spikes(self, reader="default"):
+        return self.number_of_new_events(reader)
+
+    def get_mean_number_of_new_spikes(self, reader="default", number_of_neurons=None):
+        if number_of_neurons is None:
+            number_of_neurons = self.number_of_neurons
+        n_spikes = self.number_of_new_spikes(reader)
+        if number_of_neurons > 0:
+            return n_spikes / number_of_neurons
+        else:
+            return 0.0
+
+    def get_mean_number_of_new_spikes_per_step(self, n_steps, dt, time, reader="default", number_of_neurons=None):
+        # The mean number of new spikes per neuron in each one of the n_steps time steps of length dt until time,
+        # where time step i holds the spikes of times in (time - (n_steps - i) * dt, time - (n_steps - i - 1) * dt]
+        if number_of_neurons is None:
+            number_of_neurons = self.number_of_neurons
+        times = np.asarray(self.get_new_events("times", reader)["times"])
+        steps = n_steps - 1 - np.floor(np.round((time - times) / dt, 6)).astype("i")
+        n_spikes = np.bincount(np.clip(steps, 0, n_steps - 1), minlength=n_steps)
+        if number_of_neurons > 0:
+            return n_spikes / number_of_neurons
+        else:
+            return 0.0 * n_spikes
+
+    @property
+    def mean_number_of_new_spikes(self):
+        return self.get_mean_number_of_new_spikes()
 
     @property
     def spikes_times(self):
@@ -345,18 +460,16 @@ class SpikeDetector(OutputDevice):
             name = self.model + " - Total spike rate across time"
 
         if mode == "per_neuron":
-            senders_neurons = []
-            rates = []
-            # Computing separately per neuron
-            for neuron, spikes_times in self.get_spikes_times_by_neurons(full_senders=True, **kwargs).items():
-                senders_neurons.append(neuron)
-                if len(spikes_times) > 0:
-                    # Getting spikes counts per time interval
-                    spikes_counts = compute_spikes_counts(spikes_times, time)
-                    # Computing rate as some kind of convolution with spikes_kernel
-                    rates.append(spikes_rate_convolution(spikes_counts, spikes_kernel))
-                else:
-                    rates.append(np.zeros(time.shape))
+            # Computing for all neurons at once, including neurons with 0 spikes in the output:
+            events = self.filter_events(None, ["senders", "times"], **kwargs)
+            senders_neurons = self.filter_neurons(neurons=kwargs.get("neurons", None),
+                                                  exclude_neurons=kwargs.get("exclude_neurons", [])).tolist()
+            # Append any senders that are not among the device's neurons:
+            senders_neurons += np.setdiff1d(np.unique(events["senders"]), senders_neurons).tolist()
+            # Getting spikes counts per neuron and time interval in a (neurons x time) matrix
+            spikes_counts = compute_spikes_counts_matrix(events["senders"], events["times"], senders_neurons, time)
+            # Computing rate as some kind of convolution with spikes_kernel, for all neurons at once
+            rates = spikes_rate_convolution(spikes_counts, spikes_kernel)
             return xr.DataArray(rates, dims=["Neuron", "Time"], coords={"Neuron": senders_neurons,
                                                                         "Time": time})
         else:
@@ -385,6 +498,7 @@ class SpikeDetector(OutputDevice):
 
 class Multimeter(OutputDevice):
     model = "multimeter"
+    _last_sample_offset = 0
 
     def __init__(self, device, *args, **kwargs):
         super(Multimeter, self).__init__(device)
@@ -409,7 +523,8 @@ class Multimeter(OutputDevice):
         return variables
 
     def get_data(self, variables=None, neurons=None, exclude_neurons=[],
-                 name=None, dims_names=["Variable", "Neuron", "Time"]):
+                 name=None, dims_names=["Variable", "Neuron", "Time"], dtype="float64", reduction=None):
+        # reduction can be "mean" or "sum" across neurons, computed while building the output
         if name is None:
             name = self.model
         events = dict(self.events)
@@ -420,11 +535,11 @@ class Multimeter(OutputDevice):
         return data_xarray_from_continuous_events(events, times, senders,
                                                   variables=self._determine_variables(variables),
                                                   filter_senders=neurons, exclude_senders=exclude_neurons,
-                                                  name=name, dims_names=dims_names)
+                                                  name=name, dims_names=dims_names,
+                                                  dtype=dtype, reduction=reduction)
 
-    def get_mean_data(self, variables=None, neurons=None, exclude_neurons=[]):
-        data = self.get_data(variables, neurons, exclude_neurons)
-        return data.mean(dim="Neuron")
+    def get_mean_data(self, variables=None, neurons=None, exclude_neurons=[], dtype="float64"):
+        return self.get_data(variables, neurons, exclude_neurons, dtype=dtype, reduction="mean")
 
     @property
     def data(self):
@@ -434,6 +549,22 @@ class Multimeter(OutputDevice):
     def data_mean(self):
         return self.get_mean_data()
 
+    def _get_last_sample_events(self, variables):
+        # Return the events of the last recorded sample.
+        # The multimeter records events in time order,
+        # so only the events from the first event of the previous last sample on are read.
+        if self._last_sample_offset > self.number_of_events:
+            # The device has been reset in the meantime
+            self._last_sample_offset = 0
+        events = self.get_events_since(self._last_sample_offset, ["times", "senders"] + list(variables))
+        times = np.asarray(events["times"])
+        if len(times) > 0:
+            start = np.searchsorted(times, times[-1], side="left")
+            self._last_sample_offset += start
+            for var in events.keys():
+                events[var] = np.asarray(events[var])[start:]
+        return events
+
     def current_data(self, variables=None, neurons=None, exclude_neurons=[],
                      name=None, dims_names=["Variable", "Neuron"]):
         # This method will return current time data
@@ -441,24 +572,19 @@ class Multimeter(OutputDevice):
             name = self.model
         coords = OrderedDict()
         variables = self._determine_variables(variables)
-        events = self.events
-        times = events["times"]
+        # Get only the last time stamp events:
+        events = self._get_last_sample_events(variables)
         coords[dims_names[0]] = variables
-        if len(times) > 0:
-            # Get only the last time stamp events:
-            output_inds = events["times"] == events["times"][-1]
-            # Optionally filter sender neurons
+        if len(events["times"]) > 0:
             senders = events["senders"]
+            # Optionally filter sender neurons
+            output_inds = np.ones(senders.shape, dtype="bool")
             if neurons is not None:
-                output_inds = np.logical_and(output_inds,
-                                             [sender in flatten_list(neurons) for sender in senders])
-            else:
-                neurons = ensure_list(self.neurons)
+                output_inds = np.isin(senders, flatten_list(neurons))
             if len(exclude_neurons) > 0:
-                output_inds = np.logical_and(output_inds,
-                                             [sender not in flatten_list(exclude_neurons) for sender in senders])
-            coords[dims_names[1]] = neurons
-            data = np.empty((len(variables), len(neurons)))
+                output_inds = np.logical_and(output_inds, ~np.isin(senders, flatten_list(exclude_neurons)))
+            coords[dims_names[1]] = senders[output_inds].tolist()
+            data = np.empty((len(variables), len(coords[dims_names[1]])))
             for i_var, var in enumerate(variables):
                 data[i_var] = events[var][output_inds]
         else:
@@ -488,6 +614,23 @@ class Multimeter(OutputDevice):
                                  name=None, dims_names=["Variable", "Neuron"]):
         return self.current_data_mean(variables, neurons, exclude_neurons, name, dims_names).values.tolist()
 
+    def get_new_data_mean_values_per_step(self, n_steps, dt, time, variables=None, reader="default"):
+        # The mean values across neurons of the samples recorded since the last read of a reader,
+        # for each one of the n_steps time steps of length dt until time, i.e., of shape (n_steps, variables).
+        # Every time step holds the latest sample until its end, or the first new sample, if there is none before.
+        variables = self._determine_variables(variables)
+        events = self.get_new_events(["times"] + variables, reader)
+        if len(events["times"]) == 0:
+            # No new samples, so hold the current ones.
+            # Multimeter's current_data is called explicitly, since the Voltmeter's one takes no variables:
+            return np.tile(Multimeter.current_data(self, variables).mean(dim="Neuron").values, (n_steps, 1))
+        samples_times, samples = np.unique(events["times"], return_inverse=True)
+        n_neurons = np.bincount(samples)
+        samples_means = np.array([np.bincount(samples, weights=events[var]) / n_neurons for var in variables]).T
+        steps_ends = time - dt * np.arange(n_steps - 1, -1, -1)
+        inds = np.searchsorted(samples_times, steps_ends + 1e-6 * dt, side="right") - 1
+        return samples_means[np.maximum(inds, 0)]
+
 
 class Voltmeter(Multimeter):
     # The Voltmer is just a Mutlimeter measuring only a voltage quantity
@@ -504,13 +647,12 @@ class Voltmeter(Multimeter):
         pass
 
     def get_data(self, neurons=None, exclude_neurons=[],
-                 name=None, dims_names=["Variable", "Neuron", "Time"]):
+                 name=None, dims_names=["Variable", "Neuron", "Time"], dtype="float64", reduction=None):
         return super(Voltmeter, self).get_data(self.var, neurons, exclude_neurons,
-                                               name, dims_names)
+                                               name, dims_names, dtype, reduction)
 
-    def get_mean_data(self, neurons=None, exclude_neurons=[]):
-        data = self.get_data(neurons, exclude_neurons)
-        return data.mean(dim="Neuron")
+    def get_mean_data(self, neurons=None, exclude_neurons=[], dtype="float64"):
+        return self.get_data(neurons, exclude_neurons, dtype=dtype, reduction="mean")
 
     @property
     def data(self):
@@ -557,16 +699,14 @@ class SpikeMultimeter(Multimeter, SpikeDetector):
         # This method returns time moments where there is a spike for every sender neuron.
         spikes = self.events[self.spike_var]
         spikes_inds = spikes != 0.0
-        senders = self.senders
+        senders = np.asarray(self.senders)
         if neurons is not None:
-            spikes_inds = np.logical_and(spikes_inds,
-                                         [sender in flatten_list(neurons) for sender in senders])
+            spikes_inds = np.logical_and(spikes_inds, np.isin(senders, flatten_list(neurons)))
         if len(exclude_neurons) > 0:
-            spikes_inds = np.logical_and(spikes_inds,
-                                         [sender not in flatten_list(exclude_neurons) for sender in senders])
+            spikes_inds = np.logical_and(spikes_inds, ~np.isin(senders, flatten_list(exclude_neurons)))
         return np.where(spikes_inds)
 
-    def get_spikes_events(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[]):
+    def get_spikes_events(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[], time_range=None):
         # This method returns an event structure similar to a spike_detectors,
         # i.e., where there are events only for spike times, not for continuous time
         events = dict(self.events)
@@ -575,16 +715,19 @@ class SpikeMultimeter(Multimeter, SpikeDetector):
             events[var] = val[inds]
         events["weights"] = np.array(events[self.spike_var])
         del events[self.spike_var]
-        return self.filter_events(events, None, neurons, times, exclude_neurons, exclude_times)
+        return self.filter_events(events, None, neurons, times, exclude_neurons, exclude_times, time_range)
+
+    def _get_spike_train_store_events(self):
+        return self.get_spikes_events()
 
-    def get_spikes_weights(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[]):
-        return self.get_spikes_events(self, neurons, times, exclude_neurons, exclude_times)["weights"]
+    def get_spikes_weights(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[], time_range=None):
+        return self.get_spikes_events(neurons, times, exclude_neurons, exclude_times, time_range)["weights"]
 
-    def get_spikes_times(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[]):
-        return self.get_spikes_events(self, neurons, times, exclude_neurons, exclude_times)["times"]
+    def get_spikes_times(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[], time_range=None):
+        return self.get_spikes_events(neurons, times, exclude_neurons, exclude_times, time_range)["times"]
 
-    def get_spikes_senders(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[]):
-        return self.get_spikes_events(self, neurons, times, exclude_neurons, exclude_times)["senders"]
+    def get_spikes_senders(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[], time_range=None):
+        return self.get_spikes_events(neurons, times, exclude_neurons, exclude_times, time_range)["senders"]
 
     # The following properties are time summaries without taking into consideration spike timing:
 
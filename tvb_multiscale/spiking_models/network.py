@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
 import pandas as pd
 import xarray as xr
 import numpy as np
@@ -30,6 +31,12 @@ class SpikingNetwork(object):
     #
     input_devices = pd.Series()  # input_devices['Inhibitory']['rh-insula']
 
+    # Neurons' state variables saved in checkpoints, per neurons' model, e.g., {"iaf_cond_exp": ["V_m", "g_ex"]}.
+    # For the other models, they are the neurons' recordables that are also in their status,
+    # e.g., V_m, s_AMPA, s_GABA, s_NMDA and x_NMDA for iaf_cond_deco2014.
+    checkpoint_neurons_variables = {}
+    _checkpoint_neurons_state_variables = None
+
     def __init__(self,
                  region_nodes=pd.Series(),
                  output_devices=pd.Series(),
@@ -72,11 +79,85 @@ class SpikingNetwork(object):
     def Run(self, *args, **kwargs):
         pass
 
+    @abstractmethod
+    def Cleanup(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        # Within a "with" block, the spiking simulator is configured once in the beginning,
+        # and it is cleaned up at the end, even if the simulation fails halfway
+        self.configure()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.Cleanup()
+
     @property
     @abstractmethod
     def min_delay(self):
         pass
 
+    @abstractmethod
+    def _set_time(self, time):
+        # Set the time of the spiking simulator, before it is run, e.g., to resume from a checkpoint
+        pass
+
+    def _get_neurons_state_variables(self, node, population):
+        # The state variables of a population's neurons to be saved in checkpoints,
+        # found once from the status of the population's first neuron
+        if self._checkpoint_neurons_state_variables is None:
+            self._checkpoint_neurons_state_variables = OrderedDict()
+        key = (node.label, population)
+        if key not in self._checkpoint_neurons_state_variables:
+            status = node.Get(None, population)[0]
+            model = str(status["model"])
+            if model in self.checkpoint_neurons_variables:
+                variables = ensure_list(self.checkpoint_neurons_variables[model])
+            else:
+                variables = [str(variable) for variable in status.get("recordables", [])
+                             if str(variable) in status]
+                LOG.info("Neurons' state variables %s of %s neurons are saved in checkpoints." % (variables, model))
+            self._checkpoint_neurons_state_variables[key] = variables
+        return self._checkpoint_neurons_state_variables[key]
+
+    def _get_neurons_state(self, node, population):
+        neurons_state = OrderedDict()
+        for variable in self._get_neurons_state_variables(node, population):
+            neurons_state[variable] = np.array(node.Get(variable, population))
+        return neurons_state
+
+    def get_state(self, events=True):
+        # Return a checkpoint of the Spiking Network:
+        # its time, its neurons' state variables,
+        # and its output devices' event cursors and (optionally) recorded events.
+        neurons = OrderedDict()
+        for node_label, node in self.region_nodes.iteritems():
+            neurons[node_label] = OrderedDict()
+            for population in node.populations:
+                neurons[node_label][population] = self._get_neurons_state(node, population)
+        output_devices = OrderedDict()
+        for pop_label, pop_devices in self.output_devices.iteritems():
+            output_devices[pop_label] = OrderedDict()
+            for reg_label, device in pop_devices.iteritems():
+                output_devices[pop_label][reg_label] = device.get_events_state(events)
+        return {"time": self.time, "neurons": neurons, "output_devices": output_devices}
+
+    def set_state(self, state):
+        # Re-inject a checkpoint to a Spiking Network, typically a newly built one, before its simulation,
+        # so that its time continues from the checkpoint, and its devices' recordings include the checkpointed ones.
+        self._set_time(state["time"])
+        for node_label, node_state in state["neurons"].items():
+            node = self.region_nodes[node_label]
+            for population, neurons_state in node_state.items():
+                if len(neurons_state) > 0:
+                    variables = list(neurons_state.keys())
+                    node.Set([dict(zip(variables, values))
+                              for values in zip(*[neurons_state[variable].tolist() for variable in variables])],
+                             population)
+        for pop_label, pop_devices_state in state["output_devices"].items():
+            for reg_label, device_state in pop_devices_state.items():
+                self.output_devices[pop_label][reg_label].set_events_state(device_state)
+
     @property
     def nodes_labels(self):
         return list(self.region_nodes.index)
@@ -99,10 +180,9 @@ class SpikingNetwork(object):
                 devices[pop_label] = get_device(pop_device, nodes)
         return devices
 
-    def _prepare_to_compute_spike_rates(self, population_devices=None, regions=None, mode="rate",
-                                        spikes_kernel_width=None, spikes_kernel_n_intervals=10,
-                                        spikes_kernel_overlap=0.5, min_spike_interval=None, time=None):
-        # This method will get spike measuing devices and prepare for computing rate
+    def get_spikes_devices(self, population_devices=None, regions=None, mode="rate"):
+        # Get the spike measuring devices, optionally of some populations and regions only.
+        # Return an empty Series if there are none.
         if mode.find("activity") > -1:
             spike_detectors = self.get_devices_by_model("spike_multimeter", nodes=regions)
         else:
@@ -112,15 +192,23 @@ class SpikingNetwork(object):
                     break  # If this is not an empty dict of devices
         if len(spike_detectors) == 0:
             LOG.warning("No spike measuring device in this Spiking Network network!")
-            return None, None, None
+            return spike_detectors
 
         if population_devices is not None:
             population_devices = np.intersect1d(list(spike_detectors.index),
                                                 ensure_list(population_devices)).tolist()
             if len(population_devices) == 0:
                 LOG.warning("No spike measuring device left after user selection!")
-                return None, None, None
             spike_detectors = spike_detectors[population_devices]
+        return spike_detectors
+
+    def _prepare_to_compute_spike_rates(self, population_devices=None, regions=None, mode="rate",
+                                        spikes_kernel_width=None, spikes_kernel_n_intervals=10,
+                                        spikes_kernel_overlap=0.5, min_spike_interval=None, time=None):
+        # This method will get spike measuing devices and prepare for computing rate
+        spike_detectors = self.get_spikes_devices(population_devices, regions, mode)
+        if len(spike_detectors) == 0:
+            return None, None, None, None
 
         if regions is not None:
             regions = ensure_list(regions)
@@ -302,7 +390,7 @@ class SpikingNetwork(object):
             # Total (summing) quantities across neurons
             fun = "get_data"
             if mode == "total":
-                kwargs.update({"mode": mode})
+                kwargs.update({"reduction": "sum"})
         multimeters = self.get_devices_by_model("multimeter", nodes=regions)
         if len(multimeters) == 0:
             LOG.warning("No multimeter device in this Spiking Network!")
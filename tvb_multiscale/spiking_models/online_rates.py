@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from tvb_scripts.utils.log_error_utils import initialize_logger, raise_value_error
+
+
+LOG = initialize_logger(__name__)
+
+
+class OnlineSpikesRates(object):
+
+    # This class estimates spikes' rates per population and region while the Spiking Network runs.
+    # It is updated after every run of the Spiking Network with the number of spikes
+    # recorded since its previous update, which it reads with its own event cursor,
+    # i.e., without reading the spikes' events or resetting the spike detectors.
+    # The rates are kept in a preallocated ring buffer of the last n_samples updates.
+    # With the "sliding" kernel, the rate is the number of spikes in the last kernel_width ms over kernel_width,
+    # whereas with the "exponential" one it is an exponentially decaying trace with time constant kernel_width.
+    # As for SpikingNetwork.compute_spikes_rates, rates are in spikes/ms, in total or per neuron if mode="mean".
+
+    _events_reader = "online_spikes_rates"
+
+    def __init__(self, spiking_network, population_devices=None, regions=None, mode="total",
+                 kernel="sliding", kernel_width=10.0, n_samples=100000,
+                 name="Online spikes rates from Spiking Network"):
+        self.spiking_network = spiking_network
+        self.population_devices = population_devices
+        self.regions = regions
+        self.mode = mode
+        self.kernel = kernel
+        self.kernel_width = kernel_width
+        self.n_samples = n_samples
+        self.name = name
+        self.spike_detectors = None
+        self.time = 0.0
+        self.n_updates = 0
+        self._populations_labels = []
+        self._regions_labels = []
+        self._devices = []
+        self._number_of_neurons = None
+        self._times = None
+        self._rates = None
+        self._rate = None
+        self._counts = None
+        self._durations = None
+
+    def configure(self, time_step, start_time=0.0):
+        # time_step is the expected time between updates, i.e., the synchronization time of the co-simulation
+        if self.kernel not in ["sliding", "exponential"]:
+            raise_value_error("Online spikes rates' kernel %s is neither 'sliding' nor 'exponential'!"
+                              % str(self.kernel))
+        self.spike_detectors = self.spiking_network.get_spikes_devices(self.population_devices, self.regions)
+        self._populations_labels = list(self.spike_detectors.index)
+        self._regions_labels = []
+        for pop_device in self.spike_detectors.values:
+            for reg_label in pop_device.index:
+                if reg_label not in self._regions_labels:
+                    self._regions_labels.append(reg_label)
+        n_pops = len(self._populations_labels)
+        n_regions = len(self._regions_labels)
+        # A flat list of (population index, region index, device):
+        self._devices = []
+        for i_pop, pop_device in enumerate(self.spike_detectors.values):
+            for reg_label, device in pop_device.iteritems():
+                self._devices.append((i_pop, self._regions_labels.index(reg_label), device))
+        self._number_of_neurons = np.ones((n_pops, n_regions))
+        if self.mode == "mean":
+            # The connectivity doesn't change during simulation, so we count the neurons only once
+            for i_pop, i_region, device in self._devices:
+                self._number_of_neurons[i_pop, i_region] = np.maximum(1, device.number_of_neurons)
+        # Spikes' counts and durations of the updates in the sliding window:
+        n_window = int(np.maximum(1, np.round(self.kernel_width / time_step)))
+        self._counts = np.zeros((n_window, n_pops, n_regions))
+        self._durations = np.zeros((n_window, ))
+        self._rate = np.zeros((n_pops, n_regions))
+        self._times = np.zeros((self.n_samples, ))
+        self._rates = np.zeros((self.n_samples, n_pops, n_regions))
+        self.time = start_time
+        self.n_updates = 0
+        # Start counting from now on:
+        for _, _, device in self._devices:
+            device.number_of_new_spikes(self._events_reader)
+        return self
+
+    def update(self, duration):
+        # Count the spikes recorded during the last duration (ms) and update the rates
+        counts = np.zeros(self._rate.shape)
+        for i_pop, i_region, device in self._devices:
+            counts[i_pop, i_region] = device.number_of_new_spikes(self._events_reader)
+        counts /= self._number_of_neurons
+        self.time += duration
+        if self.kernel == "sliding":
+            i_window = self.n_updates % self._durations.shape[0]
+            self._counts[i_window] = counts
+            self._durations[i_window] = duration
+            self._rate = np.sum(self._counts, axis=0) / np.sum(self._durations)
+        else:
+            decay = np.exp(-duration / self.kernel_width)
+            self._rate = decay * self._rate + counts / self.kernel_width
+        i_sample = self.n_updates % self.n_samples
+        self._times[i_sample] = self.time
+        self._rates[i_sample] = self._rate
+        self.n_updates += 1
+        return self._rate
+
+    @property
+    def rate(self):
+        # The current rates (Population x Region)
+        return self._rate
+
+    def _samples_order(self):
+        # The ring buffer's samples in time order
+        n_samples = np.minimum(self.n_updates, self.n_samples)
+        return (np.arange(n_samples) + self.n_updates - n_samples) % self.n_samples
+
+    @property
+    def times(self):
+        return self._times[self._samples_order()]
+
+    @property
+    def rates(self):
+        # The rates' time series as a (Time x Population x Region) DataArray,
+        # as SpikingNetwork.compute_spikes_rates returns them
+        coords = OrderedDict()
+        coords["Time"] = self.times
+        coords["Population"] = self._populations_labels
+        coords["Region"] = self._regions_labels
+        return xr.DataArray(self._rates[self._samples_order()], coords=coords, dims=list(coords.keys()),
+                            name=self.name)
+
+    def to_TimeSeries(self, time_series):
+        # Convert to a TimeSeries object, e.g., TimeSeries() or TimeSeriesRegion(connectivity=connectivity)
+        return time_series.from_xarray_DataArray(self.rates)
+
+    def to_Series(self):
+        # The rates' time series per population
+        rates = self.rates
+        return pd.Series([rates.sel(Population=pop_label) for pop_label in self._populations_labels],
+                         index=pd.Index(self._populations_labels, name="Population"), name=self.name)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+
+import numpy as np
+
+from tvb_scripts.utils.data_structures_utils import flatten_list
+
+
+class SpikeTrainStore(object):
+
+    # This class stores the spikes' events of a device in a compressed sparse row (CSR) format:
+    # the spikes' times of neuron neurons[i] are times[indptr[i]:indptr[i+1]], sorted in time.
+    # It is built with a single sort of the events,
+    # so that per neuron, per time window and per population queries are array slices.
+
+    def __init__(self, senders, times):
+        senders = np.asarray(senders).flatten()
+        times = np.asarray(times, dtype="float64").flatten()
+        order = np.lexsort((times, senders))
+        self.times = times[order]
+        sorted_senders = senders[order]
+        self.neurons, starts = np.unique(sorted_senders, return_index=True)
+        self.indptr = np.append(starts, len(self.times)).astype("i")
+        self._population_times = None
+        self._times_order = None
+
+    @property
+    def number_of_neurons(self):
+        return len(self.neurons)
+
+    @property
+    def number_of_spikes(self):
+        return len(self.times)
+
+    @property
+    def senders(self):
+        # The senders of the stored spikes, in the order of self.times
+        return np.repeat(self.neurons, np.diff(self.indptr))
+
+    @property
+    def population_times(self):
+        # All spikes' times sorted in time
+        if self._population_times is None:
+            self._times_order = np.argsort(self.times, kind="mergesort")
+            self._population_times = self.times[self._times_order]
+        return self._population_times
+
+    def _neuron_slice(self, neuron, time_range=None):
+        i_neuron = np.searchsorted(self.neurons, neuron)
+        if i_neuron >= len(self.neurons) or self.neurons[i_neuron] != neuron:
+            return slice(0, 0)
+        start, stop = self.indptr[i_neuron], self.indptr[i_neuron + 1]
+        if time_range is not None:
+            start, stop = start + np.searchsorted(self.times[start:stop], time_range[:2], side="left")
+        return slice(start, stop)
+
+    def _select_neurons(self, neurons=None, exclude_neurons=[]):
+        if neurons is None:
+            neurons = self.neurons
+        else:
+            neurons = np.unique(flatten_list(neurons))
+        if len(exclude_neurons) > 0:
+            neurons = neurons[~np.isin(neurons, flatten_list(exclude_neurons))]
+        return neurons
+
+    @staticmethod
+    def _filter_times(spikes_times, times=None, exclude_times=[]):
+        if times is not None:
+            spikes_times = spikes_times[np.isin(spikes_times, flatten_list(times))]
+        if len(exclude_times) > 0:
+            spikes_times = spikes_times[~np.isin(spikes_times, flatten_list(exclude_times))]
+        return spikes_times
+
+    def get_spikes_times(self, neuron, time_range=None):
+        return self.times[self._neuron_slice(neuron, time_range)]
+
+    def get_number_of_spikes(self, neuron, time_range=None):
+        neuron_slice = self._neuron_slice(neuron, time_range)
+        return neuron_slice.stop - neuron_slice.start
+
+    def get_spikes_times_by_neurons(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[],
+                                    time_range=None):
+        spikes_times = OrderedDict()
+        for neuron in self._select_neurons(neurons, exclude_neurons).tolist():
+            spikes_times[neuron] = self._filter_times(self.get_spikes_times(neuron, time_range),
+                                                      times, exclude_times)
+        return spikes_times
+
+    def get_spikes_neurons_by_times(self, neurons=None, times=None, exclude_neurons=[], exclude_times=[],
+                                    time_range=None):
+        population_times = self.population_times
+        senders = self.senders[self._times_order]
+        inds = np.ones(population_times.shape, dtype="bool")
+        if neurons is not None or len(exclude_neurons) > 0:
+            inds = np.isin(senders, self._select_neurons(neurons, exclude_neurons))
+        if time_range is not None:
+            inds = np.logical_and(inds, np.logical_and(population_times >= time_range[0],
+                                                       population_times < time_range[1]))
+        population_times = population_times[inds]
+        senders = senders[inds]
+        unique_times, starts = np.unique(population_times, return_index=True)
+        stops = np.append(starts[1:], len(population_times))
+        spikes_neurons = OrderedDict()
+        for time, start, stop in zip(unique_times.tolist(), starts, stops):
+            spikes_neurons[time] = np.sort(senders[start:stop])
+        if times is not None or len(exclude_times) > 0:
+            for time in list(spikes_neurons.keys()):
+                if len(self._filter_times(np.array([time]), times, exclude_times)) == 0:
+                    del spikes_neurons[time]
+        return spikes_neurons
+
+    def get_population_spikes_times(self, time_range=None):
+        population_times = self.population_times
+        if time_range is not None:
+            population_times = \
+                population_times[slice(*np.searchsorted(population_times, time_range[:2], side="left"))]
+        return population_times
+
+    def get_population_number_of_spikes(self, time_range=None):
+        return len(self.get_population_spikes_times(time_range))
+
+    def get_spikes_counts(self, neurons=None, exclude_neurons=[], time_range=None):
+        # Number of spikes per neuron, in the order of the selected neurons
+        neurons = self._select_neurons(neurons, exclude_neurons)
+        return neurons, np.array([self.get_number_of_spikes(neuron, time_range) for neuron in neurons.tolist()])
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+# Performance benchmarks of the multiscale hot paths, based on pytest-benchmark.
+# Every benchmark is parametrized across one or more scaling axes
+# (number of neurons, regions, events or time steps), in order to track how performance scales.
+# Run them, from the repository's root, with
+#   tox -e benchmark-baseline  to store a new baseline, named "baseline", for this machine,
+#   tox -e benchmark  to compare against the stored baseline,
+#                     failing if the mean time of any benchmark regresses more than the threshold set in tox.ini.
+# The benchmarks are marked as slow, so that they are deselected by the usual test runs with -m "not slow".
+
+from importlib.util import find_spec
+
+import pytest
+
+if find_spec("pytest_benchmark") is None:
+    # The benchmarks cannot run without the benchmark fixture of pytest-benchmark
+    collect_ignore_glob = ["test_*.py"]
+
+
+def pytest_collection_modifyitems(config, items):
+    for item in items:
+        if item.get_closest_marker("benchmark") is not None:
+            item.add_marker(pytest.mark.slow)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+import numpy as np
+from tvb_multiscale.spiking_models.devices import SpikeDetector, Multimeter
+from tvb_multiscale.spiking_models.builders.templates import tvb_weight, tvb_delay
+from tvb_multiscale.numpy_models.simulator import NumPySpikingSimulator
+from tvb_multiscale.numpy_models.builders.base import NumPyModelBuilder
+
+
+# Synthetic events and devices, so that the output devices' hot paths can be benchmarked
+# for any number of neurons, events and time steps, without running any spiking simulator,
+# and a synthetic TVB simulator, for Spiking Network builders of any number of regions.
+
+
+def synthetic_spikes_events(n_neurons, n_events, t_stop=1000.0, first_neuron=1, seed=0):
+    # Spike events of n_neurons neurons, in time order, as recorded by a spike detector
+    rng = np.random.RandomState(seed)
+    times = np.sort(np.round(rng.uniform(0.0, t_stop, size=(n_events, )), 1))
+    senders = rng.randint(first_neuron, first_neuron + n_neurons, size=(n_events, ))
+    return OrderedDict([("times", times), ("senders", senders)])
+
+
+def synthetic_multimeter_events(n_neurons, n_steps, variables=["V_m", "g_ex"], dt=1.0, first_neuron=1, seed=0):
+    # Continuous events of n_neurons neurons sampled at n_steps times, in time order, as recorded by a multimeter
+    rng = np.random.RandomState(seed)
+    events = OrderedDict()
+    events["times"] = np.repeat(dt * np.arange(1, n_steps + 1), n_neurons)
+    events["senders"] = np.tile(np.arange(first_neuron, first_neuron + n_neurons), n_steps)
+    for var in variables:
+        events[var] = rng.normal(size=(n_steps * n_neurons, ))
+    return events
+
+
+class SyntheticDeviceMixin(object):
+
+    # A device that just holds some events and the neurons it is connected to
+
+    _events = None
+    _neurons = ()
+
+    def _assert_device(self):
+        pass
+
+    def Get(self, attr=None):
+        return {"events": self._events, "n_events": self.number_of_events}
+
+    def Set(self, values_dict):
+        pass
+
+    def _get_connections(self, **kwargs):
+        return tuple()
+
+    def GetFromConnections(self, connections, attr=None):
+        return {}
+
+    def SetToConnections(self, connections, values_dict):
+        pass
+
+    @property
+    def events(self):
+        return self._events
+
+    @property
+    def number_of_events(self):
+        return len(self._events["times"])
+
+    @property
+    def reset(self):
+        self._events = OrderedDict([(key, val[:0]) for key, val in self._events.items()])
+        self.reset_events_cursors()
+
+    @property
+    def neurons(self):
+        return self._neurons
+
+
+class SyntheticSpikeDetector(SyntheticDeviceMixin, SpikeDetector):
+
+    def __init__(self, events, neurons):
+        super(SyntheticSpikeDetector, self).__init__(None)
+        self._events = events
+        self._neurons = tuple(neurons)
+
+
+class SyntheticMultimeter(SyntheticDeviceMixin, Multimeter):
+
+    def __init__(self, events, neurons):
+        super(SyntheticMultimeter, self).__init__(None)
+        self._events = events
+        self._neurons = tuple(neurons)
+
+    @property
+    def record_from(self):
+        return [key for key in self._events.keys() if key not in ["times", "senders"]]
+
+
+def synthetic_spike_detector(n_neurons, n_events, t_stop=1000.0, seed=0):
+    return SyntheticSpikeDetector(synthetic_spikes_events(n_neurons, n_events, t_stop, seed=seed),
+                                  np.arange(1, n_neurons + 1))
+
+
+def synthetic_multimeter(n_neurons, n_steps, variables=["V_m", "g_ex"], dt=1.0, seed=0):
+    return SyntheticMultimeter(synthetic_multimeter_events(n_neurons, n_steps, variables, dt, seed=seed),
+                               np.arange(1, n_neurons + 1))
+
+
+class Connectivity(object):
+
+    def __init__(self, n_regions):
+        self.number_of_regions = n_regions
+        self.region_labels = np.array(["region%d" % i_region for i_region in range(n_regions)])
+        self.weights = np.random.uniform(size=(n_regions, n_regions))
+        self.delays = np.random.uniform(1.0, 20.0, size=(n_regions, n_regions))
+        self.centres = None
+
+    def configure(self):
+        pass
+
+
+class Monitor(object):
+    period = 1.0
+
+
+class Integrator(object):
+    dt = 0.1
+
+
+class TVBSimulator(object):
+    # Only what a spiking network builder needs to know about the TVB simulator
+
+    def __init__(self, n_regions):
+        self.connectivity = Connectivity(n_regions)
+        self.monitors = [Monitor()]
+        self.integrator = Integrator()
+        self.model = None
+
+
+def create_builder(n_regions, population_order, batch_nodes_connections=False):
+    builder = NumPyModelBuilder(TVBSimulator(n_regions), np.arange(n_regions),
+                                spiking_simulator=NumPySpikingSimulator(0.1))
+    builder.batch_nodes_connections = batch_nodes_connections
+    builder.population_order = population_order
+    builder.populations = [{"label": "E", "model": "iaf_cond_exp", "params": {}, "scale": 0.8, "nodes": None},
+                           {"label": "I", "model": "iaf_cond_exp", "params": {}, "scale": 0.2, "nodes": None}]
+    builder.populations_connections = \
+        [{"source": "E", "target": ["E", "I"], "model": "static_synapse",
+          "conn_spec": {"rule": "fixed_indegree", "indegree": 10},
+          "weight": 1.0, "delay": 0.05, "receptor_type": 0, "nodes": None},
+         {"source": "I", "target": ["E", "I"], "model": "static_synapse",
+          "conn_spec": {"rule": "fixed_indegree", "indegree": 10},
+          "weight": -2.0, "delay": 0.05, "receptor_type": 0, "nodes": None}]
+    builder.nodes_connections[0].update(
+        {"conn_spec": {"rule": "fixed_indegree", "indegree": 5},
+         "weight": lambda source_node, target_node: tvb_weight(source_node, target_node, builder.tvb_weights),
+         "delay": lambda source_node, target_node: tvb_delay(source_node, target_node, builder.tvb_delays)})
+    return builder
+
+
+def configure_builder(n_regions, population_order, batch_nodes_connections=False):
+    # Return the arguments of the benchmarked connection methods, i.e., a builder with its spiking nodes built
+    builder = create_builder(n_regions, population_order, batch_nodes_connections)
+    builder.configure()
+    builder.build_spiking_nodes()
+    return (builder, ), {}
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+pytest.importorskip("tvb")
+
+from tvb_multiscale.numpy_models.builders.base import NumPyModelBuilder
+from tvb_multiscale.tests.benchmarks.synthetic_data import create_builder, configure_builder
+
+
+pytestmark = pytest.mark.benchmark(group="builders")
+
+
+N_REGIONS = [2, 10, 68]
+POPULATIONS_ORDER = [10, 100]
+
+
+@pytest.mark.parametrize("n_regions", N_REGIONS)
+@pytest.mark.parametrize("population_order", POPULATIONS_ORDER)
+def test_connect_within_node_spiking_populations(benchmark, n_regions, population_order):
+    # A new network is built before every round, so that only the connections' generation is timed:
+    benchmark.pedantic(NumPyModelBuilder.connect_within_node_spiking_populations,
+                       setup=lambda: configure_builder(n_regions, population_order), rounds=5)
+
+
+@pytest.mark.parametrize("n_regions", N_REGIONS)
+@pytest.mark.parametrize("population_order", POPULATIONS_ORDER)
+@pytest.mark.parametrize("batch_nodes_connections", [False, True])
+def test_connect_spiking_nodes(benchmark, n_regions, population_order, batch_nodes_connections):
+    benchmark.pedantic(NumPyModelBuilder.connect_spiking_nodes,
+                       setup=lambda: configure_builder(n_regions, population_order, batch_nodes_connections),
+                       rounds=5)
+
+
+@pytest.mark.parametrize("n_regions", N_REGIONS)
+def test_build_spiking_network(benchmark, n_regions):
+    network = benchmark.pedantic(NumPyModelBuilder.build_spiking_network,
+                                 setup=lambda: ((create_builder(n_regions, 10), ), {}), rounds=5)
+    assert len(network.region_nodes) == n_regions
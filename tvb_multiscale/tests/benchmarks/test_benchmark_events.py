@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import numpy as np
+from tvb_scripts.utils.data_structures_utils import sort_events_by_x_and_y, data_xarray_from_continuous_events
+from tvb_multiscale.tests.benchmarks.synthetic_data import \
+    synthetic_spikes_events, synthetic_multimeter_events, synthetic_spike_detector, synthetic_multimeter
+
+
+pytestmark = pytest.mark.benchmark(group="events")
+
+
+N_NEURONS = [100, 1000, 10000]
+N_EVENTS = [10000, 100000, 1000000]
+N_STEPS = [10, 100, 1000]
+
+
+@pytest.mark.parametrize("n_events", N_EVENTS)
+def test_filter_events(benchmark, n_events):
+    spike_detector = synthetic_spike_detector(1000, n_events)
+    neurons = np.arange(1, 501)
+    output = benchmark(spike_detector.filter_events, None, ["senders", "times"], neurons=neurons,
+                       exclude_neurons=[1, 2], time_range=(100.0, 900.0))
+    assert np.all(np.isin(output["senders"], neurons[2:]))
+
+
+@pytest.mark.parametrize("n_neurons", N_NEURONS)
+@pytest.mark.parametrize("n_events", N_EVENTS)
+def test_sort_events_by_x_and_y(benchmark, n_neurons, n_events):
+    events = synthetic_spikes_events(n_neurons, n_events)
+    sorted_events = benchmark(sort_events_by_x_and_y, events)
+    assert np.sum([len(times) for times in sorted_events.values()]) == n_events
+
+
+@pytest.mark.parametrize("n_neurons", N_NEURONS)
+@pytest.mark.parametrize("n_steps", N_STEPS)
+@pytest.mark.parametrize("reduction", [None, "mean"])
+def test_data_xarray_from_continuous_events(benchmark, n_neurons, n_steps, reduction):
+    events = synthetic_multimeter_events(n_neurons, n_steps)
+    times = events.pop("times")
+    senders = events.pop("senders")
+    data = benchmark(data_xarray_from_continuous_events, events, times, senders, reduction=reduction)
+    assert data.shape[-1] == n_steps
+
+
+@pytest.mark.parametrize("n_neurons", N_NEURONS)
+@pytest.mark.parametrize("n_steps", N_STEPS)
+def test_multimeter_current_data(benchmark, n_neurons, n_steps):
+    multimeter = synthetic_multimeter(n_neurons, n_steps)
+    data = benchmark(multimeter.current_data_mean_values)
+    assert len(data) == 2
+
+
+@pytest.mark.parametrize("n_neurons", N_NEURONS)
+@pytest.mark.parametrize("n_events", N_EVENTS)
+@pytest.mark.parametrize("mode", ["per_neuron", "total"])
+def test_compute_spikes_rate_across_time(benchmark, n_neurons, n_events, mode):
+    spike_detector = synthetic_spike_detector(n_neurons, n_events)
+    time = np.arange(0.0, 1000.0, 1.0)
+    rates = benchmark(spike_detector.compute_spikes_rate_across_time, time, 10.0, 10, mode=mode)
+    assert rates.shape[-1] == len(time)
+
+
+@pytest.mark.parametrize("n_neurons", N_NEURONS)
+@pytest.mark.parametrize("n_events", N_EVENTS)
+def test_get_spikes_times_by_neurons(benchmark, n_neurons, n_events):
+    spike_detector = synthetic_spike_detector(n_neurons, n_events)
+    spikes_times = benchmark(spike_detector.get_spikes_times_by_neurons, full_senders=True)
+    assert len(spikes_times) == n_neurons
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import numpy as np
+from pandas import Series
+
+pytest.importorskip("tvb")
+
+from tvb_multiscale.interfaces.base import TVBSpikeNetInterface
+from tvb_multiscale.interfaces.tvb_to_spikeNet_device_interface import TVBtoSpikeNetDeviceInterface
+from tvb_multiscale.interfaces.spikeNet_to_tvb_interface import SpikeNetToTVBinterface
+from tvb_multiscale.numpy_models.simulator import NumPySpikingSimulator
+from tvb_multiscale.numpy_models.network import NumPyNetwork
+from tvb_multiscale.numpy_models.devices import NumPyPoissonGenerator, NumPySpikeDetector, \
+    NumPyInputDeviceDict, NumPyOutputDeviceDict, NumPyOutputSpikeDeviceDict
+
+
+pytestmark = pytest.mark.benchmark(group="interfaces")
+
+
+N_REGIONS = [1, 10, 100]
+N_STEPS = [1, 10, 100]
+
+
+class TVBtoNumPyPoissonGeneratorInterface(TVBtoSpikeNetDeviceInterface):
+
+    def set(self, values):
+        values = np.array(values)
+        if values.ndim > 1:
+            values = values.mean(axis=-1)
+        self.Set({"rate": np.maximum(0.0, values)})
+
+
+class TVBNumPyInterface(TVBSpikeNetInterface):
+    _available_input_devices = NumPyInputDeviceDict.keys()
+    _spike_rate_input_devices = ["poisson_generator"]
+    _available_output_devices = NumPyOutputDeviceDict.keys()
+    _spike_rate_output_devices = NumPyOutputSpikeDeviceDict.keys()
+
+
+class RWWModel(object):
+    state_variables = ["S_e", "S_i", "R_e", "R_i"]
+
+
+def build_interface(n_regions, n_neurons=10, dt=0.1):
+    # One Poisson generator and one spike detector per region node,
+    # each of which is connected to a population of n_neurons neurons
+    simulator = NumPySpikingSimulator(0.1)
+    input_devices = Series()
+    output_devices = Series()
+    for i_region in range(n_regions):
+        neurons = simulator.Create("iaf_cond_exp", n_neurons)
+        poisson_generator = simulator.Create("poisson_generator")
+        spike_detector = simulator.Create("spike_detector")
+        simulator.Connect(poisson_generator, neurons, syn_spec={"weight": 10.0})
+        simulator.Connect(neurons, spike_detector)
+        input_devices["region%d" % i_region] = NumPyPoissonGenerator(poisson_generator, simulator)
+        output_devices["region%d" % i_region] = NumPySpikeDetector(spike_detector, simulator)
+    simulator.Prepare()
+    spiking_network = NumPyNetwork(simulator)
+    nodes_ids = list(range(n_regions))
+    interface = TVBNumPyInterface()
+    interface.spiking_network = spiking_network
+    interface.spiking_nodes_ids = nodes_ids
+    interface.dt = dt
+    interface.tvb_to_spikeNet_interfaces = \
+        [TVBtoNumPyPoissonGeneratorInterface(spiking_network, "S_e", "poisson_generator", dt, 0,
+                                             nodes_ids, nodes_ids, device_set=input_devices)]
+    interface.spikeNet_to_tvb_interfaces = \
+        [SpikeNetToTVBinterface(spiking_network, "R_e", "spike_detector", 2, nodes_ids, device_set=output_devices)]
+    interface.transforms_weights = {"tvb_to_spike_rate": 10000.0 * np.ones((n_regions, )),
+                                    "spikes_to_tvb": np.ones((n_regions, )) / dt}
+    interface.configure(RWWModel())
+    return interface, simulator
+
+
+@pytest.mark.parametrize("n_regions", N_REGIONS)
+@pytest.mark.parametrize("n_steps", N_STEPS)
+def test_tvb_state_to_spikeNet(benchmark, n_regions, n_steps):
+    interface, simulator = build_interface(n_regions)
+    state = np.random.uniform(size=(n_steps, 4, n_regions, 1))
+    coupling = np.random.uniform(size=(n_steps, 1, n_regions, 1))
+    benchmark(interface.tvb_state_to_spikeNet, state, coupling, None, interface.tvb_model)
+    rates = interface.tvb_to_spikeNet_interfaces[0].Get("rate")["rate"]
+    assert np.allclose(rates, 10000.0 * state[:, 0, :, 0].mean(axis=0))
+
+
+@pytest.mark.parametrize("n_regions", N_REGIONS)
+def test_read_spikeNet_values(benchmark, n_regions):
+    interface, simulator = build_interface(n_regions)
+    interface.tvb_state_to_spikeNet(np.ones((4, n_regions, 1)), np.ones((1, n_regions, 1)), None,
+                                    interface.tvb_model)
+    # Only the reading is timed, after the spiking simulator has recorded some new spikes:
+    benchmark.pedantic(interface.read_spikeNet_values, args=(0, 10), setup=lambda: simulator.Run(1.0), rounds=100)
+    assert np.all(interface.spikeNet_values_buffers[0][0] >= 0.0)
+
+
+@pytest.mark.parametrize("n_regions", N_REGIONS)
+def test_spikeNet_state_to_tvb_state(benchmark, n_regions):
+    interface, simulator = build_interface(n_regions)
+    interface.read_spikeNet_values(0, 10)
+    state = np.zeros((4, n_regions, 1))
+    benchmark(interface.spikeNet_state_to_tvb_state, state, 0)
+    assert np.allclose(state[2, :, 0], interface.spikeNet_values_buffers[0][0])
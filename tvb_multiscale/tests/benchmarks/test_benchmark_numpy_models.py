@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import numpy as np
+from pandas import Series
+from tvb_multiscale.spiking_models.devices import DeviceSet
+from tvb_multiscale.numpy_models.simulator import NumPySpikingSimulator
+from tvb_multiscale.numpy_models.devices import NumPyPoissonGenerator
+
+
+pytestmark = pytest.mark.benchmark(group="numpy_models")
+
+
+N_NEURONS = [100, 1000, 10000]
+N_REGIONS = [1, 10, 100]
+N_STEPS = [10, 100, 1000]
+
+
+def build_network(n_neurons, use_numba=False):
+    simulator = NumPySpikingSimulator(0.1, rng_seed=0, use_numba=use_numba)
+    E = simulator.Create("iaf_cond_exp", int(0.8 * n_neurons))
+    I = simulator.Create("iaf_cond_exp", n_neurons - len(E))
+    poisson_generator = simulator.Create("poisson_generator", params={"rate": 8000.0})
+    spike_detector = simulator.Create("spike_detector")
+    simulator.Connect(E, E + I, {"rule": "fixed_indegree", "indegree": 10}, {"weight": 1.0, "delay": 1.0})
+    simulator.Connect(I, E + I, {"rule": "fixed_indegree", "indegree": 10}, {"weight": -5.0, "delay": 0.5})
+    simulator.Connect(poisson_generator, E + I, syn_spec={"weight": 2.0, "delay": 0.1})
+    simulator.Connect(E + I, spike_detector)
+    simulator.Prepare()
+    return simulator
+
+
+@pytest.mark.parametrize("n_neurons", N_NEURONS)
+@pytest.mark.parametrize("n_steps", N_STEPS)
+@pytest.mark.parametrize("use_numba", [False, True])
+def test_numpy_spiking_simulator_run(benchmark, n_neurons, n_steps, use_numba):
+    simulator = build_network(n_neurons, use_numba)
+    # Compile any Numba kernels before benchmarking:
+    simulator.Run(0.1)
+    time = simulator.time
+    benchmark(simulator.Run, n_steps * 0.1)
+    assert simulator.time > time
+
+
+def build_poisson_generators_set(n_regions, n_neurons=10):
+    simulator = NumPySpikingSimulator(0.1)
+    device_set = Series()
+    for i_region in range(n_regions):
+        neurons = simulator.Create("iaf_cond_exp", n_neurons)
+        device = simulator.Create("poisson_generator", params={"rate": 0.0})
+        simulator.Connect(device, neurons)
+        device_set["region%d" % i_region] = NumPyPoissonGenerator(device, simulator)
+    simulator.Prepare()
+    return DeviceSet("Stimulus", "poisson_generator", device_set)
+
+
+@pytest.mark.parametrize("n_regions", N_REGIONS)
+def test_device_set_set(benchmark, n_regions):
+    device_set = build_poisson_generators_set(n_regions)
+    rates = np.arange(n_regions) * 100.0
+    benchmark(device_set.Set, {"rate": rates})
+    assert np.allclose(device_set.Get("rate")["rate"], rates)
+
+
+@pytest.mark.parametrize("n_regions", N_REGIONS)
+def test_device_set_get(benchmark, n_regions):
+    device_set = build_poisson_generators_set(n_regions)
+    rates = benchmark(device_set.Get, "rate")["rate"]
+    assert len(rates) == n_regions
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import numpy as np
+
+pytest.importorskip("tvb")
+
+from tvb.simulator import coupling, integrators
+from tvb.simulator.history import SparseHistory
+from tvb_multiscale.simulator_tvb_deprecated.models.reduced_wong_wang_exc_io_inh_i import ReducedWongWangExcIOInhI
+from tvb_multiscale.simulator_tvb_deprecated.models.generic_2d_oscillator_multiscale import Generic2dOscillator
+from tvb_multiscale.simulator_tvb_deprecated.models.wilson_cowan_constraint import WilsonCowan
+from tvb_multiscale.simulator_tvb_deprecated.coupling_kernels import build_delayed_coupling_kernel
+from tvb_multiscale.simulator_tvb_deprecated.integration_kernels import build_integration_kernel
+
+
+pytestmark = pytest.mark.benchmark(group="tvb_models")
+
+
+N_REGIONS = [68, 1000, 10000]
+
+
+def configure_model(model_class, n_regions):
+    model = model_class()
+    model.configure()
+    state = np.random.uniform(size=(model.nvar, n_regions, 1))
+    coupling = np.random.uniform(size=(len(model.cvar), n_regions, 1))
+    return model, state, coupling
+
+
+@pytest.mark.parametrize("n_regions", N_REGIONS)
+@pytest.mark.parametrize("model_class", [ReducedWongWangExcIOInhI, Generic2dOscillator, WilsonCowan])
+def test_model_dfun(benchmark, model_class, n_regions):
+    model, state, coupling = configure_model(model_class, n_regions)
+    # Compile any Numba kernels before benchmarking:
+    model.dfun(state, coupling)
+    dstate = benchmark(model.dfun, state, coupling)
+    assert dstate.shape == state.shape
+
+
+@pytest.mark.parametrize("n_regions", N_REGIONS)
+@pytest.mark.parametrize("use_numba", [False, True])
+def test_rwwei_update_non_state_variables(benchmark, n_regions, use_numba):
+    model, state, coupling = configure_model(ReducedWongWangExcIOInhI, n_regions)
+    model.update_non_state_variables(state, coupling, use_numba=use_numba)
+    state = benchmark(model.update_non_state_variables, state, coupling, use_numba=use_numba)
+    assert np.all(np.isfinite(state))
+
+
+@pytest.mark.parametrize("n_regions", N_REGIONS)
+@pytest.mark.parametrize("fused_integration", [False, True])
+def test_rwwei_heun_step(benchmark, n_regions, fused_integration):
+    model, state, coupling = configure_model(ReducedWongWangExcIOInhI, n_regions)
+    integrator = integrators.HeunDeterministic(dt=0.1)
+    integrator.configure()
+    if fused_integration:
+        kernel = build_integration_kernel(integrator, model, state.shape)
+
+        def heun_step(state):
+            return kernel.update_state(kernel.scheme(state, coupling), coupling)
+    else:
+
+        def heun_step(state):
+            return model.update_non_state_variables(integrator.scheme(state, model.dfun, coupling, 0.0, 0.0),
+                                                    coupling)
+    heun_step(state)
+    new_state = benchmark(heun_step, state)
+    assert new_state.shape == state.shape
+
+
+def sparse_history(n_regions, max_delay=100):
+    weights = np.random.uniform(size=(n_regions, n_regions))
+    weights[weights < 0.5] = 0.0
+    idelays = np.random.randint(0, max_delay + 1, size=(n_regions, n_regions))
+    history = SparseHistory(weights, idelays, np.array([0]), 1)
+    history.initialize(np.random.uniform(size=(history.n_time, 1, n_regions, 1)))
+    return history
+
+
+@pytest.mark.parametrize("n_regions", N_REGIONS[:2])
+@pytest.mark.parametrize("fused_coupling", [False, True])
+def test_delayed_coupling(benchmark, n_regions, fused_coupling):
+    history = sparse_history(n_regions)
+    coupling_function = coupling.Linear(a=np.array([0.1]))
+    state = np.random.uniform(size=(4, n_regions, 1))
+    if fused_coupling:
+        kernel = build_delayed_coupling_kernel(history, coupling_function)
+        kernel(1)
+
+        def update_history_and_couple(step):
+            return kernel.update_history_and_couple(step, state)
+    else:
+
+        def update_history_and_couple(step):
+            history.update(step, state)
+            return coupling_function(step + 1, history)
+    node_coupling = benchmark(update_history_and_couple, 1)
+    assert node_coupling.shape == (1, n_regions, 1)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+from tvb.datatypes.connectivity import Connectivity
+from tvb.simulator.simulator import Simulator
+from tvb.simulator import coupling, integrators, monitors
+from tvb_multiscale.simulator_tvb_deprecated.batch import parameters_grid, split_batches, set_parameters_batch
+from tvb_multiscale.simulator_tvb_deprecated.models.reduced_wong_wang_exc_io_inh_i import ReducedWongWangExcIOInhI
+from tvb_multiscale.simulator_tvb_deprecated.models.generic_2d_oscillator_multiscale import Generic2dOscillator
+from tvb_multiscale.simulator_tvb_deprecated.models.wilson_cowan_constraint import WilsonCowan
+
+
+N = 10
+
+
+def simulate(model, initial_conditions, weights, tract_lengths):
+    connectivity = Connectivity(weights=weights, tract_lengths=tract_lengths,
+                                region_labels=np.array(["r%d" % i for i in range(N)]),
+                                centres=np.zeros((N, 3)), speed=np.array([4.0]))
+    connectivity.configure()
+    simulator = Simulator(connectivity=connectivity, model=model, coupling=coupling.Linear(a=np.array([0.01])),
+                          integrator=integrators.HeunDeterministic(dt=0.1), monitors=(monitors.Raw(),),
+                          initial_conditions=initial_conditions)
+    simulator.configure()
+    return simulator.run(simulation_length=10.0)[0][1]
+
+
+def test_parameters_grid():
+    grid = parameters_grid(G=np.arange(5.0), lamda=[0.0, 1.0])
+    assert np.all(grid["G"] == np.repeat(np.arange(5.0), 2))
+    assert np.all(grid["lamda"] == np.tile([0.0, 1.0], 5))
+    batches = split_batches(grid, 4)
+    assert [batch["G"].size for batch in batches] == [4, 4, 2]
+    assert np.all(np.concatenate([batch["lamda"] for batch in batches]) == grid["lamda"])
+
+
+@pytest.mark.parametrize("model_class, parameters",
+                         [(ReducedWongWangExcIOInhI, dict(G=[1.0, 2.0], lamda=[0.0, 0.5])),
+                          (Generic2dOscillator, dict(I=[0.0, 0.5], tau=[1.0, 2.0])),
+                          (WilsonCowan, dict(P=[0.0, 0.5], c_ee=[12.0, 16.0]))])
+def test_batch_simulation(model_class, parameters):
+    grid = parameters_grid(**parameters)
+    weights = np.random.uniform(size=(N, N))
+    np.fill_diagonal(weights, 0.0)
+    tract_lengths = np.random.uniform(1.0, 20.0, size=(N, N))
+    model = model_class()
+    # The initial conditions cover the whole history, so that no random history is generated:
+    initial_conditions = np.random.uniform(0.0, 0.5, size=(100, model.nvar, N, 1))
+    assert set_parameters_batch(model, N, **grid) == 4
+    batch_results = simulate(model, np.repeat(initial_conditions, 4, axis=-1), weights, tract_lengths)
+    assert batch_results.shape[-1] == 4
+    for i_batch in range(4):
+        model = model_class(**dict([(name, np.array([values[i_batch]])) for name, values in grid.items()]))
+        assert np.allclose(simulate(model, initial_conditions, weights, tract_lengths)[..., 0],
+                           batch_results[..., i_batch])
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+from tvb_multiscale.tests.benchmarks.synthetic_data import configure_builder
+
+
+def test_nodes_connection_property_matrix():
+    builder = configure_builder(4, 10)[0][0]
+    weights = np.random.uniform(size=(4, 4))
+    sources = np.array([0, 2, 3])
+    targets = np.array([1, 2])
+    expected = weights[sources][:, targets].astype("f")
+    # A vectorized property, a property of scalar output for any input, and a property of a single node pair:
+    for property in [lambda source, target: weights[source, target],
+                     lambda source, target: np.sum(weights[source, target]),
+                     lambda source, target: weights[source, target] if source != target else weights[target, target]]:
+        assert np.allclose(builder._nodes_connection_property_matrix(property, sources, targets), expected)
+    # Values that are not numbers, e.g., distributions, are left to the Spiking Simulator:
+    assert builder._nodes_connection_property_matrix(lambda source, target: {"distribution": "normal"},
+                                                     sources, targets) is None
+
+
+@pytest.mark.parametrize("conn_spec, n_sources", [({"rule": "fixed_indegree", "indegree": 5}, 5),
+                                                   ({"rule": "all_to_all"}, 8)])
+def test_connect_spiking_nodes_batch(conn_spec, n_sources):
+    # The batched connections have to be the ones of the pairwise connections,
+    # apart from the ones of the pairs of nodes with zero weight, which are skipped.
+    # Sampled connections are explicit, all_to_all ones are left to the Spiking Simulator's rule.
+    n_regions = 10
+    connections = []
+    for batch_nodes_connections in [False, True]:
+        # The same TVB connectivity for both:
+        np.random.seed(0)
+        builder = configure_builder(n_regions, 10, batch_nodes_connections)[0][0]
+        builder.batch_connections_chunk_size = 100
+        builder._nodes_connections[0]["conn_spec"] = conn_spec
+        builder.tvb_simulator.connectivity.weights[0] = 0.0
+        spiking_simulator = builder.spiking_simulator
+        n_cons = spiking_simulator.number_of_connections
+        builder.connect_spiking_nodes()
+        connections.append(OrderedDict([(key, values[n_cons:]) for key, values in
+                                        spiking_simulator._get_connections_arrays().items()]))
+    n_targets = (n_regions - 1) * 8  # 8 excitatory neurons per node
+    assert connections[0]["source"].size == n_regions * n_targets * n_sources
+    assert connections[1]["source"].size == (n_regions - 1) * n_targets * n_sources
+    # ...with the same weights and delays:
+    connected = connections[0]["weight"] != 0.0
+    for key in ["weight", "delay"]:
+        assert connections[1][key].dtype == np.float64
+        assert np.array_equal(np.sort(connections[0][key][connected]), np.sort(connections[1][key]))
+
+
+if __name__ == "__main__":
+    test_nodes_connection_property_matrix()
+    test_connect_spiking_nodes_batch({"rule": "fixed_indegree", "indegree": 5}, 5)
+    test_connect_spiking_nodes_batch({"rule": "all_to_all"}, 8)
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import pytest
+from pandas import Series
+from tvb.datatypes.connectivity import Connectivity
+from tvb.simulator import coupling, integrators, monitors
+from tvb_multiscale.interfaces.base import TVBSpikeNetInterface
+from tvb_multiscale.interfaces.spikeNet_to_tvb_interface import SpikeNetToTVBinterface
+from tvb_multiscale.spiking_models.devices import DeviceSet
+from tvb_multiscale.numpy_models.simulator import NumPySpikingSimulator
+from tvb_multiscale.numpy_models.network import NumPyNetwork
+from tvb_multiscale.numpy_models.region_node import NumPyRegionNode
+from tvb_multiscale.numpy_models.devices import NumPySpikeDetector, \
+    NumPyInputDeviceDict, NumPyOutputDeviceDict, NumPyOutputSpikeDeviceDict
+from tvb_multiscale.simulator_tvb_deprecated.simulator import Simulator
+from tvb_multiscale.simulator_tvb_deprecated.models.reduced_wong_wang_exc_io_inh_i import ReducedWongWangExcIOInhI
+
+
+N = 4
+SPIKING_NODES = [0, 1]
+DT = 0.2
+
+
+class TVBNumPyInterface(TVBSpikeNetInterface):
+    _available_input_devices = NumPyInputDeviceDict.keys()
+    _available_output_devices = NumPyOutputDeviceDict.keys()
+    _spike_rate_output_devices = NumPyOutputSpikeDeviceDict.keys()
+
+
+def build_interface(n_neurons=20, deterministic=False):
+    # Spiking nodes of neurons driven only by Poisson generators,
+    # whose spikes set the TVB state variable S_e, a coupling variable.
+    # Deterministic spiking nodes are driven by DC generators instead, and have no refractory state.
+    spiking_simulator = NumPySpikingSimulator(0.1, rng_seed=0)
+    region_nodes = Series()
+    spike_detectors = Series()
+    for node_id in SPIKING_NODES:
+        if deterministic:
+            neurons = spiking_simulator.Create("iaf_cond_exp", n_neurons, params={"t_ref": 0.0})
+            generator = spiking_simulator.Create("dc_generator", params={"amplitude": 1000.0 + 200.0 * node_id})
+            spiking_simulator.Connect(generator, neurons)
+        else:
+            neurons = spiking_simulator.Create("iaf_cond_exp", n_neurons)
+            generator = spiking_simulator.Create("poisson_generator", params={"rate": 20000.0})
+            spiking_simulator.Connect(generator, neurons, syn_spec={"weight": 10.0})
+        region_nodes["region%d" % node_id] = NumPyRegionNode(spiking_simulator, "region%d" % node_id,
+                                                             Series({"E": neurons}))
+        spike_detector = spiking_simulator.Create("spike_detector")
+        spiking_simulator.Connect(neurons, spike_detector)
+        spike_detectors["region%d" % node_id] = NumPySpikeDetector(spike_detector, spiking_simulator)
+    output_devices = Series()
+    output_devices["E"] = DeviceSet("E", "spike_detector", spike_detectors)
+    spiking_network = NumPyNetwork(spiking_simulator, region_nodes, output_devices)
+    interface = TVBNumPyInterface()
+    interface.spiking_network = spiking_network
+    interface.spiking_nodes_ids = SPIKING_NODES
+    interface.exclusive_nodes = True
+    interface.tvb_to_spikeNet_interfaces = []
+    interface.spikeNet_to_tvb_interfaces = \
+        [SpikeNetToTVBinterface(spiking_network, "S_e_spikes", "spike_detector", 0, SPIKING_NODES,
+                                device_set=spike_detectors)]
+    interface.transforms_weights = {"spikes_to_tvb": 10.0 * np.ones((len(SPIKING_NODES), ))}
+    return interface
+
+
+def build_simulator(synchronization_time, pipelined=False, interface=None, seed=0,
+                    checkpoint_period=0.0, checkpoint_path="checkpoint.pkl", fused_coupling=False,
+                    fused_integration=False, n_initial_conditions=100, number_of_modes=1):
+    np.random.seed(seed)
+    weights = np.random.uniform(size=(N, N))
+    np.fill_diagonal(weights, 0.0)
+    connectivity = Connectivity(weights=weights, tract_lengths=np.random.uniform(10.0, 20.0, size=(N, N)),
+                                region_labels=np.array(["r%d" % i for i in range(N)]),
+                                centres=np.zeros((N, 3)), speed=np.array([4.0]))
+    connectivity.configure()
+    model = ReducedWongWangExcIOInhI()
+    model.number_of_modes = number_of_modes
+    initial_conditions = None
+    if n_initial_conditions:
+        initial_conditions = np.random.uniform(0.0, 0.2,
+                                               size=(n_initial_conditions, model.nvar, N, number_of_modes))
+    simulator = Simulator(connectivity=connectivity, model=model, coupling=coupling.Linear(a=np.array([0.1])),
+                          integrator=integrators.HeunDeterministic(dt=DT), monitors=(monitors.Raw(),),
+                          initial_conditions=initial_conditions)
+    simulator.synchronization_time = synchronization_time
+    simulator.pipelined = pipelined
+    simulator.checkpoint_period = checkpoint_period
+    simulator.checkpoint_path = checkpoint_path
+    simulator.fused_coupling = fused_coupling
+    simulator.fused_integration = fused_integration
+    if interface is None:
+        interface = build_interface()
+    simulator.configure(interface)
+    return simulator
+
+
+def run_and_compare(synchronization_times, pipelined):
+    # The history of the spiking nodes' coupling variables should be the same for all simulations
+    results = []
+    for synchronization_time, pipeline in zip(synchronization_times, pipelined):
+        simulator = build_simulator(synchronization_time, pipeline)
+        assert simulator.synchronization_n_step == int(np.round(synchronization_time / DT))
+        assert simulator.pipelined == pipeline
+        data = simulator.run(simulation_length=20.0)[0][1]
+        results.append((simulator.history.buffer.copy(), data))
+    assert np.any(results[0][0][:, 0, SPIKING_NODES] > 0.0)
+    for history, data in results[1:]:
+        assert np.allclose(results[0][0], history)
+        # ...and so should the TVB nodes' state:
+        assert np.allclose(results[0][1][:, :, 2:], data[:, :, 2:])
+
+
+def test_synchronization_window_history():
+    run_and_compare([DT, 5 * DT], [False, False])
+
+
+def test_pipelined_history():
+    # Pipelined co-simulation writes the Spiking Network output to the history of the previous window
+    run_and_compare([5 * DT, 5 * DT], [False, True])
+
+
+@pytest.mark.parametrize("n_initial_conditions", [0, 3])
+def test_initial_history(n_initial_conditions):
+    # Only the coupling variables are kept in history, padded after any initial conditions shorter than the horizon,
+    # and the initial state is the last initial conditions' one
+    simulator = build_simulator(DT, n_initial_conditions=n_initial_conditions)
+    assert simulator.history.buffer.shape == (simulator.horizon, 1, N, 1)
+    assert simulator.current_step == max(0, n_initial_conditions - 1)
+    assert simulator.current_state.shape == (4, N, 1)
+    assert np.allclose(simulator.history.buffer[simulator.current_step % simulator.horizon],
+                       simulator.current_state[simulator.model.cvar])
+    # The non-state variables, i.e., the rates, are initialized from the state variables:
+    assert np.all(simulator.current_state[2:] > 0.0)
+
+
+def test_multiple_modes_with_spiking_nodes():
+    # Multiple modes, e.g., batches of parameters, are not supported for co-simulations with Spiking Network nodes
+    with pytest.raises(ValueError, match="Current modes number is 2"):
+        build_simulator(DT, number_of_modes=2)
+
+
+def test_pipelined_parameter_interface():
+    # Spiking Network output written to a TVB model parameter cannot be pipelined
+    interface = build_interface()
+    interface.spikeNet_to_tvb_interfaces[0].tvb_sv_id = None
+    simulator = build_simulator(5 * DT, True, interface)
+    assert not simulator.pipelined
+    assert simulator.synchronization_n_step == 5
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_resume_from_checkpoint(pipelined, tmpdir):
+    # A co-simulation resumed from a checkpoint should continue exactly as the uninterrupted one
+    checkpoint_path = os.path.join(str(tmpdir), "checkpoint.pkl")
+    simulator = build_simulator(5 * DT, pipelined, build_interface(deterministic=True),
+                                checkpoint_period=12.0, checkpoint_path=checkpoint_path)
+    # The checkpoint is written only once, at the end of the 12th synchronization window:
+    assert simulator.checkpoint_n_step == 60
+    time, data = simulator.run(simulation_length=20.0)[0]
+    spike_detector = simulator.tvb_spikeNet_interface.spiking_network.output_devices["E"]["region0"]
+    assert spike_detector.number_of_events > 0
+    resumed = build_simulator(5 * DT, pipelined, build_interface(deterministic=True))
+    resumed.load_checkpoint(checkpoint_path)
+    resumed_time, resumed_data = resumed.run(simulation_length=8.0)[0]
+    assert np.allclose(resumed_time, time[60:])
+    assert np.allclose(resumed_data, data[60:])
+    assert np.allclose(resumed.history.buffer, simulator.history.buffer)
+    # The Spiking Network continues from the time of the checkpoint, including the recordings before it:
+    resumed_network = resumed.tvb_spikeNet_interface.spiking_network
+    assert resumed_network.time == simulator.tvb_spikeNet_interface.spiking_network.time
+    resumed_spike_detector = resumed_network.output_devices["E"]["region0"]
+    assert resumed_spike_detector.number_of_events == spike_detector.number_of_events
+    assert np.allclose(resumed_spike_detector.events["times"], spike_detector.events["times"])
+
+
+def test_checkpoint_neurons_state_variables():
+    # The neurons' state variables are their recordables, unless configured per neurons' model
+    spiking_network = build_interface().spiking_network
+    neurons_state = spiking_network.get_state()["neurons"]["region0"]["E"]
+    assert list(neurons_state.keys()) == ["V_m", "g_ex", "g_in"]
+    assert neurons_state["V_m"].shape == (20, )
+    spiking_network = build_interface().spiking_network
+    spiking_network.checkpoint_neurons_variables = {"iaf_cond_exp": ["V_m"]}
+    assert list(spiking_network.get_state()["neurons"]["region1"]["E"].keys()) == ["V_m"]
+    # Variables that the neurons do not have are not skipped silently:
+    spiking_network = build_interface().spiking_network
+    spiking_network.checkpoint_neurons_variables = {"iaf_cond_exp": ["V_m", "s_AMPA"]}
+    with pytest.raises(KeyError):
+        spiking_network.get_state()
+
+
+def test_fused_coupling():
+    # The compiled coupling kernel, computed together with the history update, is opt-in,
+    # and should reproduce TVB's coupling
+    pytest.importorskip("numba")
+    data = []
+    for fused_coupling in [False, True]:
+        simulator = build_simulator(5 * DT, interface=build_interface(deterministic=True),
+                                    fused_coupling=fused_coupling)
+        assert (simulator.coupling_kernel is not None) == fused_coupling
+        data.append(simulator.run(simulation_length=10.0)[0][1])
+    assert np.allclose(data[0], data[1])
+
+
+def test_fused_integration():
+    # The compiled integration kernel is opt-in, and should reproduce TVB's integration
+    pytest.importorskip("numba")
+    data = []
+    for fused_integration in [False, True]:
+        simulator = build_simulator(5 * DT, interface=build_interface(deterministic=True),
+                                    fused_integration=fused_integration)
+        assert (simulator.integration_kernel is not None) == fused_integration
+        data.append(simulator.run(simulation_length=10.0)[0][1])
+    assert np.allclose(data[0], data[1])
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from tvb.simulator import coupling
+from tvb.simulator.history import SparseHistory
+from tvb_multiscale.simulator_tvb_deprecated.coupling_kernels import build_delayed_coupling_kernel
+
+
+def sparse_history(N, n_cvar=2, max_delay=20):
+    weights = np.random.uniform(size=(N, N))
+    weights[weights < 0.5] = 0.0  # a sparse connectivity
+    idelays = np.random.randint(0, max_delay + 1, size=(N, N))
+    history = SparseHistory(weights, idelays, np.arange(n_cvar), 1)
+    history.initialize(np.random.uniform(size=(history.n_time, n_cvar, N, 1)))
+    return history
+
+
+def delayed_coupling(N, coupling_function):
+    history = sparse_history(N)
+    kernel = build_delayed_coupling_kernel(history, coupling_function)
+    assert kernel is not None
+    for step in [1, 7, 100]:
+        assert np.allclose(kernel(step), coupling_function(step, history), rtol=1e-5)
+    # Fused history update and coupling of the next step:
+    state = np.random.uniform(size=(3, N, 1))
+    fused_coupling = kernel.update_history_and_couple(100, state).copy()
+    assert np.allclose(history.buffer[100 % history.n_time], state[:2])
+    assert np.allclose(fused_coupling, coupling_function(101, history), rtol=1e-5)
+
+
+def test_linear_delayed_coupling():
+    delayed_coupling(100, coupling.Linear(a=np.array([0.1]), b=np.array([0.5])))
+
+
+def test_sigmoidal_delayed_coupling():
+    delayed_coupling(100, coupling.Sigmoidal())
+
+
+def test_unsupported_coupling():
+    assert build_delayed_coupling_kernel(sparse_history(10), coupling.Difference()) is None
+    assert build_delayed_coupling_kernel(sparse_history(10), coupling.Linear(a=np.ones((10, )))) is None
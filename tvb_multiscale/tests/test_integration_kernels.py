@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from tvb.simulator import integrators, noise
+from tvb_multiscale.simulator_tvb_deprecated.models.reduced_wong_wang_exc_io_inh_i import ReducedWongWangExcIOInhI
+from tvb_multiscale.simulator_tvb_deprecated.integration_kernels import build_integration_kernel
+
+
+def configure_integrator(integrator, model):
+    integrator.configure()
+    if isinstance(integrator, integrators.IntegratorStochastic):
+        integrator.noise.configure_white(integrator.dt)
+    integrator.bounded_state_variable_indices = \
+        np.array([model.state_variables.index(sv) for sv in model.state_variable_boundaries.keys()])
+    integrator.state_variable_boundaries = \
+        np.array(list(model.state_variable_boundaries.values())).astype("float64")
+    return integrator
+
+
+def fused_heun_step(N, n_modes, integrator):
+    model = ReducedWongWangExcIOInhI()
+    model.configure()
+    # Some regional parameters and rates that are not computed by TVB:
+    model.G = np.random.uniform(1.0, 3.0, size=(N, 1))
+    model.R_e = -np.ones((N, ))
+    model.R_e[:3] = 0.0
+    configure_integrator(integrator, model)
+    state = np.random.uniform(size=(model.nvar, N, n_modes))
+    state[2:] *= 10.0
+    coupling = np.random.uniform(size=(1, N, n_modes))
+    kernel = build_integration_kernel(integrator, model, state.shape)
+    assert kernel is not None
+    if isinstance(integrator, integrators.IntegratorStochastic):
+        integrator.noise.random_stream.seed(1)
+    expected = integrator.scheme(state.copy(), model.dfun, coupling, 0.0, 0.0)
+    if isinstance(integrator, integrators.IntegratorStochastic):
+        integrator.noise.random_stream.seed(1)
+    new_state = kernel.scheme(state.copy(), coupling)
+    assert np.allclose(new_state, expected)
+    # The next step is computed into the other buffer:
+    assert kernel.scheme(new_state, coupling) is not new_state
+    # Fused non-state variables' update and bounding:
+    expected = model.update_non_state_variables(new_state.copy(), coupling)
+    integrator.bound_state(expected)
+    assert np.allclose(kernel.update_state(new_state, coupling), expected)
+
+
+def test_fused_heun_deterministic():
+    fused_heun_step(100, 1, integrators.HeunDeterministic(dt=0.1))
+
+
+def test_fused_heun_stochastic():
+    fused_heun_step(100, 3, integrators.HeunStochastic(dt=0.1, noise=noise.Additive(nsig=np.array([1e-3]))))
+
+
+def test_unsupported_integrator():
+    model = ReducedWongWangExcIOInhI()
+    assert build_integration_kernel(integrators.EulerDeterministic(dt=0.1), model, (4, 10, 1)) is None
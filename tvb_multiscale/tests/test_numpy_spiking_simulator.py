@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from tvb_multiscale.numpy_models.simulator import NumPySpikingSimulator
+from tvb_multiscale.numpy_models.devices import NumPyMultimeter, NumPyVoltmeter, NumPySpikeDetector
+
+
+def build_and_run(use_numba, simulation_length=100.0):
+    simulator = NumPySpikingSimulator(0.1, rng_seed=0, use_numba=use_numba)
+    E = simulator.Create("iaf_cond_exp", 40)
+    I = simulator.Create("iaf_psc_exp", 10)
+    poisson_generator = simulator.Create("poisson_generator", params={"rate": 8000.0})
+    spike_detector = simulator.Create("spike_detector")
+    multimeter = simulator.Create("multimeter", params={"record_from": ["V_m"], "interval": 1.0})
+    simulator.Connect(E, E + I, {"rule": "fixed_indegree", "indegree": 5}, {"weight": 1.0, "delay": 1.0})
+    simulator.Connect(I, E + I, {"rule": "all_to_all", "autapses": False}, {"weight": -5.0, "delay": 0.5})
+    simulator.Connect(poisson_generator, E + I, syn_spec={"weight": 2.0, "delay": 0.1})
+    simulator.Connect(E + I, spike_detector)
+    simulator.Connect(multimeter, E)
+    simulator.Prepare()
+    simulator.Run(simulation_length)
+    return simulator, E, poisson_generator, spike_detector, multimeter
+
+
+def test_numpy_spiking_simulator():
+    simulator, E, poisson_generator, spike_detector, multimeter = build_and_run(False)
+    assert simulator.GetKernelStatus("time") == 100.0
+    events = simulator.GetStatus(spike_detector, "events")[0]
+    assert simulator.GetStatus(spike_detector, "n_events")[0] == len(events["times"]) > 0
+    assert np.all(events["times"] > 0.0) and np.all(events["times"] <= 100.0)
+    # The multimeter samples all its 40 neurons every 1 ms:
+    assert simulator.GetStatus(multimeter, "n_events")[0] == 40 * 100
+    simulator.SetStatus(E, {"V_m": -65.0})
+    assert np.all(np.array(simulator.GetStatus(E, "V_m")) == -65.0)
+    # Without any input, there are no more spikes, after any spikes in flight:
+    simulator.SetStatus(poisson_generator, {"rate": 0.0})
+    simulator.Run(20.0)
+    simulator.SetStatus(spike_detector, {"n_events": 0})
+    simulator.Run(50.0)
+    assert simulator.GetStatus(spike_detector, "n_events")[0] == 0
+
+
+def test_numpy_spiking_simulator_numba():
+    # The Numba kernels should reproduce the NumPy ones
+    events = []
+    for use_numba in [False, True]:
+        simulator, E, poisson_generator, spike_detector, multimeter = build_and_run(use_numba, 50.0)
+        events.append(simulator.GetStatus(spike_detector, "events")[0])
+    assert np.array_equal(events[0]["senders"], events[1]["senders"])
+    assert np.allclose(events[0]["times"], events[1]["times"])
+
+
+def test_multimeter_current_data():
+    # The multimeter reads only the events of its last sample, while the simulation runs
+    simulator, E, poisson_generator, spike_detector, multimeter = build_and_run(False, 10.0)
+    device = NumPyMultimeter(multimeter, simulator)
+    for _ in range(3):
+        simulator.Run(5.0)
+        events = simulator.GetStatus(multimeter, "events")[0]
+        last = events["times"] == events["times"][-1]
+        assert np.allclose(device.current_data(["V_m"]).values[0], events["V_m"][last])
+        assert np.all(device.get_events_since(device._last_sample_offset)["times"] == events["times"][-1])
+    # ...also after the device is reset:
+    device.reset
+    simulator.Run(2.0)
+    assert np.allclose(device.current_data(["V_m"]).values[0],
+                       simulator.GetStatus(multimeter, "events")[0]["V_m"][-40:])
+
+
+def test_voltmeter_new_data_mean_values_per_step():
+    # Windows without new samples hold the mean values of the last sample
+    simulator, E, poisson_generator, spike_detector, multimeter = build_and_run(False, 10.0)
+    device = NumPyVoltmeter(multimeter, simulator)
+    values = device.get_new_data_mean_values_per_step(5, 1.0, 10.0)
+    assert values.shape == (5, 1)
+    last_mean = np.mean(simulator.GetStatus(multimeter, "events")[0]["V_m"][-40:])
+    assert np.allclose(values[-1], last_mean)
+    # All samples have been read, so the next window has no new ones:
+    assert np.allclose(device.get_new_data_mean_values_per_step(5, 1.0, 10.0), last_mean)
+
+
+def test_spike_train_store_reset():
+    # The cached spike trains should not survive a reset, even if as many events are recorded afterwards
+    simulator, E, poisson_generator, spike_detector, multimeter = build_and_run(False, 50.0)
+    device = NumPySpikeDetector(spike_detector, simulator)
+    n_spikes = device.spike_train_store.number_of_spikes
+    assert n_spikes == device.number_of_events > 0
+    device.reset
+    new_times = np.linspace(50.0, 60.0, n_spikes)
+    simulator._get_node(spike_detector[0]).record({"senders": np.repeat(E[0], n_spikes), "times": new_times})
+    assert np.allclose(device.spike_train_store.get_spikes_times(E[0]), new_times)
+
+
+if __name__ == "__main__":
+    test_numpy_spiking_simulator()
+    test_numpy_spiking_simulator_numba()
+    test_multimeter_current_data()
+    test_voltmeter_new_data_mean_values_per_step()
+    test_spike_train_store_reset()
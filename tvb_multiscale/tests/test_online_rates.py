@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from pandas import Series
+from tvb_scripts.time_series.model import TimeSeries
+from tvb_multiscale.spiking_models.devices import DeviceSet
+from tvb_multiscale.spiking_models.online_rates import OnlineSpikesRates
+from tvb_multiscale.numpy_models.simulator import NumPySpikingSimulator
+from tvb_multiscale.numpy_models.network import NumPyNetwork
+from tvb_multiscale.numpy_models.devices import NumPySpikeDetector
+
+
+# The spikes' counts of the two regions of a single population, for each one of four updates of 1 ms:
+COUNTS = np.array([[4, 0], [2, 3], [6, 3], [0, 1]])
+DT = 1.0
+
+
+def build_network():
+    spiking_simulator = NumPySpikingSimulator(0.1)
+    spike_detectors = Series()
+    for region in ["r0", "r1"]:
+        spike_detectors[region] = NumPySpikeDetector(spiking_simulator.Create("spike_detector"), spiking_simulator)
+    output_devices = Series()
+    output_devices["E"] = DeviceSet("E", "spike_detector", spike_detectors)
+    return spiking_simulator, NumPyNetwork(spiking_simulator, output_devices=output_devices)
+
+
+def run_online_rates(kernel, n_samples=10):
+    spiking_simulator, spiking_network = build_network()
+    online_rates = OnlineSpikesRates(spiking_network, kernel=kernel, kernel_width=2 * DT, n_samples=n_samples)
+    online_rates.configure(DT)
+    rates = []
+    for i_update, counts in enumerate(COUNTS):
+        # Record the spikes directly to the spike detectors
+        for device, count in zip(online_rates.spike_detectors["E"].values, counts):
+            spiking_simulator._get_node(device.device[0]).record(
+                {"senders": np.zeros((count,), dtype="i"), "times": (i_update + 0.5) * DT * np.ones((count,))})
+        rates.append(online_rates.update(DT)[0].copy())
+    return online_rates, np.array(rates)
+
+
+def test_sliding_rates():
+    online_rates, rates = run_online_rates("sliding")
+    # The spikes of the last 2 updates over 2 ms, and of the first update over 1 ms:
+    expected = np.array([COUNTS[0] / DT] + [(COUNTS[i] + COUNTS[i - 1]) / (2 * DT) for i in range(1, 4)])
+    assert np.allclose(rates, expected)
+
+
+def test_exponential_rates():
+    online_rates, rates = run_online_rates("exponential")
+    decay = np.exp(-0.5)
+    rate = np.zeros((2, ))
+    for counts, update_rates in zip(COUNTS, rates):
+        rate = decay * rate + counts / (2 * DT)
+        assert np.allclose(update_rates, rate)
+
+
+def test_rates_ring_buffer_and_export():
+    # Only the last 3 out of 4 updates are kept, in time order:
+    online_rates, rates = run_online_rates("sliding", n_samples=3)
+    assert np.allclose(online_rates.times, [2 * DT, 3 * DT, 4 * DT])
+    rates_xarray = online_rates.rates
+    assert rates_xarray.dims == ("Time", "Population", "Region")
+    assert list(rates_xarray.coords["Region"].values) == ["r0", "r1"]
+    assert np.allclose(rates_xarray.values[:, 0], rates[1:])
+    time_series = online_rates.to_TimeSeries(TimeSeries())
+    assert np.allclose(time_series.time, online_rates.times)
+    assert np.allclose(time_series.data[:, 0, :, 0], rates[1:])
+    assert np.allclose(online_rates.to_Series()["E"].values, rates[1:])
+
+
+if __name__ == "__main__":
+    test_sliding_rates()
+    test_exponential_rates()
+    test_rates_ring_buffer_and_export()
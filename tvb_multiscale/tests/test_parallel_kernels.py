@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from tvb.simulator import integrators
+from tvb_multiscale.simulator_tvb_deprecated import integration_kernels
+from tvb_multiscale.simulator_tvb_deprecated.models import reduced_wong_wang_exc_io_inh_i as rww
+from tvb_multiscale.simulator_tvb_deprecated.models import generic_2d_oscillator_multiscale as g2d
+from tvb_multiscale.simulator_tvb_deprecated.models import wilson_cowan_constraint as wc
+from tvb_multiscale.simulator_tvb_deprecated.parallel import set_num_threads
+from tvb_multiscale.tests.test_integration_kernels import configure_integrator
+
+
+N = 100
+N_MODES = 2
+
+
+def parallel_dfun(model, module, monkeypatch, state, coupling, local_coupling=0.0):
+    # Compare the dfun of the parallel kernels with the serial one, for the same state
+    expected_state = state.copy()
+    expected = model.dfun(expected_state, coupling, local_coupling)
+    monkeypatch.setattr(module, "use_parallel", lambda size: True)
+    dfun = model.dfun(state, coupling, local_coupling)
+    assert np.allclose(dfun, expected)
+    # Including any in place changes of the state:
+    assert np.allclose(state, expected_state)
+
+
+def test_set_num_threads():
+    assert set_num_threads(1) == 1
+    assert set_num_threads() >= 1
+
+
+def test_rwwei_parallel_dfun(monkeypatch):
+    model = rww.ReducedWongWangExcIOInhI()
+    model.configure()
+    model.G = np.random.uniform(1.0, 3.0, size=(N, ))
+    model.R_e = -np.ones((N, ))
+    model.R_e[:3] = 0.0
+    state = np.random.uniform(size=(model.nvar, N, N_MODES))
+    parallel_dfun(model, rww, monkeypatch, state, np.random.uniform(size=(1, N, N_MODES)), 0.1)
+
+
+def test_g2d_parallel_dfun(monkeypatch):
+    model = g2d.Generic2dOscillator()
+    model.configure()
+    model.V_m = np.zeros((N, ))
+    model.V_m[:3] = 1.0
+    model.tau = np.random.uniform(1.0, 2.0, size=(N, ))
+    # The serial dfun supports only one mode:
+    state = np.random.uniform(size=(model.nvar, N, 1))
+    parallel_dfun(model, g2d, monkeypatch, state, np.random.uniform(size=(2, N, 1)), 0.1)
+
+
+def test_wilson_cowan_parallel_dfun(monkeypatch):
+    model = wc.WilsonCowan()
+    model.configure()
+    model.P = np.random.uniform(size=(N, 1))
+    state = np.random.uniform(size=(model.nvar, N, N_MODES))
+    parallel_dfun(model, wc, monkeypatch, state, np.random.uniform(size=(2, N, N_MODES)), 0.1)
+
+
+def test_parallel_fused_heun(monkeypatch):
+    model = rww.ReducedWongWangExcIOInhI()
+    model.configure()
+    model.G = np.random.uniform(1.0, 3.0, size=(N, 1))
+    integrator = configure_integrator(integrators.HeunDeterministic(dt=0.1), model)
+    state = np.random.uniform(size=(model.nvar, N, N_MODES))
+    coupling = np.random.uniform(size=(1, N, N_MODES))
+    expected = integration_kernels.build_integration_kernel(integrator, model, state.shape).scheme(state.copy(),
+                                                                                                   coupling)
+    monkeypatch.setattr(integration_kernels, "use_parallel", lambda size: True)
+    kernel = integration_kernels.build_integration_kernel(integrator, model, state.shape)
+    assert kernel.heun_step is rww.numba_heun_step_parallel
+    assert np.allclose(kernel.scheme(state.copy(), coupling), expected)
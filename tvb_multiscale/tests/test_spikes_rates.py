@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from tvb_scripts.utils.computations_utils import \
+    compute_spikes_counts, compute_spikes_counts_matrix, spikes_rate_convolution
+
+
+def loop_spikes_counts(spikes_times, time):
+    spikes_counts = np.zeros(time.shape)
+    for spike_time in spikes_times:
+        spikes_counts[np.argmin(np.abs(time - spike_time))] += 1
+    return spikes_counts
+
+
+def spikes_rates(n_neurons, n_spikes, kernel_width_in_points):
+    time = np.arange(0.0, 100.0, 0.1)
+    spikes_times = np.random.uniform(0.0, 100.0, size=(n_spikes,))
+    spikes_senders = np.random.randint(0, n_neurons, size=(n_spikes,))
+    neurons = np.arange(n_neurons)[::-1]
+    spikes_kernel = np.ones((kernel_width_in_points,)) / kernel_width_in_points
+
+    assert np.array_equal(compute_spikes_counts(spikes_times, time), loop_spikes_counts(spikes_times, time))
+
+    spikes_counts = compute_spikes_counts_matrix(spikes_senders, spikes_times, neurons, time)
+    rates = spikes_rate_convolution(spikes_counts, spikes_kernel)
+    for i_neuron, neuron in enumerate(neurons):
+        neuron_spikes_counts = loop_spikes_counts(spikes_times[spikes_senders == neuron], time)
+        assert np.array_equal(spikes_counts[i_neuron], neuron_spikes_counts)
+        assert np.allclose(rates[i_neuron], np.convolve(neuron_spikes_counts, spikes_kernel, mode="same"))
+
+
+def test_spikes_rates():
+    spikes_rates(10, 1000, 11)
+
+
+def test_spikes_rates_long_kernel():
+    spikes_rates(3, 100, 2000)
+
+
+if __name__ == "__main__":
+    test_spikes_rates()
+    test_spikes_rates_long_kernel()
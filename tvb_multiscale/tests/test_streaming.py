@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import pytest
+from tvb_scripts.time_series.model import TimeSeries
+from tvb_multiscale.simulator_tvb_deprecated.streaming import \
+    ChunkedMonitorsWriter, ChunkedMonitorsReader, HDF5, MEMMAP
+
+
+N_SAMPLES = 10
+
+
+def write_output(path, backend):
+    # Two monitors' output, of which only the first one is sampled, in chunks of 3 samples
+    time = 0.1 * np.arange(1, N_SAMPLES + 1)
+    data = np.random.uniform(size=(N_SAMPLES, 2, 4, 1))
+    with ChunkedMonitorsWriter(path, backend, chunk_size=3).open(2) as writer:
+        for time_point, data_point in zip(time, data):
+            writer.write_output([(time_point, data_point), None])
+    return time, data
+
+
+def read_and_compare(path, backend):
+    time, data = write_output(path, backend)
+    with ChunkedMonitorsReader(path) as reader:
+        assert reader.backend == backend
+        # The monitor without any output counts too:
+        assert reader.n_monitors == 2
+        results = reader.results
+        assert np.allclose(results[0][0], time)
+        assert np.allclose(results[0][1], data)
+        assert results[1][0].shape[0] == results[1][1].shape[0] == 0
+        time_series = reader.to_TimeSeries(TimeSeries(), time_slice=slice(2, 9, 2))
+        assert isinstance(time_series.data, np.ndarray)
+        assert np.allclose(time_series.time, time[2:9:2])
+        assert np.allclose(time_series.data, data[2:9:2])
+
+
+def test_memmap_writer_reader(tmpdir):
+    read_and_compare(os.path.join(str(tmpdir), "output"), MEMMAP)
+
+
+def test_hdf5_writer_reader(tmpdir):
+    pytest.importorskip("h5py")
+    read_and_compare(os.path.join(str(tmpdir), "output.h5"), HDF5)
+
+
+def test_copy_to_memmap():
+    # The samples are copied block by block to a memory map
+    dataset = np.random.uniform(size=(2500, 3))
+    for time_slice in [slice(None), slice(10, 2100, 3), slice(5, 5)]:
+        data = ChunkedMonitorsReader._copy_to_memmap(dataset, time_slice)
+        assert np.array_equal(data, dataset[time_slice])
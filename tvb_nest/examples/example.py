@@ -67,12 +67,12 @@ def main_example(tvb_sim_model, nest_model_builder, tvb_nest_builder, nest_nodes
     simulator.configure(tvb_nest_model)
     # ...and simulate!
     t_start = time.time()
-    results = simulator.run(simulation_length=simulation_length)
-    # Integrate NEST one more NEST time step so that multimeters get the last time point
-    # unless you plan to continue simulation later
-    simulator.run_spiking_simulator(simulator.tvb_spikeNet_interface.nest_instance.GetKernelStatus("resolution"))
-    # Clean-up NEST simulation
-    simulator.tvb_spikeNet_interface.nest_instance.Cleanup()
+    # NEST is prepared once for the whole session and cleaned up at its end, even if the simulation fails
+    with simulator.tvb_spikeNet_interface.spiking_network:
+        results = simulator.run(simulation_length=simulation_length)
+        # Integrate NEST one more NEST time step so that multimeters get the last time point
+        # unless you plan to continue simulation later
+        simulator.run_spiking_simulator(simulator.tvb_spikeNet_interface.spiking_network.resolution)
     print("\nSimulated in %f secs!" % (time.time() - t_start))
 
     # -------------------------------------------5. Plot results--------------------------------------------------------
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+
+# A command line harness that measures how TVB-NEST co-simulation scales.
+# It runs a co-simulation end to end (build, interface build, simulation, readout and rates' computation)
+# for every combination of numbers of spiking nodes, populations' orders, simulation lengths,
+# TVB integration time steps and TVB -> NEST interface device models,
+# and writes per phase times, peak resident memory, neurons' and synapses' counts and spike events per second
+# to a CSV and a JSON file, e.g.:
+#   python tvb_nest/examples/scaling_benchmark.py --spiking-nodes 1 2 4 8 --populations-order 100 1000 \
+#       --simulation-length 100.0 --dt 0.1 --devices poisson_generator inhomogeneous_poisson_generator
+# By default, every combination runs in a new process, so that NEST's kernel and the peak memory are per combination.
+
+import os
+import sys
+import json
+import resource
+import argparse
+import itertools
+import traceback
+import multiprocessing
+from collections import OrderedDict
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+
+PHASES = ["tvb_build", "spiking_network_build", "interface_build", "configure", "simulate", "readout", "rates"]
+
+SPIKE_RATE_DEVICES = ["poisson_generator", "inhomogeneous_poisson_generator", "spike_generator", "mip_generator"]
+
+CURRENT_DEVICES = ["dc_generator"]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak_rss / 1024.0 ** 2
+    return peak_rss / 1024.0
+
+
+def number_of_spike_events(spiking_network):
+    n_events = 0
+    for device_set in spiking_network.get_devices_by_model("spike_detector"):
+        for device in device_set.values:
+            n_events += device.number_of_events
+    return n_events
+
+
+def run_cosimulation(spiking_nodes=1, populations_order=100, simulation_length=100.0, dt=0.1,
+                     device="inhomogeneous_poisson_generator", profile_phases=True):
+    # Run one co-simulation end to end and return its measurements
+    from tvb.basic.profile import TvbProfile
+    TvbProfile.set_profile(TvbProfile.LIBRARY_PROFILE)
+    from tvb.simulator.models.reduced_wong_wang_exc_io_inh_i import ReducedWongWangExcIOInhI
+    from tvb_nest.config import CONFIGURED
+    from tvb_nest.nest_models.builders.models.red_ww_exc_io_inh_i_multisynapse import \
+        RedWWExcIOInhIMultisynapseBuilder
+    from tvb_nest.interfaces.builders.models.red_ww_exc_io_inh_i_multisynapse \
+        import RedWWexcIOinhIMultisynapseBuilder as InterfaceRedWWexcIOinhIMultisynapseBuilder
+    from tvb_multiscale.tvb.simulator_builder import SimulatorBuilder
+    from tvb_multiscale.simulator_tvb_deprecated.simulator import Simulator
+
+    times = OrderedDict([(phase, 0.0) for phase in PHASES])
+
+    # ----------------------1. Define a TVB simulator (model, integrator, monitors...)----------------------------------
+    tic = perf_counter()
+    simulator_builder = SimulatorBuilder()
+    simulator_builder.model = ReducedWongWangExcIOInhI
+    simulator_builder.dt = dt
+    tvb_simulator = simulator_builder.build()
+    # The co-simulation Simulator, with the same connectivity, model, integrator and monitors:
+    simulator = Simulator()
+    simulator._config = tvb_simulator._config
+    for attr in ["connectivity", "model", "integrator", "monitors"]:
+        setattr(simulator, attr, getattr(tvb_simulator, attr))
+    simulator.profile_phases = profile_phases
+    nest_nodes_ids = np.arange(spiking_nodes)
+    times["tvb_build"] = perf_counter() - tic
+
+    # ------2. Build the NEST network model (fine-scale regions' nodes, stimulation devices, spike_detectors etc)-------
+    tic = perf_counter()
+    nest_model_builder = RedWWExcIOInhIMultisynapseBuilder(simulator, nest_nodes_ids, config=CONFIGURED)
+    nest_model_builder.population_order = populations_order
+    nest_network = nest_model_builder.build_spiking_network()
+    times["spiking_network_build"] = perf_counter() - tic
+
+    # -----------------------------------3. Build the TVB-NEST interface model -----------------------------------------
+    tic = perf_counter()
+    tvb_nest_builder = InterfaceRedWWexcIOinhIMultisynapseBuilder(simulator, nest_network, nest_nodes_ids,
+                                                                  exclusive_nodes=True,
+                                                                  N_e=populations_order)
+    for interface in tvb_nest_builder.tvb_to_spikeNet_interfaces:
+        interface["model"] = device
+        interface["params"] = {}
+        if device in CURRENT_DEVICES:
+            # Currents are injected to the neurons' default receptor
+            interface["receptor_types"] = 0
+    tvb_nest_model = tvb_nest_builder.build_interface()
+    times["interface_build"] = perf_counter() - tic
+
+    # -----------------------------------4. Simulate and gather results-------------------------------------------------
+    tic = perf_counter()
+    simulator.configure(tvb_nest_model)
+    times["configure"] = perf_counter() - tic
+    with nest_network:
+        tic = perf_counter()
+        results = simulator.run(simulation_length=simulation_length)
+        times["simulate"] = perf_counter() - tic
+        # Integrate NEST one more NEST time step so that multimeters get the last time point
+        simulator.run_spiking_simulator(nest_network.resolution)
+
+    tic = perf_counter()
+    n_spike_events = number_of_spike_events(nest_network)
+    nest_network.get_data_from_multimeter()
+    times["readout"] = perf_counter() - tic
+
+    tic = perf_counter()
+    nest_network.compute_spikes_rates(mode="total_rate")
+    times["rates"] = perf_counter() - tic
+
+    measurements = OrderedDict()
+    measurements["spiking_nodes"] = spiking_nodes
+    measurements["populations_order"] = populations_order
+    measurements["simulation_length"] = simulation_length
+    measurements["dt"] = dt
+    measurements["device"] = device
+    measurements["number_of_neurons"] = \
+        int(np.sum([len(node.neurons()) for node in nest_network.region_nodes.values]))
+    measurements["number_of_synapses"] = int(nest_network.nest_instance.GetKernelStatus("num_connections"))
+    measurements["spike_events"] = n_spike_events
+    measurements["spike_events_per_s"] = n_spike_events / times["simulate"] if times["simulate"] > 0 else np.nan
+    measurements["tvb_time_steps"] = len(results[0][0])
+    for phase, duration in times.items():
+        measurements["%s_s" % phase] = duration
+    if profile_phases:
+        # The co-simulation loop's phases, within the simulate phase:
+        for phase, report in simulator.phase_timer.report().items():
+            measurements["loop_%s_s" % phase] = report["total_s"]
+    measurements["peak_rss_mb"] = peak_rss_mb()
+    measurements["error"] = ""
+    return measurements
+
+
+def _run_combination(combination, profile_phases=True):
+    try:
+        return run_cosimulation(profile_phases=profile_phases, **combination)
+    except Exception:
+        # Record the failure of this combination, and go on with the next ones
+        measurements = OrderedDict(combination)
+        measurements["peak_rss_mb"] = peak_rss_mb()
+        measurements["error"] = traceback.format_exc()
+        return measurements
+
+
+def sweep(spiking_nodes=[1], populations_order=[100], simulation_length=[100.0], dt=[0.1],
+          devices=["inhomogeneous_poisson_generator"], profile_phases=True, in_process=False, logger=print):
+    # Run all combinations of the input parameters and return their measurements in a pandas.DataFrame
+    combinations = [OrderedDict(zip(["spiking_nodes", "populations_order", "simulation_length", "dt", "device"],
+                                    values))
+                    for values in itertools.product(spiking_nodes, populations_order,
+                                                    simulation_length, dt, devices)]
+    measurements = []
+    for i_combination, combination in enumerate(combinations):
+        logger("%d/%d: %s" % (i_combination + 1, len(combinations), dict(combination)))
+        if in_process:
+            measurements.append(_run_combination(combination, profile_phases))
+        else:
+            # A new process per combination, for a new NEST kernel and a peak memory per combination
+            with multiprocessing.get_context("spawn").Pool(1) as pool:
+                measurements.append(pool.apply(_run_combination, (combination, profile_phases)))
+        if len(measurements[-1]["error"]) > 0:
+            logger("Failed!:\n%s" % measurements[-1]["error"])
+        else:
+            logger("Done in %f sec!" % np.sum([measurements[-1]["%s_s" % phase] for phase in PHASES]))
+    return pd.DataFrame(measurements)
+
+
+def write_results(results, output_path):
+    # Write the measurements to output_path + ".csv" and output_path + ".json"
+    output_dir = os.path.dirname(output_path)
+    if len(output_dir) > 0 and not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    results.to_csv(output_path + ".csv", index=False)
+    with open(output_path + ".json", "w") as file:
+        json.dump(json.loads(results.to_json(orient="records")), file, indent=2)
+    return output_path + ".csv", output_path + ".json"
+
+
+def parse_arguments(args=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmark of TVB-NEST co-simulation.")
+    parser.add_argument("--spiking-nodes", type=int, nargs="+", default=[1],
+                        help="Numbers of TVB regions modelled by NEST spiking networks.")
+    parser.add_argument("--populations-order", type=int, nargs="+", default=[100],
+                        help="Orders of the number of neurons per spiking population.")
+    parser.add_argument("--simulation-length", type=float, nargs="+", default=[100.0],
+                        help="Simulation lengths in ms.")
+    parser.add_argument("--dt", type=float, nargs="+", default=[0.1],
+                        help="TVB integration time steps in ms.")
+    parser.add_argument("--devices", type=str, nargs="+", default=["inhomogeneous_poisson_generator"],
+                        choices=SPIKE_RATE_DEVICES + CURRENT_DEVICES,
+                        help="Models of the NEST devices that act as TVB proxy nodes.")
+    parser.add_argument("--output", type=str, default=os.path.join(os.getcwd(), "scaling_benchmark"),
+                        help="Path of the output files, without the .csv and .json extension.")
+    parser.add_argument("--no-phases-profile", action="store_true",
+                        help="Do not time the phases of the co-simulation loop.")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Run all combinations in this process. Peak memory is then the one of the whole sweep.")
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parse_arguments(args)
+    results = sweep(args.spiking_nodes, args.populations_order, args.simulation_length, args.dt, args.devices,
+                    profile_phases=not args.no_phases_profile, in_process=args.in_process)
+    for output_file in write_results(results, args.output):
+        print("Results written to %s" % output_file)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,17 @@
 # -*- coding: utf-8 -*-
+from collections import OrderedDict
+from functools import partial
+from itertools import chain
 from tvb_nest.config import CONFIGURED
 from tvb_nest.nest_models.devices import NESTInputDeviceDict, NESTOutputDeviceDict, NESTOutputSpikeDeviceDict
+from tvb_nest.interfaces.tvb_to_nest_devices_interfaces import TVBtoNESTDeviceInterface
 from tvb_multiscale.interfaces.base import TVBSpikeNetInterface
 
 
+def _collect_values_dicts(interface, values_dicts, i_interface, values):
+    values_dicts[i_interface] = interface.get_values_dicts(values)
+
+
 class TVBNESTInterface(TVBSpikeNetInterface):
     _available_input_devices = NESTInputDeviceDict.keys()
     _current_input_devices = ["dc_generator"]
@@ -20,3 +28,23 @@ class TVBNESTInterface(TVBSpikeNetInterface):
     @property
     def nest_instance(self):
         return self.spiking_network.nest_instance
+
+    def _compile_exchange_plan(self):
+        # Devices of all TVB -> NEST interfaces of the same model are set together, with a single SetStatus call.
+        # For every device model, we keep the concatenated NEST devices' handles,
+        # and the lists of parameters' dictionaries, one list per interface:
+        self._bulk_set = OrderedDict()
+        super(TVBNESTInterface, self)._compile_exchange_plan()
+
+    def _tvb_to_spikeNet_setter(self, interface):
+        if not isinstance(interface, TVBtoNESTDeviceInterface) or \
+                any(len(interface[node].device) != 1 for node in interface.index):
+            return interface.set
+        devices, values_dicts = self._bulk_set.setdefault(interface.model, ([], []))
+        devices.extend(interface.nest_devices)
+        values_dicts.append([])
+        return partial(_collect_values_dicts, interface, values_dicts, len(values_dicts) - 1)
+
+    def _set_tvb_to_spikeNet(self):
+        for devices, values_dicts in self._bulk_set.values():
+            self.nest_instance.SetStatus(devices, list(chain(*values_dicts)))
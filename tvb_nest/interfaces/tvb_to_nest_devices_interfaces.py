@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from abc import ABCMeta, abstractmethod
 
 import numpy as np
 from tvb_multiscale.interfaces.tvb_to_spikeNet_device_interface import TVBtoSpikeNetDeviceInterface
@@ -8,55 +9,84 @@ from tvb_multiscale.interfaces.tvb_to_spikeNet_device_interface import TVBtoSpik
 
 
 class TVBtoNESTDeviceInterface(TVBtoSpikeNetDeviceInterface):
+    __metaclass__ = ABCMeta
 
     @property
     def nest_instance(self):
         return self.spiking_network.nest_instance
 
+    @property
+    def nest_devices(self):
+        # The NEST handles of all devices of the interface, in the order of its nodes
+        return tuple(gid for node in self.index for gid in self[node].device)
+
+    def _window_mean(self, values):
+        # Devices that cannot follow a time-indexed batch of values of shape (nodes, time)
+        # receive the mean values of the synchronization window, for the whole window's duration
+        values = np.array(values)
+        if values.ndim > 1:
+            return values.mean(axis=-1), values.shape[-1] * self.dt
+        return values, self.dt
+
+    @abstractmethod
+    def get_values_dicts(self, values):
+        # A list of one dictionary of parameters per device,
+        # so that devices of many interfaces can be set with a single SetStatus call
+        pass
+
+    def set(self, values):
+        self.nest_instance.SetStatus(self.nest_devices, self.get_values_dicts(values))
+
 
 class TVBtoNESTDCGeneratorInterface(TVBtoNESTDeviceInterface):
 
-    def set(self, values):
-        self.Set({"amplitude": values,
-                  "origin": self.nest_instance.GetKernelStatus("time"),
-                  "start": self.nest_instance.GetKernelStatus("min_delay"),
-                  "stop": self.dt})
+    def get_values_dicts(self, values):
+        values, duration = self._window_mean(values)
+        origin = self.spiking_network.time
+        start = self.spiking_network.min_delay
+        return [{"amplitude": value, "origin": origin, "start": start, "stop": duration} for value in values]
 
 
 class TVBtoNESTPoissonGeneratorInterface(TVBtoNESTDeviceInterface):
 
-    def set(self, values):
-        self.Set({"rate": np.maximum([0], values),
-                  "origin": self.nest_instance.GetKernelStatus("time"),
-                  "start": self.nest_instance.GetKernelStatus("min_delay"),
-                  "stop": self.dt})
+    def get_values_dicts(self, values):
+        values, duration = self._window_mean(values)
+        origin = self.spiking_network.time
+        start = self.spiking_network.min_delay
+        return [{"rate": value, "origin": origin, "start": start, "stop": duration}
+                for value in np.maximum(0.0, values)]
 
 
 class TVBtoNESTInhomogeneousPoissonGeneratorInterface(TVBtoNESTDeviceInterface):
 
-    def set(self, values):
-        values = np.maximum([0], values).tolist()
-        for i_val, val in enumerate(values):
-            values[i_val] = [val]
-        self.Set({"rate_times": [[self.nest_instance.GetKernelStatus("time") +
-                                  self.nest_instance.GetKernelStatus("resolution")]] * len(values),
-                  "rate_values": values})
+    def get_values_dicts(self, values):
+        # One rate value per TVB time step of the synchronization window:
+        values = np.maximum(0.0, values)
+        if values.ndim < 2:
+            values = values[:, np.newaxis]
+        rate_times = (self.spiking_network.time +
+                      self.spiking_network.resolution + self.dt * np.arange(values.shape[-1])).tolist()
+        return [{"rate_times": rate_times, "rate_values": value} for value in values.tolist()]
 
 
 class TVBtoNESTSpikeGeneratorInterface(TVBtoNESTDeviceInterface):
 
-    def set(self, values):
+    def get_values_dicts(self, values):
         # TODO: change this so that rate corresponds to number of spikes instead of spikes' weights
-        self.Set({"spikes_times": np.ones((len(values),)) *
-                                  self.nest_instance.GetKernelStatus("min_delay"),
-                  "origin": self.nest_instance.GetKernelStatus("time"),
-                  "spike_weights": values})
+        # One spike per TVB time step of the synchronization window:
+        values = np.array(values)
+        if values.ndim < 2:
+            values = values[:, np.newaxis]
+        spike_times = self.spiking_network.min_delay + self.dt * np.arange(values.shape[-1])
+        origin = self.spiking_network.time
+        return [{"spike_times": spike_times, "origin": origin, "spike_weights": value} for value in values]
 
 
 class TVBtoNESTMIPGeneratorInterface(TVBtoNESTDeviceInterface):
 
-    def set(self, values):
-        self.Set({"rate": np.maximum(0, values)})
+    def get_values_dicts(self, values):
+        values = self._window_mean(values)[0]
+        return [{"rate": value} for value in np.maximum(0.0, values)]
 
 
 INPUT_INTERFACES_DICT = {"dc_generator": TVBtoNESTDCGeneratorInterface,
@@ -21,6 +21,11 @@ class TVBtoNESTParameterInterface(TVBtoSpikeNetParameterInterface):
         return self.spiking_network.nest_instance
 
     def set(self, values):
+        values = np.array(values)
+        if values.ndim > 1:
+            # Parameters are kept constant within a synchronization window,
+            # equal to the mean of the window's time-indexed batch of values of shape (nodes, time):
+            values = values.mean(axis=-1)
         values = ensure_list(values)
         n_vals = len(values)
         if n_vals not in [1, self.n_nodes]:
@@ -186,6 +186,18 @@ class NESTModelBuilder(SpikingModelBuilder):
             syn_spec["delay"] = self._assert_delay(syn_spec["delay"])
         self.nest_instance.Connect(source, target, conn_spec, syn_spec)
 
+    def _assert_nodes_connection_synapse(self, synapse_model, delay):
+        synapse_model = self._assert_synapse_model(synapse_model, delay)
+        if synapse_model == "rate_connection_instantaneous":
+            return synapse_model, None  # For instantaneous rate connections
+        return synapse_model, self._assert_delay(delay)
+
+    def connect_populations_batch(self, sources, targets, syn_spec):
+        if syn_spec["delay"] is None:
+            del syn_spec["delay"]  # For instantaneous rate connections
+        self.nest_instance.Connect(tuple(sources.tolist()), tuple(targets.tolist()),
+                                   {"rule": "one_to_one"}, syn_spec)
+
     def build_spiking_populations(self, model, size, params, *args, **kwargs):
         return self.nest_instance.Create(model, int(np.round(size)), params=params)
 
@@ -1,4 +1,7 @@
+from collections import OrderedDict
+import numpy as np
 
+from tvb_scripts.utils.data_structures_utils import ensure_list
 from tvb_multiscale.spiking_models.devices import \
     Device, InputDevice, OutputDevice, SpikeDetector, Multimeter, Voltmeter, SpikeMultimeter
 
@@ -190,32 +193,89 @@ NESTInputDeviceDict = {"poisson_generator": NESTPoissonGenerator,
 class NESTOutputDevice(NESTDevice, OutputDevice):
     model = "output_device"
 
+    # The events read from NEST are moved to an archive of chunks of events, and NEST's buffer is emptied,
+    # so that reading the newest events does not fetch all the events recorded so far from NEST.
+    _events_archive = None
+    _number_of_archived_events = 0
+
     def __init__(self, device, nest_instance):
         super(NESTOutputDevice, self).__init__(device, nest_instance)
         self.model = "output_device"
+        self._events_archive = []
+        self._number_of_archived_events = 0
+
+    def _archive_events(self):
+        n_events = self.nest_instance.GetStatus(self.device, "n_events")[0]
+        if n_events > 0:
+            events = self.nest_instance.GetStatus(self.device, "events")[0]
+            self._events_archive.append(OrderedDict([(key, np.array(val)) for key, val in events.items()]))
+            self._number_of_archived_events += n_events
+            self.nest_instance.SetStatus(self.device, {'n_events': 0})
+        return self._events_archive
 
     @property
     def events(self):
-        return self.nest_instance.GetStatus(self.device)[0]["events"]
+        archive = self._archive_events()
+        if len(archive) == 0:
+            return self.nest_instance.GetStatus(self.device, "events")[0]
+        if len(archive) > 1:
+            # Keep a single chunk of events from now on:
+            self._events_archive = [OrderedDict([(key, np.concatenate([events[key] for events in archive]))
+                                                 for key in archive[0].keys()])]
+        return self._events_archive[0]
 
     @property
     def number_of_events(self):
-        return self.nest_instance.GetStatus(self.device, "n_events")[0]
+        return self._number_of_archived_events + self.nest_instance.GetStatus(self.device, "n_events")[0]
 
     @property
     def n_events(self):
         return self.number_of_events
-    
+
+    def get_events_since(self, start=0, variables=None):
+        # Only the chunks of events that the events from the start-th event on belong to are concatenated
+        archive = self._archive_events()
+        chunks = []
+        first = self._number_of_archived_events
+        for events in reversed(archive):
+            if first <= start:
+                break
+            first -= len(events["times"])
+            chunks.append(events)
+        if len(chunks) == 0:
+            events = self.nest_instance.GetStatus(self.device, "events")[0]
+            if variables is None:
+                variables = events.keys()
+            return OrderedDict([(var, np.array(events[var])) for var in ensure_list(variables)])
+        chunks.reverse()
+        if variables is None:
+            variables = chunks[0].keys()
+        return OrderedDict([(var, np.concatenate([events[var] for events in chunks])[start - first:])
+                            for var in ensure_list(variables)])
+
+    def _restore_events(self, events):
+        # NEST devices' events cannot be set, but they can be archived
+        events = OrderedDict([(key, np.array(val)) for key, val in events.items()])
+        if len(events["times"]) > 0:
+            self._events_archive = [events]
+            self._number_of_archived_events = len(events["times"])
+
     @property
     def reset(self):
         self.nest_instance.SetStatus(self.device, {'n_events': 0})
+        self._events_archive = []
+        self._number_of_archived_events = 0
+        self.reset_events_cursors()
+        self._last_sample_offset = 0
+        # The spike trains cached for the events before the reset are no longer valid:
+        self._spike_train_store = None
 
     def filter_events(self, events=None,  variables=None, neurons=None, times=None,
-                      exclude_neurons=[], exclude_times=[]):
+                      exclude_neurons=[], exclude_times=[], time_range=None):
         if events is None:
             events = self.events
         return super(NESTOutputDevice, self).filter_events(events, variables, neurons,
-                                                           times, exclude_neurons, exclude_times)
+                                                           times, exclude_neurons, exclude_times, time_range)
 
 
 class NESTSpikeDetector(NESTOutputDevice, SpikeDetector):
@@ -12,8 +12,42 @@ from tvb_scripts.utils.log_error_utils import initialize_logger
 LOG = initialize_logger(__name__)
 
 
+class NESTSession(object):
+
+    # A NEST simulation session:
+    # NEST is prepared once, advanced by Run() calls of any length, and cleaned up at the end.
+    # It can be used as a context manager, which guarantees Cleanup() even if the simulation fails.
+
+    def __init__(self, nest_instance):
+        self.nest_instance = nest_instance
+        self.prepared = False
+
+    def prepare(self):
+        if not self.prepared:
+            self.nest_instance.Prepare()
+            self.prepared = True
+
+    def run(self, simulation_length):
+        self.prepare()
+        self.nest_instance.Run(simulation_length)
+
+    def cleanup(self):
+        if self.prepared:
+            self.nest_instance.Cleanup()
+            self.prepared = False
+
+    def __enter__(self):
+        self.prepare()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
+
+
 class NESTNetwork(SpikingNetwork):
 
+    _kernel_status_cached = False
+
     def __init__(self, nest_instance=None,
                  region_nodes=pd.Series(),
                  output_devices=pd.Series(),
@@ -22,6 +56,7 @@ class NESTNetwork(SpikingNetwork):
         if nest_instance is None:
             nest_instance = load_nest(self.config, LOG)
         self.nest_instance = nest_instance
+        self.session = NESTSession(self.nest_instance)
         super(NESTNetwork, self).__init__(region_nodes, output_devices, input_devices, config)
 
         if isinstance(self.region_nodes, pd.Series):
@@ -45,12 +80,50 @@ class NESTNetwork(SpikingNetwork):
 
         LOG.info("%s created!" % self.__class__)
 
+    def update_kernel_status(self):
+        # Cache the kernel properties that do not change during simulation,
+        # and the simulation time, as an integer number of resolution steps,
+        # to be advanced locally by every Run() call.
+        # It has to be called again if NEST is run, or reset, outside this network.
+        self._resolution, self._min_delay, time = \
+            self.nest_instance.GetKernelStatus(["resolution", "min_delay", "time"])
+        self._time_steps = int(round(time / self._resolution))
+        self._kernel_status_cached = True
+
+    @property
+    def resolution(self):
+        if self._kernel_status_cached:
+            return self._resolution
+        return self.nest_instance.GetKernelStatus("resolution")
+
     @property
     def min_delay(self):
+        if self._kernel_status_cached:
+            return self._min_delay
         return self.nest_instance.GetKernelStatus("min_delay")
 
+    @property
+    def time(self):
+        if self._kernel_status_cached:
+            return self._time_steps * self._resolution
+        return self.nest_instance.GetKernelStatus("time")
+
+    def _set_time(self, time):
+        # NEST's time can be set only before NEST is run
+        self.nest_instance.SetKernelStatus({"time": time})
+        if self._kernel_status_cached:
+            self._time_steps = int(round(time / self._resolution))
+
     def configure(self, *args, **kwargs):
-        self.nest_instance.Prepare(*args, **kwargs)
+        # Prepare NEST, unless already prepared in the current session,
+        # and cache the kernel status, now that the network is built
+        self.session.prepare()
+        self.update_kernel_status()
+
+    def Run(self, simulation_length, *args, **kwargs):
+        self.session.run(simulation_length)
+        if self._kernel_status_cached:
+            self._time_steps += int(round(simulation_length / self._resolution))
 
-    def Run(self, *args, **kwargs):
-        self.nest_instance.Run(*args, **kwargs)
+    def Cleanup(self, *args, **kwargs):
+        self.session.cleanup()
@@ -6,6 +6,7 @@
 
 import numpy as np
 from itertools import product
+from scipy.signal import oaconvolve
 
 from sklearn.cluster import AgglomerativeClustering
 from tvb_scripts.config import CONFIGURED
@@ -191,17 +192,73 @@ def spikes_events_to_time_index(spike_time, time):
     return np.argmin(np.abs(time-spike_time))
 
 
+def spikes_events_to_time_indices(spikes_times, time):
+    # Vectorized spikes_events_to_time_index, for a time vector sorted in ascending order:
+    # the index of the nearest time point, with ties going to the earlier one, as with np.argmin.
+    spikes_times = np.asarray(spikes_times)
+    if len(spikes_times) == 0:
+        return np.array([], dtype="i")
+    if np.any(spikes_times < time[0]) or np.any(spikes_times > time[-1]):
+        warning("Spike time is outside the input time vector!")
+    if len(time) == 1:
+        return np.zeros(spikes_times.shape, dtype="i")
+    inds = np.clip(np.searchsorted(time, spikes_times, side="left"), 1, len(time) - 1)
+    inds -= ((spikes_times - time[inds - 1]) <= (time[inds] - spikes_times)).astype(inds.dtype)
+    return inds
+
+
 def compute_spikes_counts(spikes_times, time):
-    spikes_counts = np.zeros(time.shape)
-    for spike_time in spikes_times:
-        spikes_counts[spikes_events_to_time_index(spike_time, time)] += 1
-    return spikes_counts
+    if len(time) > 1 and np.any(np.diff(time) < 0):
+        # Unsorted time vector, so we have to search for every spike:
+        spikes_counts = np.zeros(time.shape)
+        for spike_time in spikes_times:
+            spikes_counts[spikes_events_to_time_index(spike_time, time)] += 1
+        return spikes_counts
+    return np.bincount(spikes_events_to_time_indices(spikes_times, time),
+                       minlength=len(time)).astype("float64").reshape(time.shape)
+
+
+def compute_spikes_counts_matrix(spikes_senders, spikes_times, neurons, time):
+    # Bin the spikes of all neurons at once into a (neurons x time) matrix of spikes' counts.
+    # Spikes of senders not in neurons are ignored.
+    neurons = np.asarray(neurons)
+    n_neurons = len(neurons)
+    n_times = len(time)
+    spikes_senders = np.asarray(spikes_senders)
+    spikes_times = np.asarray(spikes_times)
+    if n_neurons == 0 or len(spikes_times) == 0:
+        return np.zeros((n_neurons, n_times))
+    neurons_order = np.argsort(neurons, kind="mergesort")
+    sorted_neurons = neurons[neurons_order]
+    inds = np.clip(np.searchsorted(sorted_neurons, spikes_senders), 0, n_neurons - 1)
+    mask = sorted_neurons[inds] == spikes_senders
+    rows = neurons_order[inds[mask]]
+    if n_times > 1 and np.any(np.diff(time) < 0):
+        cols = np.array([spikes_events_to_time_index(spike_time, time) for spike_time in spikes_times[mask]],
+                        dtype="i")
+    else:
+        cols = spikes_events_to_time_indices(spikes_times[mask], time)
+    return np.bincount(rows * n_times + cols,
+                       minlength=n_neurons * n_times).astype("float64").reshape((n_neurons, n_times))
 
 
 def spikes_rate_convolution(spike, spikes_kernel):
+    # The convolution is computed along the last (time) axis,
+    # for a single spikes' counts vector, or a (neurons x time) matrix of them.
+    spike = np.asarray(spike)
     if (spike != 0).any():
         if len(spikes_kernel) > 1:
-            return np.convolve(spike, spikes_kernel, mode="same")
+            if spike.ndim == 1:
+                return np.convolve(spike, spikes_kernel, mode="same")
+            elif len(spikes_kernel) > spike.shape[-1]:
+                # np.convolve's "same" mode returns the size of the longer input,
+                # which oaconvolve doesn't, so we compute per row in this case:
+                return np.array([np.convolve(s, spikes_kernel, mode="same")
+                                 for s in spike.reshape((-1, spike.shape[-1]))]).reshape(
+                    spike.shape[:-1] + (len(spikes_kernel), ))
+            else:
+                return oaconvolve(spike, np.reshape(spikes_kernel, (1, ) * (spike.ndim - 1) + (-1, )),
+                                  mode="same", axes=-1)
         else:
             return spike * spikes_kernel
     else:
@@ -699,72 +699,77 @@ def copy_object_attributes(obj1, obj2, attr1, attr2=None, deep_copy=False, check
 def sort_events_by_x_and_y(events, x="senders", y="times",
                            filter_x=None, filter_y=None, exclude_x=[], exclude_y=[]):
     xs = np.array(flatten_list(events[x]))
+    ys = np.array(flatten_list(events[y]))
     if filter_x is None:
-        xlabels = np.unique(xs).tolist()
+        xlabels = np.unique(xs)
     else:
-        xlabels = np.unique(flatten_list(filter_x)).tolist()
-    for xlbl in exclude_x:
-        try:
-            xlabels.remove(xlbl)
-        except:
-            pass
-    ys = flatten_list(events[y])
+        xlabels = np.unique(flatten_list(filter_x))
+    if len(exclude_x) > 0:
+        xlabels = xlabels[~np.isin(xlabels, flatten_list(exclude_x))]
+    inds = np.isin(xs, xlabels)
     if filter_y is not None:
-        ys = [yy for yy in ys if yy in flatten_list(filter_y)]
-    for yy in exclude_y:
-        try:
-            ys.remove(yy)
-        except:
-            pass
-    ys = np.array(ys)
+        inds = np.logical_and(inds, np.isin(ys, flatten_list(filter_y)))
+    if len(exclude_y) > 0:
+        inds = np.logical_and(inds, ~np.isin(ys, flatten_list(exclude_y)))
+    xs = xs[inds]
+    ys = ys[inds]
+    # A single sort groups the events by x and sorts them by y within each group:
+    order = np.lexsort((ys, xs))
+    xs = xs[order]
+    ys = ys[order]
+    starts = np.searchsorted(xs, xlabels, side="left")
+    stops = np.searchsorted(xs, xlabels, side="right")
     sorted_events = OrderedDict()
-    for xlbl in xlabels:
-        sorted_events[xlbl] = np.sort(ys[xs == xlbl])
+    for xlbl, start, stop in zip(xlabels.tolist(), starts, stops):
+        sorted_events[xlbl] = ys[start:stop]
     return sorted_events
 
 
 def data_xarray_from_continuous_events(events, times, senders, variables=[],
                                        filter_senders=None, exclude_senders=[], name=None,
-                                       dims_names=["Variable", "Neuron", "Time"]):
-    unique_times = np.unique(times).tolist()
+                                       dims_names=["Variable", "Neuron", "Time"], dtype="float64", reduction=None):
+    # Arrange the continuous events of (time, sender) samples into a (Variable x Neuron x Time) DataArray.
+    # If reduction is "mean" or "sum", the neurons are reduced while the data is built,
+    # and a (Variable x Time) DataArray is returned instead.
+    # (Variable, Neuron, Time) points without a sample are NaN.
+    times = np.asarray(times)
+    senders = np.asarray(senders)
+    unique_times, time_inds = np.unique(times, return_inverse=True)
     if filter_senders is None:
-        filter_senders = np.unique(senders).tolist()
+        filter_senders = np.unique(senders)
     else:
-        filter_senders = np.unique(flatten_list(filter_senders)).tolist()
-    for sender in exclude_senders:
-        filter_senders.remove(sender)
-    if len(variables) is None:
+        filter_senders = np.unique(flatten_list(filter_senders))
+    if len(exclude_senders) > 0:
+        filter_senders = filter_senders[~np.isin(filter_senders, flatten_list(exclude_senders))]
+    if variables is None or len(variables) == 0:
         variables = list(events.keys())
-    coords = OrderedDict()
-    coords[dims_names[0]] = variables
-    coords[dims_names[1]] = filter_senders
-    coords[dims_names[2]] = unique_times
+    # Keep only the samples of the chosen senders:
+    inds = np.isin(senders, filter_senders)
+    time_inds = time_inds[inds]
     n_senders = len(filter_senders)
     n_times = len(unique_times)
-    data = np.empty((len(variables), n_senders, n_times))
-    last_time = times[0]
-    i_time = unique_times.index(last_time)
-    i_sender = -1
-    for id, (time, sender) in enumerate(zip(times, senders)):
-        # Try best guess of next sender:
-        i_sender += 1
-        if i_sender >= n_senders:
-            i_sender = 0
-        if filter_senders[i_sender] != sender:
-            try:
-                i_sender = filter_senders.index(sender)
-            except:
-                break  # This sender is not one of the chosen filter_senders
-        if time != last_time:
-            last_time = time
-            # Try best guess of next time index:
-            i_time += 1
-            if i_time >= n_times:
-                i_time = n_times - 1
-            if time != unique_times[i_time]:
-                i_time = unique_times.index(time)
+    coords = OrderedDict()
+    coords[dims_names[0]] = variables
+    if reduction is None:
+        coords[dims_names[1]] = filter_senders.tolist()
+        coords[dims_names[2]] = unique_times.tolist()
+        sender_inds = np.searchsorted(filter_senders, senders[inds])
+        data = np.full((len(variables), n_senders, n_times), np.nan, dtype=dtype)
+        for i_var, var in enumerate(variables):
+            data[i_var, sender_inds, time_inds] = np.asarray(events[var])[inds]
+    else:
+        coords[dims_names[2]] = unique_times.tolist()
+        data = np.empty((len(variables), n_times), dtype=dtype)
+        if reduction == "mean":
+            n_samples = np.bincount(time_inds, minlength=n_times).astype("float64")
+            n_samples[n_samples == 0] = np.nan
+        elif reduction != "sum":
+            raise_value_error("reduction %s is not one of None, 'mean' or 'sum'!" % str(reduction))
         for i_var, var in enumerate(variables):
-            data[i_var, i_sender, i_time] = events[var][id]
+            data[i_var] = np.bincount(time_inds, weights=np.asarray(events[var], dtype="float64")[inds],
+                                      minlength=n_times)
+            if reduction == "mean":
+                data[i_var] /= n_samples
     return DataArray(data, dims=list(coords.keys()), coords=coords, name=name)
 
 
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+import json
+from collections import OrderedDict
+from time import perf_counter_ns
+
+import numpy as np
+import pandas as pd
+
+
+class PhaseTimer(object):
+    """
+    Low overhead wall time accounting of the phases of a loop.
+
+    Timing is chained, i.e., each phase is timed from the end of the previous one:
+
+        t = timer.tic()
+        ...phase 1 code...
+        t = timer.lap("phase1", t)
+        ...phase 2 code...
+        t = timer.lap("phase2", t)
+
+    Phases timed from different threads should be different ones.
+    If record_samples is True, every single duration is kept too, for per step statistics.
+    """
+
+    enabled = True
+
+    def __init__(self, phases=[], record_samples=False):
+        self.phases = list(phases)
+        self.record_samples = record_samples
+        self.reset()
+
+    def reset(self):
+        self._totals = OrderedDict([(phase, 0) for phase in self.phases])
+        self._counts = OrderedDict([(phase, 0) for phase in self.phases])
+        self._samples = OrderedDict([(phase, []) for phase in self.phases])
+
+    def tic(self):
+        return perf_counter_ns()
+
+    def lap(self, phase, t0):
+        now = perf_counter_ns()
+        try:
+            self._totals[phase] += now - t0
+            self._counts[phase] += 1
+        except KeyError:
+            # First time this phase is timed
+            self.phases.append(phase)
+            self._totals[phase] = now - t0
+            self._counts[phase] = 1
+            self._samples[phase] = []
+        if self.record_samples:
+            self._samples[phase].append(now - t0)
+        return now
+
+    def samples(self, phase):
+        # Durations of all recordings of phase in seconds
+        return np.array(self._samples[phase]) * 1e-9
+
+    def report(self, output="dict"):
+        # Report per phase total time (sec), number of recordings, mean (usec)
+        # and fraction of the summed time of all phases,
+        # plus the standard deviation, min and max (usec) if samples have been recorded,
+        # as a dict, a pandas.DataFrame or a JSON string.
+        # The fractions are not relative to the wall time since reset(),
+        # which includes any time between the timed loops.
+        summed_time = sum(self._totals.values())
+        report = OrderedDict()
+        for phase in self.phases:
+            total = self._totals[phase]
+            count = self._counts[phase]
+            report[phase] = OrderedDict([("total_s", total * 1e-9),
+                                         ("count", count),
+                                         ("mean_us", total * 1e-3 / count if count > 0 else 0.0),
+                                         ("fraction", total / summed_time if summed_time > 0 else 0.0)])
+            if self.record_samples and len(self._samples[phase]) > 0:
+                samples = np.array(self._samples[phase]) * 1e-3
+                report[phase]["std_us"] = float(np.std(samples))
+                report[phase]["min_us"] = float(np.min(samples))
+                report[phase]["max_us"] = float(np.max(samples))
+        if output == "DataFrame":
+            return pd.DataFrame.from_dict(report, orient="index")
+        elif output == "json":
+            return json.dumps(report, indent=2)
+        return report
+
+
+class NullPhaseTimer(PhaseTimer):
+    """A switched off PhaseTimer, which does not time anything."""
+
+    enabled = False
+
+    def tic(self):
+        return 0
+
+    def lap(self, phase, t0):
+        return 0